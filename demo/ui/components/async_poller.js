@@ -3,11 +3,17 @@ import {
   html,
 } from 'https://cdn.jsdelivr.net/gh/lit/dist@3/core/lit-core.min.js';
 
+// Consecutive stream errors tolerated before falling back to polling.
+const MAX_STREAM_ERRORS = 3;
+// Bursts of change notifications are coalesced into one refresh.
+const REFRESH_DEBOUNCE_MS = 250;
+
 class AsyncPoller extends LitElement {
   static properties = {
     triggerEvent: {type: String},
     action: {type: Object},
     polling_interval: {type: Number},
+    stream_url: {type: String},
   };
 
   render() {
@@ -15,24 +21,102 @@ class AsyncPoller extends LitElement {
   }
 
   firstUpdated() {
+    this.started = true;
+    this.start();
+  }
+
+  updated(changedProperties) {
+    // Switching conversations changes the stream URL; resubscribe.
+    if (this.started && changedProperties.has('stream_url')) {
+      this.stop();
+      this.start();
+    }
+  }
+
+  disconnectedCallback() {
+    this.stop();
+    super.disconnectedCallback();
+  }
+
+  start() {
+    if (this.stream_url && window.EventSource) {
+      this.openStream();
+    } else {
+      this.startPolling();
+    }
+  }
+
+  stop() {
+    if (this.source) {
+      this.source.close();
+      this.source = null;
+    }
+    clearTimeout(this.pollTimer);
+    clearTimeout(this.refreshTimer);
+    this.pollTimer = null;
+    this.refreshTimer = null;
+  }
+
+  // Server push: refresh only when the server reports a change.
+  openStream() {
+    this.streamErrors = 0;
+    this.source = new EventSource(this.stream_url);
+    const onChange = () => {
+      this.streamErrors = 0;
+      this.scheduleRefresh();
+    };
+    for (const kind of ['message', 'task', 'event', 'pending']) {
+      this.source.addEventListener(kind, onChange);
+    }
+    // (Re)connected: catch up on anything missed while disconnected.
+    this.source.addEventListener('ready', onChange);
+    this.source.onerror = () => {
+      this.streamErrors += 1;
+      if (
+        this.source.readyState === EventSource.CLOSED ||
+        this.streamErrors >= MAX_STREAM_ERRORS
+      ) {
+        this.source.close();
+        this.source = null;
+        this.startPolling();
+      }
+    };
+  }
+
+  scheduleRefresh() {
+    if (this.refreshTimer) {
+      return;
+    }
+    this.refreshTimer = setTimeout(() => {
+      this.refreshTimer = null;
+      this.dispatch(this.action);
+    }, REFRESH_DEBOUNCE_MS);
+  }
+
+  // Fallback: fixed-interval polling.
+  startPolling() {
     if (this.polling_interval <= 0) {
       return;
     }
     if (this.action) {
-      setTimeout(() => {
-        this.runTimeout(this.action)
+      this.pollTimer = setTimeout(() => {
+        this.runTimeout(this.action);
       }, this.polling_interval * 1000);
     }
   }
 
-  runTimeout(action) {
+  dispatch(action) {
     this.dispatchEvent(
       new MesopEvent(this.triggerEvent, {
         action: action,
       }),
     );
+  }
+
+  runTimeout(action) {
+    this.dispatch(action);
     if (this.polling_interval > 0) {
-      setTimeout(() => {
+      this.pollTimer = setTimeout(() => {
         this.runTimeout();
       }, this.polling_interval * 1000);
     }
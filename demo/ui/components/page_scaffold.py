@@ -1,7 +1,9 @@
+from urllib.parse import quote
+
 import mesop as me
 import mesop.labs as mel
 
-from state.host_agent_service import UpdateAppState
+from state.host_agent_service import PUSH_ENABLED, UpdateAppState
 from state.state import AppState
 from styles.styles import (
     MAIN_COLUMN_STYLE,
@@ -34,7 +36,14 @@ def page_scaffold():
         if app_state
         else None
     )
-    async_poller(action=action, trigger_event=refresh_app_state)
+    stream_url = None
+    if PUSH_ENABLED:
+        stream_url = '/updates/stream'
+        if app_state.current_conversation_id:
+            stream_url += f'?conversation_id={quote(app_state.current_conversation_id)}'
+    async_poller(
+        action=action, stream_url=stream_url, trigger_event=refresh_app_state
+    )
 
     sidenav('')
 
@@ -34,7 +34,6 @@ from mesop.components.select.select import SelectOption
 from fastapi import FastAPI, Body, Request
 from fastapi.middleware.wsgi import WSGIMiddleware
 from fastapi.responses import JSONResponse, HTMLResponse, PlainTextResponse
-from openai import OpenAI
 
 import nest_asyncio
 nest_asyncio.apply()
@@ -150,6 +149,7 @@ from components.conversation_list import conversation_list
 from service.ReportEngine.flask_interface import report_router, run_report_sync, initialize_report_engine
 from service.QueryEngine.flask_interface import query_router, run_query_sync, initialize_query_engine
 from service.naga_pipeline import run_pipeline_async
+from service.utils.llm_pool import AsyncLLMClientPool
 
 # ===== Optional GRAG memory (直接为 /api/chat 提供记忆读写) =====
 
@@ -382,48 +382,25 @@ def _resolve_naga_creds():
             return prov, base, key, model
     raise RuntimeError("No API key found for any provider (zhipu/dashscope/siliconflow).")
 
-def _mk_client(profile: str):
-    provider, base, key, model = _resolve_naga_creds()
-    if not key:
-        raise RuntimeError(f"Missing API key for provider={provider}")
-    print(f"[naga-config] Provider={provider}  BaseURL={base}  Model={model}")
-    return OpenAI(api_key=key, base_url=base, timeout=NAGA_REQ_TIMEOUT), model
-
-# ---------- 统一的 ChatCompletions 调用 + 限流/退避 ----------
-def _chat_with_retries(cli: OpenAI, *, model: str, messages: List[dict], temperature: float = 0.7) -> str:
-    last_err = None
-    for attempt in range(NAGA_MAX_RETRIES + 1):
-        try:
-            if getattr(cli, "chat_completions", None):
-                r = cli.chat_completions.create(model=model, messages=messages, temperature=temperature)
-            else:
-                r = cli.chat.completions.create(model=model, messages=messages, temperature=temperature)
-            content = (r.choices[0].message.content or "").strip()
-            return content
-        except Exception as e:
-            last_err = e
-            name = e.__class__.__name__
-            text = str(e) or ""
-            status = getattr(e, "status_code", None) or getattr(e, "status", None)
-            retriable = status in (429, 500, 502, 503, 504) or ("RateLimit" in name) or ("429" in text) or ("当前API请求过多" in text)
-            if attempt < NAGA_MAX_RETRIES and retriable:
-                delay = min(8.0, NAGA_BACKOFF_BASE * (2 ** attempt)) + random.random() * 0.25
-                print(f"[LLM][retry {attempt+1}/{NAGA_MAX_RETRIES}] {name} (status={status}) -> sleep {delay:.2f}s")
-                time.sleep(delay); continue
-            break
-    raise last_err if last_err else RuntimeError("LLM request failed without explicit error")
+# ---------- 统一的 ChatCompletions 调用：异步连接池 + 并发限流 + 退避 ----------
+# 客户端按 provider 复用，退避使用 asyncio.sleep（NAGA_MAX_RETRIES / NAGA_BACKOFF_BASE），
+# 并发上限见 NAGA_PROVIDER_CONCURRENCY
+LLM_POOL = AsyncLLMClientPool(
+    _resolve_naga_creds,
+    timeout=NAGA_REQ_TIMEOUT,
+    max_retries=NAGA_MAX_RETRIES,
+    backoff_base=NAGA_BACKOFF_BASE,
+)
 
 from typing import List, Dict, Optional  # 顶部已经有就不用再加
 
-def llm_chat_once(
+async def llm_chat_once(
     prompt: str,
     profile: str = "naga",
     sys: str = "You are a helpful assistant.",
     temperature: float = 0.7,
     history: Optional[List[Dict]] = None,
 ):
-    cli, model = _mk_client(profile)
-
     messages: List[Dict] = [{"role": "system", "content": sys}]
 
     # ✅ 把前端传来的多轮对话拼在 system 后面
@@ -441,7 +418,7 @@ def llm_chat_once(
     # 当前这轮用户输入，永远作为最后一条 user
     messages.append({"role": "user", "content": prompt})
 
-    return _chat_with_retries(cli, model=model, messages=messages, temperature=temperature)
+    return await LLM_POOL.chat(messages, profile=profile, temperature=temperature)
 
 def _extract_json(text: str)->dict:
     try:
@@ -464,7 +441,7 @@ def _explicit_report_request(user_input: str) -> bool:
     ]
     return any(re.search(p, t, flags=re.I) for p in patterns)
 
-def naga_plan(user_input: str) -> dict:
+async def naga_plan(user_input: str) -> dict:
     PLAN = f"""
 仅输出 JSON，无解释，不要多余文本：
 
@@ -493,7 +470,7 @@ def naga_plan(user_input: str) -> dict:
 现在的用户输入：{user_input}
 """
 
-    raw = llm_chat_once(PLAN, profile="naga", sys=(
+    raw = await llm_chat_once(PLAN, profile="naga", sys=(
     "You are an orchestration planner. "
     "You **never** answer the user directly. "
     "You only summarize the user's intent into a JSON plan. "
@@ -770,14 +747,14 @@ def _intent_suggests_combo(plan: Optional[Dict]) -> bool:
     return False
 
 # ---------------- 编排：Naga 普通对话（系统提示拼入 HOST 引导 + 语言指令） ----------------
-def naga_orchestrate(
+async def naga_orchestrate(
     user_input: str,
     use_mcp: bool,
     force_report: bool = False,
     persona_sys: Optional[str] = None,
     history: Optional[List[Dict]] = None,
 ) -> dict:
-    plan = naga_plan(user_input)
+    plan = await naga_plan(user_input)
     if force_report or plan.get("should_report"):
         return {
             "profile": "naga",
@@ -786,7 +763,7 @@ def naga_orchestrate(
             "used_mcp": False,
             "delegate": "report_engine",
         }
-    answer = llm_chat_once(
+    answer = await llm_chat_once(
         user_input,
         profile="naga",
         sys=persona_sys,
@@ -1103,7 +1080,7 @@ async def _handle_chat(
             }
 
         # -------- 7) 普通对话（无 QE / RE，仅 Naga + GRAG）--------
-        orchestration = naga_orchestrate(
+        orchestration = await naga_orchestrate(
             text,
             use_mcp=use_mcp,
             force_report=force_report,
@@ -1265,6 +1242,10 @@ async def lifespan(app_: FastAPI):
             await _background_init(app_)
             yield
     finally:
+        try:
+            await LLM_POOL.aclose()
+        except Exception as _e:
+            print(f"[LLM] pool close error: {_e}")
         print("应用关闭")
 
 app.router.lifespan_context = lifespan
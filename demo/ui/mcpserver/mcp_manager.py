@@ -177,6 +177,15 @@ def _merged_registry() -> Dict[str, Any]:
 # 5) 统一调用入口（工具回路会 await 这里）
 # =========================================================
 # === 替换 mcp_manager.py 里的 unified_call 整个函数 ===
+async def _call_maybe_blocking(fn, *args, **kwargs):
+    """协程函数直接 await；同步函数（如 RemoteMCPProxy.invoke）放到线程里跑，不阻塞事件循环，多个工具调用才能真正并发。"""
+    import inspect
+    if inspect.iscoroutinefunction(fn):
+        return await fn(*args, **kwargs)
+    res = await asyncio.to_thread(fn, *args, **kwargs)
+    return await res if inspect.iscoroutine(res) else res
+
+
 async def unified_call(service_name: str, tool_name: str, **kwargs) -> str:
     """
     统一调用入口：
@@ -238,23 +247,20 @@ async def unified_call(service_name: str, tool_name: str, **kwargs) -> str:
     try:
         # 优先远程代理/统一接口
         if hasattr(svc, "invoke") and callable(getattr(svc, "invoke")):
-            res = svc.invoke(tool_name, **args)
-            res = await res if inspect.iscoroutine(res) else res
+            res = await _call_maybe_blocking(svc.invoke, tool_name, **args)
 
         # 兼容一些本地 Agent 的自定义总入口
         elif hasattr(svc, "call_tool") and callable(getattr(svc, "call_tool")):
-            res = svc.call_tool(tool_name, **args)
-            res = await res if inspect.iscoroutine(res) else res
+            res = await _call_maybe_blocking(svc.call_tool, tool_name, **args)
 
         # 兼容一些本地 Agent 的 call 方法
         elif hasattr(svc, "call") and callable(getattr(svc, "call")):
-            res = svc.call(tool_name, **args)
-            res = await res if inspect.iscoroutine(res) else res
+            res = await _call_maybe_blocking(svc.call, tool_name, **args)
 
         # 兼容"同名方法就是工具"的写法
         elif hasattr(svc, tool_name) and callable(getattr(svc, tool_name)):
             fn = getattr(svc, tool_name)
-            res = await fn(**args) if inspect.iscoroutinefunction(fn) else fn(**args)
+            res = await _call_maybe_blocking(fn, **args)
 
         else:
             # 这一步再去拿一次工具清单，给出友好提示
@@ -3,18 +3,35 @@
 remote_mcp_proxy.py — 远程 MCP 的「HTTP 首选 + httpx 兜底」版
 - 完全绕开 SSE
 - 优先使用 mcp.client.streamable_http + ClientSession（多版本签名自适配）
-- 失败则自动降级 httpx 直连（兼容 DashScope / 任意 streamable_http MCP）
+- 官方客户端建连失败 / 连接断开时自动降级 httpx 直连（兼容 DashScope / 任意 streamable_http MCP）
 - 支持 __list_tools 与任意工具直调（/invocations、/tools/{name}/invoke、/tools/{name}）
+- 连接复用：
+  * 官方客户端：每个远端（url + headers）一个长连接会话池，跑在后台事件循环线程里；
+    空闲超过阈值先做健康检查；仅连接类错误（流已关闭 / 传输层异常）丢弃会话并重连重试一次，
+    工具报错与超时原样抛出、不重试也不降级；每次工具调用只剩一次 call_tool 往返
+  * 工具清单按 TTL 缓存（重连 / 未知工具时失效），不再每次调用前 list_tools
+  * httpx 兜底：每个代理复用一个 httpx.Client，记住上次成功的路由，后续直接命中
+- 环境变量：REMOTE_MCP_POOL_SIZE / REMOTE_MCP_TOOLS_TTL_S / REMOTE_MCP_HEALTH_INTERVAL_S / REMOTE_MCP_CALL_TIMEOUT_S
 """
 from __future__ import annotations
 import json
 import asyncio
 import importlib
 import inspect
+import os
+import threading
+import time
+from contextlib import AsyncExitStack
 from typing import Any, Dict, Optional, List, Tuple
 
+import anyio
 import httpx
 
+POOL_SIZE = max(1, int(os.getenv("REMOTE_MCP_POOL_SIZE", "2")))
+TOOLS_TTL_S = float(os.getenv("REMOTE_MCP_TOOLS_TTL_S", "300"))
+HEALTH_INTERVAL_S = float(os.getenv("REMOTE_MCP_HEALTH_INTERVAL_S", "60"))
+CALL_TIMEOUT_S = float(os.getenv("REMOTE_MCP_CALL_TIMEOUT_S", "60"))
+
 
 def _safe_json(obj: Any) -> str:
     try:
@@ -50,6 +67,220 @@ def _extract_text_from_mcp_content(content: Any) -> str:
     return _safe_json(content)
 
 
+# ---------------------------
+# 后台事件循环：会话池里的长连接都挂在这个循环上，同步 invoke 从任意线程提交
+# ---------------------------
+_LOOP: Optional[asyncio.AbstractEventLoop] = None
+_LOOP_LOCK = threading.Lock()
+
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    global _LOOP
+    with _LOOP_LOCK:
+        if _LOOP is None or _LOOP.is_closed():
+            loop = asyncio.new_event_loop()
+            t = threading.Thread(target=loop.run_forever, name="remote-mcp-loop", daemon=True)
+            t.start()
+            _LOOP = loop
+        return _LOOP
+
+
+def _run_sync(coro, timeout: Optional[float] = None):
+    """在后台循环上执行协程并阻塞等待结果（调用方可以是任意线程，包括其它事件循环所在线程）。"""
+    fut = asyncio.run_coroutine_threadsafe(coro, _background_loop())
+    try:
+        return fut.result(timeout=timeout)
+    except Exception:
+        fut.cancel()
+        raise
+
+
+class _SessionUnavailable(Exception):
+    """官方客户端建连失败（调用尚未发出），可以安全降级 httpx。"""
+
+
+# mcp 在底层流关闭时给挂起请求返回的错误码（mcp.types.CONNECTION_CLOSED）
+_MCP_CONNECTION_CLOSED = -32000
+
+
+def _is_transport_error(exc: BaseException) -> bool:
+    """连接类错误：流已关闭、传输层异常、连接被重置等；工具自身报错与超时不算。"""
+    if isinstance(exc, (TimeoutError, httpx.TimeoutException)):
+        return False
+    if isinstance(exc, (httpx.TransportError, ConnectionError, EOFError,
+                        anyio.ClosedResourceError, anyio.BrokenResourceError, anyio.EndOfStream)):
+        return True
+    error = getattr(exc, "error", None)  # mcp.shared.exceptions.McpError
+    return getattr(error, "code", None) == _MCP_CONNECTION_CLOSED
+
+
+class _PooledSession:
+    """
+    一条长连接：由专属的 owner 任务打开并持有上下文（anyio 要求同一任务进出 cancel scope），
+    请求可以从循环上的任意任务并发发起。
+    """
+
+    def __init__(self, proxy: "RemoteMCPProxy"):
+        self.proxy = proxy
+        self.session: Any = None
+        self.last_ok = 0.0
+        self.in_flight = 0
+        self._ready: Optional[asyncio.Future] = None
+        self._closing: Optional[asyncio.Event] = None
+        self._owner: Optional[asyncio.Task] = None
+
+    @property
+    def alive(self) -> bool:
+        return self.session is not None and self._owner is not None and not self._owner.done()
+
+    async def _serve(self):
+        try:
+            async with AsyncExitStack() as stack:
+                session, can_ctx = await self.proxy._open_session()
+                if can_ctx and hasattr(session, "__aenter__"):
+                    session = await stack.enter_async_context(session)
+                else:
+                    stack.push_async_callback(self.proxy._aclose_session, session)
+                if hasattr(session, "initialize"):
+                    try:
+                        await session.initialize()
+                    except Exception:
+                        pass
+                self.session = session
+                self.last_ok = time.monotonic()
+                self._ready.set_result(True)
+                await self._closing.wait()
+        except Exception as e:
+            if not self._ready.done():
+                self._ready.set_exception(e)
+        finally:
+            self.session = None
+
+    async def open(self):
+        loop = asyncio.get_running_loop()
+        self._ready = loop.create_future()
+        self._closing = asyncio.Event()
+        self._owner = loop.create_task(self._serve())
+        await self._ready
+
+    async def close(self):
+        if self._closing is not None:
+            self._closing.set()
+        if self._owner is not None:
+            try:
+                await asyncio.wait_for(self._owner, timeout=5)
+            except Exception:
+                self._owner.cancel()
+        self.session = None
+
+    async def healthy(self) -> bool:
+        """空闲超过 HEALTH_INTERVAL_S 才探活（ping 优先，其次 list_tools）。"""
+        if not self.alive:
+            return False
+        if time.monotonic() - self.last_ok < HEALTH_INTERVAL_S:
+            return True
+        try:
+            if hasattr(self.session, "send_ping"):
+                await asyncio.wait_for(self.session.send_ping(), timeout=10)
+            else:
+                await asyncio.wait_for(self.session.list_tools(), timeout=10)
+            self.last_ok = time.monotonic()
+            return True
+        except Exception:
+            return False
+
+
+class _SessionPool:
+    """单个远端的会话池：最多 POOL_SIZE 条连接，挑当前并发最少的一条复用。"""
+
+    def __init__(self, proxy: "RemoteMCPProxy", size: int = POOL_SIZE):
+        self.proxy = proxy
+        self.size = max(1, size)
+        self.sessions: List[_PooledSession] = []
+        self._lock: Optional[asyncio.Lock] = None
+        self.opened = 0
+        self.reconnects = 0
+
+    async def acquire(self) -> _PooledSession:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            for ps in list(self.sessions):
+                if ps.in_flight == 0 and not await ps.healthy():
+                    await self.discard(ps)
+            idle = [ps for ps in self.sessions if ps.in_flight == 0]
+            if idle:
+                return idle[0]
+            if len(self.sessions) < self.size:
+                ps = _PooledSession(self.proxy)
+                try:
+                    await ps.open()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    if not self.sessions:
+                        raise _SessionUnavailable(str(e)) from e
+                    # 已有连接可用：先挤一挤，别因为扩容失败就放弃
+                    return min(self.sessions, key=lambda x: x.in_flight)
+                self.sessions.append(ps)
+                self.opened += 1
+                return ps
+            return min(self.sessions, key=lambda x: x.in_flight)
+
+    async def discard(self, ps: _PooledSession):
+        if ps in self.sessions:
+            self.sessions.remove(ps)
+            self.reconnects += 1
+        await ps.close()
+        # 连接变了，工具清单可能也变了
+        self.proxy.invalidate_tools()
+
+    async def call(self, fn):
+        """
+        fn(session) -> awaitable。
+        只有连接类错误才丢弃会话并重连重试一次；工具报错（McpError 等）与超时原样抛出，
+        避免同一次工具调用在远端被执行多次。
+        """
+        for attempt in range(2):
+            ps = await self.acquire()
+            ps.in_flight += 1
+            try:
+                if not ps.alive:
+                    raise anyio.ClosedResourceError()
+                result = await fn(ps.session)
+                ps.last_ok = time.monotonic()
+                return result
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if not _is_transport_error(e):
+                    raise
+                await self.discard(ps)
+                if attempt:
+                    raise
+            finally:
+                ps.in_flight -= 1
+
+    async def close(self):
+        for ps in list(self.sessions):
+            await ps.close()
+        self.sessions.clear()
+
+
+def _tools_from_items(items: Any) -> List[Dict[str, Any]]:
+    tools: List[Dict[str, Any]] = []
+    if isinstance(items, list):
+        for t in items:
+            if isinstance(t, dict):
+                tools.append({
+                    "name": t.get("name"),
+                    "description": t.get("description", "") or "",
+                })
+            else:
+                tools.append({"name": str(t), "description": ""})
+    return tools
+
+
 class RemoteMCPProxy:
     def __init__(
         self,
@@ -71,6 +302,17 @@ class RemoteMCPProxy:
 
         self._stack = self._detect_http_stack()  # {'HTTPTransport': class|None, 'ClientSession': class|None}
 
+        self._pool = _SessionPool(self)
+        self._mcp_disabled_until = 0.0      # 官方客户端连不上时，一段时间内直接走 httpx
+        self._tools_cache: Optional[List[Dict[str, Any]]] = None
+        self._tools_cached_at = 0.0
+        self._tools_lock = threading.Lock()
+        self._http: Optional[httpx.Client] = None
+        self._http_lock = threading.Lock()
+        self._invoke_route: Optional[int] = None   # 记住 _invoke_routes 中成功的下标
+        self._list_route: Optional[int] = None
+        self.stats: Dict[str, int] = {"mcp_calls": 0, "httpx_calls": 0, "tools_cache_hits": 0}
+
     # ---------------------------
     # 能力探测 & 构造
     # ---------------------------
@@ -181,149 +423,174 @@ class RemoteMCPProxy:
     # ---------------------------
     # 对外 API
     # ---------------------------
+    def _mcp_available(self) -> bool:
+        return bool(self._stack.get("HTTPTransport") and self._stack.get("ClientSession")) \
+            and time.monotonic() >= self._mcp_disabled_until
+
+    def _mark_mcp_failed(self):
+        # 握手都失败时短暂熔断，避免每次调用都白白尝试建连
+        self._mcp_disabled_until = time.monotonic() + HEALTH_INTERVAL_S
+
     def invoke(self, tool_name: str, **kwargs) -> str:
         if tool_name == "__list_tools":
             return self.list_tools()
 
-        # 优先官方 HTTP 客户端；失败即刻静默降级 httpx 直连
-        if self._stack.get("HTTPTransport") and self._stack.get("ClientSession"):
+        # 优先官方 HTTP 客户端（池化长连接）；仅在建连失败 / 连接断开时降级 httpx 直连。
+        # 超时或工具报错时请求可能已在远端执行，直接抛出，不再换一条路径重放。
+        if self._mcp_available():
             try:
-                return asyncio.run(self._invoke_via_mcp(tool_name, kwargs))
-            except Exception:
-                # 静默降级
-                pass
+                return _run_sync(self._invoke_via_mcp(tool_name, kwargs), timeout=CALL_TIMEOUT_S)
+            except Exception as e:
+                if not isinstance(e, _SessionUnavailable) and not _is_transport_error(e):
+                    raise
+                if not self._pool.sessions:
+                    self._mark_mcp_failed()
         return self._invoke_via_httpx(tool_name, kwargs)
 
     def list_tools(self) -> str:
+        return _safe_json({"service": self.name, "tools": self.get_tools()})
+
+    def get_tools(self, refresh: bool = False) -> List[Dict[str, Any]]:
+        """工具清单（TTL 缓存）；refresh=True 或过期时重新拉取。"""
+        with self._tools_lock:
+            fresh = self._tools_cache is not None and time.monotonic() - self._tools_cached_at < TOOLS_TTL_S
+            if fresh and not refresh:
+                self.stats["tools_cache_hits"] += 1
+                return list(self._tools_cache or [])
+        tools: Optional[List[Dict[str, Any]]] = None
         # 优先官方客户端；失败直接给 httpx 结果（不返回错误文本）
-        if self._stack.get("HTTPTransport") and self._stack.get("ClientSession"):
+        if self._mcp_available():
             try:
-                return asyncio.run(self._list_tools_via_mcp())
+                tools = _run_sync(self._list_tools_via_mcp(), timeout=CALL_TIMEOUT_S)
+            except Exception:
+                if not self._pool.sessions:
+                    self._mark_mcp_failed()
+        if tools is None:
+            tools = self._list_tools_via_httpx()
+        # 拉取失败（空列表）不缓存，下次再试
+        if tools:
+            with self._tools_lock:
+                self._tools_cache = tools
+                self._tools_cached_at = time.monotonic()
+        return list(tools)
+
+    def invalidate_tools(self):
+        with self._tools_lock:
+            self._tools_cache = None
+            self._tools_cached_at = 0.0
+
+    def close(self):
+        """关闭池化会话与 httpx 客户端（进程退出前可选调用）。"""
+        if _LOOP is not None and not _LOOP.is_closed():
+            try:
+                _run_sync(self._pool.close(), timeout=10)
             except Exception:
                 pass
-        return self._list_tools_via_httpx()
+        with self._http_lock:
+            if self._http is not None:
+                self._http.close()
+                self._http = None
+
+    def pool_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "sessions": len(self._pool.sessions),
+            "sessions_opened": self._pool.opened,
+            "reconnects": self._pool.reconnects,
+            "invoke_route": self._invoke_route,
+            "tools_cached": self._tools_cache is not None,
+        }
 
     # ---------------------------
-    # 官方 HTTP 客户端路径（异步）
+    # 官方 HTTP 客户端路径（异步，运行在后台循环上）
     # ---------------------------
     async def _invoke_via_mcp(self, tool_name: str, args: Dict[str, Any]) -> str:
-        session, can_ctx = await self._open_session()
-        if can_ctx and hasattr(session, "__aenter__"):
-            async with session as s:
-                # list_tools 不是必须，但能提前验证工具存在
-                try:
-                    tl = await s.list_tools()
-                    _ = [t.name for t in getattr(tl, "tools", [])]
-                except Exception:
-                    pass
-                result = await s.call_tool(name=tool_name, arguments=args)
-                return _extract_text_from_mcp_content(result.content)
-        else:
-            try:
-                # 尝试 list_tools（可选）
-                try:
-                    tl = await session.list_tools()
-                    _ = [t.name for t in getattr(tl, "tools", [])]
-                except Exception:
-                    pass
-                result = await session.call_tool(name=tool_name, arguments=args)
-                return _extract_text_from_mcp_content(result.content)
-            finally:
-                await self._aclose_session(session)
+        async def _call(session):
+            return await session.call_tool(name=tool_name, arguments=args)
 
-    async def _list_tools_via_mcp(self) -> str:
-        session, can_ctx = await self._open_session()
+        result = await self._pool.call(_call)
+        self.stats["mcp_calls"] += 1
+        if getattr(result, "isError", False):
+            # 远端报错（可能是工具已下线）：清单作废，下次 __list_tools 重新拉取
+            self.invalidate_tools()
+        return _extract_text_from_mcp_content(result.content)
+
+    async def _list_tools_via_mcp(self) -> List[Dict[str, Any]]:
+        async def _list(session):
+            return await session.list_tools()
+
+        tl = await self._pool.call(_list)
         tools: List[Dict[str, Any]] = []
-        if can_ctx and hasattr(session, "__aenter__"):
-            async with session as s:
-                tl = await s.list_tools()
-                for t in getattr(tl, "tools", []):
-                    tools.append({
-                        "name": getattr(t, "name", None),
-                        "description": getattr(t, "description", "") or "",
-                    })
-        else:
-            try:
-                tl = await session.list_tools()
-                for t in getattr(t, "tools", []):
-                    tools.append({
-                        "name": getattr(t, "name", None),
-                        "description": getattr(t, "description", "") or "",
-                    })
-            finally:
-                await self._aclose_session(session)
-        return _safe_json({"service": self.name, "tools": tools})
+        for t in getattr(tl, "tools", []):
+            tools.append({
+                "name": getattr(t, "name", None),
+                "description": getattr(t, "description", "") or "",
+            })
+        return tools
 
     # ---------------------------
-    # httpx 直连路径（同步）
+    # httpx 直连路径（同步，复用连接）
     # ---------------------------
-    def _invoke_via_httpx(self, tool_name: str, args: Dict[str, Any]) -> str:
-        """按常见三种路由尝试调用。"""
-        payloads: List[Tuple[str, Dict[str, Any]]] = [
+    def _client(self) -> httpx.Client:
+        with self._http_lock:
+            if self._http is None:
+                self._http = httpx.Client(timeout=CALL_TIMEOUT_S)
+            return self._http
+
+    def _invoke_routes(self, tool_name: str, args: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any]]]:
+        return [
             (f"{self.base_url}/invocations", {"name": tool_name, "arguments": args}),
             (f"{self.base_url}/tools/{tool_name}/invoke", {"arguments": args}),
             (f"{self.base_url}/tools/{tool_name}", {"arguments": args}),
         ]
-        with httpx.Client(timeout=60) as client:
-            for url, body in payloads:
-                try:
-                    r = client.post(url, headers=self._json_headers(), json=body)
-                    if r.status_code >= 400:
-                        continue
-                    data = r.json()
-                    if isinstance(data, dict):
-                        if "content" in data:
-                            return _extract_text_from_mcp_content(data["content"])
-                        if "data" in data or "result" in data:
-                            return _safe_json(data.get("data") or data.get("result"))
-                        return _safe_json(data)
-                    return str(data)
-                except Exception:
-                    continue
-        return f"直连失败：远端未识别工具 '{tool_name}' 或鉴权/路径不匹配"
 
-    def _list_tools_via_httpx(self) -> str:
-        """按顺序尝试 /tools 与 /tools/list。"""
-        with httpx.Client(timeout=30) as client:
-            # GET /tools
+    def _invoke_via_httpx(self, tool_name: str, args: Dict[str, Any]) -> str:
+        """按常见三种路由尝试调用；命中过的路由优先，其余只在它失败时再探测。"""
+        routes = list(enumerate(self._invoke_routes(tool_name, args)))
+        known = self._invoke_route
+        if known is not None:
+            routes.sort(key=lambda r: r[0] != known)
+        client = self._client()
+        for idx, (url, body) in routes:
             try:
-                r = client.get(f"{self.base_url}/tools", headers=self._json_headers())
-                if r.status_code < 400:
-                    data = r.json()
-                    items = data.get("tools", data)
-                    tools = []
-                    if isinstance(items, list):
-                        for t in items:
-                            if isinstance(t, dict):
-                                tools.append({
-                                    "name": t.get("name"),
-                                    "description": t.get("description", "") or "",
-                                })
-                            else:
-                                tools.append({"name": str(t), "description": ""})
-                    return _safe_json({"service": self.name, "tools": tools})
+                r = client.post(url, headers=self._json_headers(), json=body)
+                if r.status_code >= 400:
+                    continue
+                data = r.json()
+                self._invoke_route = idx
+                self.stats["httpx_calls"] += 1
+                if isinstance(data, dict):
+                    if "content" in data:
+                        return _extract_text_from_mcp_content(data["content"])
+                    if "data" in data or "result" in data:
+                        return _safe_json(data.get("data") or data.get("result"))
+                    return _safe_json(data)
+                return str(data)
             except Exception:
-                pass
-            # POST /tools/list
+                continue
+        return f"直连失败：远端未识别工具 '{tool_name}' 或鉴权/路径不匹配"
+
+    def _list_tools_via_httpx(self) -> List[Dict[str, Any]]:
+        """按顺序尝试 GET /tools 与 POST /tools/list（记住可用的那个）。"""
+        client = self._client()
+        routes = [
+            lambda: client.get(f"{self.base_url}/tools", headers=self._json_headers()),
+            lambda: client.post(f"{self.base_url}/tools/list", headers=self._json_headers(), json={}),
+        ]
+        order = list(range(len(routes)))
+        if self._list_route is not None:
+            order.sort(key=lambda i: i != self._list_route)
+        for idx in order:
             try:
-                r = client.post(f"{self.base_url}/tools/list", headers=self._json_headers(), json={})
+                r = routes[idx]()
                 if r.status_code < 400:
                     data = r.json()
-                    items = data.get("tools", data)
-                    tools = []
-                    if isinstance(items, list):
-                        for t in items:
-                            if isinstance(t, dict):
-                                tools.append({
-                                    "name": t.get("name"),
-                                    "description": t.get("description", "") or "",
-                                })
-                            else:
-                                tools.append({"name": str(t), "description": ""})
-                    return _safe_json({"service": self.name, "tools": tools})
+                    items = data.get("tools", data) if isinstance(data, dict) else data
+                    self._list_route = idx
+                    return _tools_from_items(items)
             except Exception:
-                pass
-        return _safe_json({"service": self.name, "tools": []})
+                continue
+        return []
 
     # ---------------------------
     # headers
@@ -4,11 +4,36 @@ tool_call_utils.py
 - 负责从模型输出中解析 MCP 工具调用 JSON
 - 兼容 param_name: "a:7, b:5" -> {"a":7,"b":5}
 - 统一执行 MCP: unified_call(service_name, tool_name, **args)
+- 执行：aexecute_tool_calls 原生异步，同一轮的多个调用并发执行（按服务限流 + 单次超时），
+  结果按解析顺序拼装；execute_tool_calls 为同步包装，任意线程（包括事件循环线程）调用都不会死锁
+- 环境变量：MCP_TOOL_CALL_TIMEOUT_S / MCP_MAX_CONCURRENCY_PER_SERVICE
 """
 from __future__ import annotations
+import asyncio
 import json
+import os
 import re
-from typing import Any, Dict, List
+import threading
+import weakref
+from typing import Any, Dict, List, Optional
+
+TOOL_CALL_TIMEOUT_S = float(os.getenv("MCP_TOOL_CALL_TIMEOUT_S", "60"))
+MAX_CONCURRENCY_PER_SERVICE = max(1, int(os.getenv("MCP_MAX_CONCURRENCY_PER_SERVICE", "4")))
+
+# 每个事件循环一组按服务的并发信号量：同一循环上所有会话 / 轮次共享同一个上限（loop 回收后自动释放）
+_SERVICE_SEMAPHORES: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[tuple, asyncio.Semaphore]]" = \
+    weakref.WeakKeyDictionary()
+_SEM_LOCK = threading.Lock()
+
+
+def _service_semaphore(service_name: str, limit: int) -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    with _SEM_LOCK:
+        sems = _SERVICE_SEMAPHORES.setdefault(loop, {})
+        sem = sems.get((service_name, limit))
+        if sem is None:
+            sem = sems[(service_name, limit)] = asyncio.Semaphore(limit)
+        return sem
 
 # ---- 允许中/英括号与代码块里出现的 JSON ----
 # 修复正则表达式，移除不支持的(?R)递归语法
@@ -128,9 +153,19 @@ def parse_tool_calls(text: str) -> List[Dict[str, Any]]:
 
     return calls
 
-def execute_tool_calls(calls: List[Dict[str, Any]]) -> str:
+def _format_result(call: Dict[str, Any], resp: Any) -> str:
+    return f"【工具 {call['tool_name']}@{call['service_name']}】返回: {json.dumps(resp, ensure_ascii=False)}"
+
+def _format_error(call: Dict[str, Any], err: str) -> str:
+    return f"【工具 {call['tool_name']}@{call['service_name']}】执行失败: {err}"
+
+async def aexecute_tool_calls(calls: List[Dict[str, Any]], *,
+                              timeout_s: Optional[float] = None,
+                              max_per_service: Optional[int] = None) -> str:
     """
-    逐个执行工具调用，并把结果串成可读文本返回。
+    并发执行工具调用，并按原顺序把结果串成可读文本返回。
+    - 同一服务最多 max_per_service 个调用同时在途（同一事件循环上跨会话共享），不同服务互不影响
+    - 每个调用单独超时，超时/失败只影响它自己那一行
     依赖 mcp_manager.unified_call(service_name, tool_name, **args)
     """
     if not calls:
@@ -138,33 +173,55 @@ def execute_tool_calls(calls: List[Dict[str, Any]]) -> str:
 
     # 延迟导入，避免循环依赖
     try:
-        # 使用相对导入修复导入问题
         from . import mcp_manager  # 当前文件与 mcp_manager.py 在同一目录
     except Exception as e:
         return f"错误：无法导入 mcp_manager，{e}"
 
-    outputs = []
-    for call in calls:
+    timeout_s = TOOL_CALL_TIMEOUT_S if timeout_s is None else timeout_s
+    limit = max(1, max_per_service or MAX_CONCURRENCY_PER_SERVICE)
+
+    async def _one(call: Dict[str, Any]) -> str:
         svc = call["service_name"]
-        tool = call["tool_name"]
+        sem = _service_semaphore(svc, limit)
         args = call.get("args", {}) or {}
+        async with sem:
+            try:
+                resp = mcp_manager.unified_call(svc, call["tool_name"], **args)
+                # 允许协程
+                if hasattr(resp, "__await__"):
+                    resp = await asyncio.wait_for(resp, timeout=timeout_s if timeout_s > 0 else None)
+                return _format_result(call, resp)
+            except asyncio.TimeoutError:
+                return _format_error(call, f"超时（>{timeout_s:g}s）")
+            except Exception as e:
+                return _format_error(call, e)
+
+    outputs = await asyncio.gather(*(_one(c) for c in calls))
+    return "\n".join(outputs)
+
+def execute_tool_calls(calls: List[Dict[str, Any]]) -> str:
+    """
+    aexecute_tool_calls 的同步包装。
+    当前线程没有运行中的事件循环时直接 asyncio.run；在事件循环线程里被调用时，
+    改到独立线程的新循环里执行（不能 run_coroutine_threadsafe 回本循环再阻塞等待，那样会死锁）。
+    异步代码请直接 await aexecute_tool_calls。
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(aexecute_tool_calls(calls))
+
+    box: Dict[str, Any] = {}
+
+    def _runner():
         try:
-            resp = mcp_manager.unified_call(svc, tool, **args)
-            # 允许协程
-            if hasattr(resp, "__await__"):
-                import asyncio
-                loop = None
-                try:
-                    loop = asyncio.get_running_loop()
-                except RuntimeError:
-                    loop = None
-                if loop and loop.is_running():
-                    # 有正在运行的 loop：开任务等结果
-                    resp = asyncio.run_coroutine_threadsafe(resp, loop).result()
-                else:
-                    resp = asyncio.run(resp)
-            outputs.append(f"【工具 {tool}@{svc}】返回: {json.dumps(resp, ensure_ascii=False)}")
-        except Exception as e:
-            outputs.append(f"【工具 {tool}@{svc}】执行失败: {e}")
-
-    return "\n".join(outputs)
\ No newline at end of file
+            box["result"] = asyncio.run(aexecute_tool_calls(calls))
+        except BaseException as e:
+            box["error"] = e
+
+    t = threading.Thread(target=_runner, name="tool-calls", daemon=True)
+    t.start()
+    t.join()
+    if "error" in box:
+        raise box["error"]
+    return box["result"]
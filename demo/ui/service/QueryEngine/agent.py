@@ -9,9 +9,13 @@ Deep Search Agent 主类（适配增强版）
 import json
 import os
 import re
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, Dict, Any, List, Tuple
+from typing import Callable, Optional, Dict, Any, List, Tuple
 
 from .llms import OpenAILLM, BaseLLM
 try:
@@ -30,9 +34,11 @@ from .nodes import (
     ReflectionSummaryNode,
     ReportFormattingNode
 )
+from .executor import ResearchCancelled, raise_if_cancelled
 from .state import State
 from .tools import TavilyNewsAgency, TavilyResponse
 from .utils import Config, load_config, format_search_results_for_prompt
+from ..utils.path_utils import LATEST_ARTIFACTS_FILE
 
 
 def _safe_get(obj: Any, key: str, default: str = "") -> str:
@@ -46,6 +52,65 @@ def _safe_get(obj: Any, key: str, default: str = "") -> str:
         return default
 
 
+@dataclass
+class ResearchArtifacts:
+    """单次研究实际写出的产物路径（未写出/写失败的为空字符串）。"""
+    run_id: str
+    state_path: str = ""
+    draft_path: str = ""
+    output_path: str = ""      # deep_search_report_*.md（QE_SAVE_FINAL_MD=true 时）
+
+    def to_dict(self) -> Dict[str, str]:
+        return asdict(self)
+
+
+@dataclass
+class ResearchResult:
+    report_md: str
+    artifacts: ResearchArtifacts
+
+
+@dataclass
+class ResearchRun:
+    """
+    单次 research() 调用的私有上下文。
+    State/Paragraph 按调用隔离；LLM 客户端、节点与搜索工具仍由 DeepSearchAgent 共享，
+    因此同一个 agent 可以被多个线程并发调用。
+    """
+    state: State
+    cancel_event: Optional[threading.Event] = None
+    # 进度回调 progress_cb(percent, stage)：结构 10% → 段落初搜/反思 10~90% → 最终报告 95%
+    progress_cb: Optional[Callable[[int, str], None]] = None
+    # 产物文件名后缀：同一秒内对同一主题的并发研究也不会互相覆盖
+    run_id: str = field(default_factory=lambda: uuid.uuid4().hex[:6])
+    _units_total: int = field(default=0, repr=False)
+    _units_done: int = field(default=0, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def check_cancelled(self):
+        raise_if_cancelled(self.cancel_event)
+
+    def report(self, progress: int, stage: str):
+        if self.progress_cb is None:
+            return
+        try:
+            self.progress_cb(progress, stage)
+        except Exception as e:
+            print(f"⚠️ 进度回调失败（已忽略）：{e}")
+
+    def plan_units(self, total: int):
+        with self._lock:
+            self._units_total = max(1, total)
+            self._units_done = 0
+
+    def advance(self, stage: str):
+        """完成一个段落里程碑（初始总结或一轮反思），并发段落共享同一计数。"""
+        with self._lock:
+            self._units_done = min(self._units_total, self._units_done + 1)
+            progress = 10 + int(80 * self._units_done / max(1, self._units_total))
+        self.report(progress, stage)
+
+
 class DeepSearchAgent:
     def __init__(self, config: Optional[Config] = None):
         self.config = config or load_config()
@@ -54,6 +119,8 @@ class DeepSearchAgent:
             self.config.max_reflections = int(os.getenv("QE_MAX_REFLECTIONS", "2"))
         if not hasattr(self.config, "max_content_length"):
             self.config.max_content_length = int(os.getenv("QE_MAX_CONTENT_LEN", "4000"))
+        if not hasattr(self.config, "paragraph_concurrency"):
+            self.config.paragraph_concurrency = int(os.getenv("QE_PARAGRAPH_CONCURRENCY", "3"))
 
         # 输出目录优先级：load_config -> 环境变量 -> 默认子目录
         out_dir_env = os.getenv("QUERY_OUTPUT_DIR")
@@ -79,6 +146,7 @@ class DeepSearchAgent:
 
         self.search_agency = TavilyNewsAgency(api_key=self.config.tavily_api_key)
         self._initialize_nodes()
+        # 最近一次完成的研究状态（仅供 get_progress_summary / save_state 等查看，研究过程不读写它）
         self.state = State()
 
         print("Query Agent已初始化")
@@ -207,56 +275,116 @@ class DeepSearchAgent:
             return self.search_agency.basic_search_news(query)
 
     # ---------------- 顶层流程 ----------------
-    def research(self, query: str, save_report: bool = True) -> str:
+    def research(self, query: str, save_report: bool = True,
+                 cancel_event: Optional[threading.Event] = None,
+                 progress_cb: Optional[Callable[[int, str], None]] = None) -> str:
+        """
+        cancel_event 被置位时，在下一个搜索/LLM 步骤之前抛出 ResearchCancelled；
+        progress_cb(percent, stage) 在段落初搜 / 反思等里程碑处回调。
+        """
+        return self.run_research(query, save_report=save_report,
+                                 cancel_event=cancel_event, progress_cb=progress_cb).report_md
+
+    def run_research(self, query: str, save_report: bool = True,
+                     cancel_event: Optional[threading.Event] = None,
+                     progress_cb: Optional[Callable[[int, str], None]] = None) -> ResearchResult:
+        """同 research()，额外返回本次实际写出的产物清单。"""
         print(f"\n{'='*60}")
         print(f"开始深度研究: {query}")
         print(f"{'='*60}")
+        run = ResearchRun(state=State(), cancel_event=cancel_event, progress_cb=progress_cb)
         try:
-            self._generate_report_structure(query)
-            self._process_paragraphs()
-            final_report = self._generate_final_report()
+            run.check_cancelled()
+            self._generate_report_structure(run, query)
+            run.report(10, "structure")
+            self._process_paragraphs(run)
+            run.check_cancelled()
+            final_report = self._generate_final_report(run)
+            run.report(95, "final_report")
+            self.state = run.state
+            artifacts = ResearchArtifacts(run_id=run.run_id)
             if save_report:
                 try:
-                    self._save_report(final_report)
+                    artifacts = self._save_report(run, final_report)
                 except Exception as se:
                     print(f"⚠️ 保存阶段发生非致命错误（已忽略以继续闭环）：{se}")
             print(f"\n{'='*60}")
             print("深度研究完成！")
             print(f"{'='*60}")
-            return final_report
+            return ResearchResult(report_md=final_report, artifacts=artifacts)
         except Exception as e:
             print(f"研究过程中发生错误: {str(e)}")
             raise e
 
-    def _generate_report_structure(self, query: str):
+    def _generate_report_structure(self, run: ResearchRun, query: str):
         print(f"\n[步骤 1] 生成报告结构...")
         report_structure_node = ReportStructureNode(self.llm_client, query)
-        self.state = report_structure_node.mutate_state(state=self.state)
-        print(f"报告结构已生成，共 {len(self.state.paragraphs)} 个段落:")
-        for i, paragraph in enumerate(self.state.paragraphs, 1):
+        run.state = report_structure_node.mutate_state(state=run.state)
+        print(f"报告结构已生成，共 {len(run.state.paragraphs)} 个段落:")
+        for i, paragraph in enumerate(run.state.paragraphs, 1):
             print(f"  {i}. {paragraph.title}")
 
-    # === 快模式：只跑前 N 段 + 不反思 ===
-    def _process_paragraphs(self):
-        total_paragraphs = len(self.state.paragraphs)
+    # === 段落并发研究（快模式：只跑前 N 段 + 不反思） ===
+    def _process_paragraphs(self, run: ResearchRun):
+        """
+        各段落互不依赖，按 config.paragraph_concurrency 并发研究：
+        - 每个段落只写自己在 run.state.paragraphs 中的槽位，最终顺序与报告结构一致
+        - 单个段落失败只记日志，不影响其他段落；全部失败时抛出第一个错误
+        - 取消信号对所有段落生效，排队中的段落不再开始
+        """
+        total_paragraphs = len(run.state.paragraphs)
         if self.quick_mode:
             total_paragraphs = min(total_paragraphs, self.quick_max_paras)
+        if total_paragraphs <= 0:
+            return
 
-        for i in range(total_paragraphs):
-            print(f"\n[步骤 2.{i+1}] 处理段落: {self.state.paragraphs[i].title}")
-            print("-" * 50)
-            self._initial_search_and_summary(i)
+        reflections = 0 if self.quick_mode else max(0, int(self.config.max_reflections))
+        run.plan_units(total_paragraphs * (1 + reflections))
 
-            if not self.quick_mode:
-                self._reflection_loop(i)
+        fan_out = max(1, min(int(self.config.paragraph_concurrency), total_paragraphs))
+        print(f"\n[步骤 2] 并发研究 {total_paragraphs} 个段落（并发度 {fan_out}）")
 
-            self.state.paragraphs[i].research.mark_completed()
-            progress = (i + 1) / total_paragraphs * 100
-            print(f"段落处理完成 ({progress:.1f}%)")
+        errors: Dict[int, Exception] = {}
+        cancelled: Optional[ResearchCancelled] = None
+        done = 0
+        pool = ThreadPoolExecutor(max_workers=fan_out, thread_name_prefix="qe-paragraph")
+        try:
+            futures = {pool.submit(self._research_paragraph, run, i): i for i in range(total_paragraphs)}
+            for fut in as_completed(futures):
+                i = futures[fut]
+                try:
+                    fut.result()
+                except ResearchCancelled as e:
+                    cancelled = e
+                    continue
+                except Exception as e:
+                    errors[i] = e
+                    print(f"⚠️ 段落 {i+1}「{run.state.paragraphs[i].title}」研究失败（已隔离）：{e}")
+                done += 1
+                progress = done / total_paragraphs * 100
+                print(f"段落处理完成 ({progress:.1f}%)")
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+        if cancelled is not None:
+            raise cancelled
+        if errors and len(errors) == total_paragraphs:
+            raise errors[min(errors)]
+
+    def _research_paragraph(self, run: ResearchRun, i: int):
+        run.check_cancelled()
+        print(f"\n[步骤 2.{i+1}] 处理段落: {run.state.paragraphs[i].title}")
+        print("-" * 50)
+        self._initial_search_and_summary(run, i)
+
+        if not self.quick_mode:
+            self._reflection_loop(run, i)
+
+        run.state.paragraphs[i].research.mark_completed()
 
     # === 初搜 & 首次总结 ===
-    def _initial_search_and_summary(self, paragraph_index: int):
-        paragraph = self.state.paragraphs[paragraph_index]
+    def _initial_search_and_summary(self, run: ResearchRun, paragraph_index: int):
+        paragraph = run.state.paragraphs[paragraph_index]
         print("  - 生成搜索查询...")
 
         if self.quick_mode:
@@ -288,6 +416,7 @@ class DeepSearchAgent:
                 print("  ⚠️  日期参数缺失或格式错误，改用基础搜索")
                 search_tool = "basic_search_news"
 
+        run.check_cancelled()
         search_response = self.execute_search_tool(search_tool, search_query, **search_kwargs)
 
         search_results = []
@@ -313,6 +442,7 @@ class DeepSearchAgent:
 
         paragraph.research.add_search_results(search_query, search_results)
 
+        run.check_cancelled()
         print("  - 生成初始总结...")
         summary_input = {
             "title": paragraph.title,
@@ -322,14 +452,15 @@ class DeepSearchAgent:
                 search_results, self.config.max_content_length
             )
         }
-        self.state = self.first_summary_node.mutate_state(
-            summary_input, self.state, paragraph_index
-        )
+        # 只改写 paragraph_index 对应的段落，段落并发时互不干扰
+        self.first_summary_node.mutate_state(summary_input, run.state, paragraph_index)
         print("  - 初始总结完成")
+        run.advance(f"paragraph {paragraph_index + 1}: summary")
 
-    def _reflection_loop(self, paragraph_index: int):
-        paragraph = self.state.paragraphs[paragraph_index]
+    def _reflection_loop(self, run: ResearchRun, paragraph_index: int):
+        paragraph = run.state.paragraphs[paragraph_index]
         for reflection_i in range(self.config.max_reflections):
+            run.check_cancelled()
             print(f"  - 反思 {reflection_i + 1}/{self.config.max_reflections}...")
             reflection_input = {
                 "title": paragraph.title,
@@ -356,6 +487,7 @@ class DeepSearchAgent:
                     print(f"    ⚠️  日期参数缺失或格式错误，改用基础搜索")
                     search_tool = "basic_search_news"
 
+            run.check_cancelled()
             search_response = self.execute_search_tool(search_tool, search_query, **search_kwargs)
 
             search_results = []
@@ -381,6 +513,7 @@ class DeepSearchAgent:
 
             paragraph.research.add_search_results(search_query, search_results)
 
+            run.check_cancelled()
             reflection_summary_input = {
                 "title": paragraph.title,
                 "content": paragraph.content,
@@ -390,15 +523,16 @@ class DeepSearchAgent:
                 ),
                 "paragraph_latest_state": paragraph.research.latest_summary
             }
-            self.state = self.reflection_summary_node.mutate_state(
-                reflection_summary_input, self.state, paragraph_index
+            self.reflection_summary_node.mutate_state(
+                reflection_summary_input, run.state, paragraph_index
             )
             print(f"    反思 {reflection_i + 1} 完成")
+            run.advance(f"paragraph {paragraph_index + 1}: reflection {reflection_i + 1}")
 
-    def _generate_final_report(self) -> str:
+    def _generate_final_report(self, run: ResearchRun) -> str:
         print(f"\n[步骤 3] 生成最终报告...")
         report_data = []
-        for paragraph in self.state.paragraphs:
+        for paragraph in run.state.paragraphs:
             report_data.append({
                 "title": paragraph.title,
                 "paragraph_latest_state": paragraph.research.latest_summary
@@ -408,17 +542,17 @@ class DeepSearchAgent:
         except Exception as e:
             print(f"LLM格式化失败，使用备用方法: {str(e)}")
             final_report = self.report_formatting_node.format_report_manually(
-                report_data, self.state.report_title
+                report_data, run.state.report_title
             )
-        self.state.final_report = final_report
-        self.state.mark_completed()
+        run.state.final_report = final_report
+        run.state.mark_completed()
         print("最终报告生成完成")
         return final_report
 
     # ---------------- 保存 & 交接 ----------------
-    def _build_draft_md(self) -> str:
-        lines = [f"# {getattr(self.state, 'report_title', self.state.query) or '研究初稿'}", ""]
-        for idx, para in enumerate(getattr(self.state, 'paragraphs', []) or [], start=1):
+    def _build_draft_md(self, state: State) -> str:
+        lines = [f"# {getattr(state, 'report_title', state.query) or '研究初稿'}", ""]
+        for idx, para in enumerate(getattr(state, 'paragraphs', []) or [], start=1):
             title = getattr(para, "title", f"段落 {idx}") or f"段落 {idx}"
             try:
                 latest = getattr(getattr(para, "research", None), "latest_summary", "") or ""
@@ -462,28 +596,31 @@ class DeepSearchAgent:
             lines.append("")
         return "\n".join(lines).strip() + "\n"
 
-    def _save_report(self, report_content: str):
-        """保存：默认只保存 draft 与 state；deep_search_report 可通过环境变量开启"""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        query_raw = getattr(self.state, "query", "") or ""
+    def _save_report(self, run: ResearchRun, report_content: str) -> ResearchArtifacts:
+        """保存：默认只保存 draft 与 state；deep_search_report 可通过环境变量开启。返回实际写出的产物清单"""
+        timestamp = f'{datetime.now().strftime("%Y%m%d_%H%M%S")}_{run.run_id}'
+        query_raw = getattr(run.state, "query", "") or ""
         query_safe = "".join(c for c in query_raw if c.isalnum() or c in (" ", "-", "_")).rstrip().replace(" ", "_")[:60]
 
         out_dir = Path(self.config.output_dir).resolve()
         out_dir.mkdir(parents=True, exist_ok=True)
+        artifacts = ResearchArtifacts(run_id=run.run_id)
 
         # 1) 保存 state（ReportEngine 必读）
         state_path = out_dir / f"state_{query_safe}_{timestamp}.json"
         try:
-            self.state.save_to_file(str(state_path))
+            run.state.save_to_file(str(state_path))
+            artifacts.state_path = str(state_path)
             print(f"状态已保存到: {state_path}")
         except Exception as e:
             print(f"⚠️ 保存状态失败: {e}")
 
         # 2) 保存 draft（ReportEngine 作为初稿输入）
-        draft_md = self._build_draft_md()
+        draft_md = self._build_draft_md(run.state)
         draft_path = out_dir / f"draft_{query_safe}_{timestamp}.md"
         try:
             draft_path.write_text(draft_md, encoding="utf-8")
+            artifacts.draft_path = str(draft_path)
             print(f"初稿已保存到: {draft_path}")
         except Exception as e:
             print(f"⚠️ 保存初稿失败: {e}")
@@ -494,10 +631,22 @@ class DeepSearchAgent:
             md_path = out_dir / f"deep_search_report_{query_safe}_{timestamp}.md"
             try:
                 md_path.write_text(report_content, encoding="utf-8")
+                artifacts.output_path = str(md_path)
                 print(f"报告已保存到: {md_path}")
             except Exception as e:
                 print(f"⚠️ 保存最终报告失败: {e}")
 
+        # 4) 更新最近一次产物清单（先写临时文件再替换，读者不会看到半截 JSON）
+        if artifacts.state_path or artifacts.draft_path:
+            manifest_path = out_dir / LATEST_ARTIFACTS_FILE
+            tmp_path = out_dir / f".{LATEST_ARTIFACTS_FILE}.{run.run_id}.tmp"
+            try:
+                tmp_path.write_text(json.dumps(artifacts.to_dict(), ensure_ascii=False, indent=2), encoding="utf-8")
+                os.replace(tmp_path, manifest_path)
+            except Exception as e:
+                print(f"⚠️ 更新产物清单失败: {e}")
+        return artifacts
+
     # ---------------- 进度/状态 ----------------
     def get_progress_summary(self) -> Dict[str, Any]:
         return self.state.get_progress_summary()
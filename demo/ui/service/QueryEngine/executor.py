@@ -0,0 +1,303 @@
+# -*- coding: utf-8 -*-
+"""
+QueryEngine 研究任务队列
+- 固定数量的工作线程：阻塞的 DeepSearchAgent.research() 不占用 FastAPI / Mesop 的事件循环
+- 优先级 + FIFO：数字越小越先执行，同优先级按提交顺序（/api/chat 同步调用走 PRIORITY_INTERACTIVE）
+- 准入控制：排队中的任务数达到上限时直接拒绝（QueryEngineBusy，对应 HTTP 429）
+- 协作式取消：cancel_event 置位后，研究流程在搜索/LLM 步骤之间检查并抛出 ResearchCancelled
+- 进度：由 DeepSearchAgent 按段落/反思里程碑回报（QueryTask.report_progress）
+- 回收：已结束任务按 TTL 与数量上限淘汰，长时间运行内存保持平稳
+- 环境变量：QE_MAX_WORKERS / QE_MAX_QUEUE / QE_JOB_TTL_S / QE_JOB_MAX_FINISHED
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+
+PRIORITY_INTERACTIVE = 0   # /api/chat 等同步等待结果的调用
+PRIORITY_NORMAL = 5
+PRIORITY_BACKGROUND = 10   # /api/query/run 默认
+
+_PRIORITY_ALIASES = {"high": PRIORITY_INTERACTIVE, "normal": PRIORITY_NORMAL, "low": PRIORITY_BACKGROUND}
+
+FINISHED_STATUSES = ("completed", "error", "cancelled")
+
+
+class QueryEngineBusy(RuntimeError):
+    """任务队列已满（排队中达到上限）。"""
+
+    status_code = 429
+
+
+class ResearchCancelled(RuntimeError):
+    """研究任务被取消（超时或用户取消）。"""
+
+
+def raise_if_cancelled(cancel_event: Optional[threading.Event]) -> None:
+    if cancel_event is not None and cancel_event.is_set():
+        raise ResearchCancelled("research cancelled")
+
+
+def parse_priority(v: Any, default: int = PRIORITY_BACKGROUND) -> int:
+    if v is None or v == "":
+        return default
+    if isinstance(v, str) and v.strip().lower() in _PRIORITY_ALIASES:
+        return _PRIORITY_ALIASES[v.strip().lower()]
+    try:
+        return int(v)
+    except (TypeError, ValueError):
+        return default
+
+
+# ---------------- 任务结构体 ----------------
+@dataclass
+class QueryTask:
+    task_id: str
+    query: str
+    priority: int = PRIORITY_BACKGROUND
+    status: str = "pending"        # pending, running, completed, error, cancelled
+    progress: int = 0
+    stage: str = ""                # 最近一次进度里程碑（structure / paragraph 2/5 ...）
+    error_message: str = ""
+    created_at: datetime = field(default_factory=datetime.now)
+    updated_at: datetime = field(default_factory=datetime.now)
+    finished_at: Optional[float] = None
+    report_md: str = ""            # 最终 Markdown 文本
+    output_path: str = ""          # 最终报告（若保存）.md
+    draft_path: str = ""           # 初稿 draft_*.md
+    state_path: str = ""           # 状态 state_*.json
+    cancel_event: threading.Event = field(default_factory=threading.Event, repr=False)
+    future: Future = field(default_factory=Future, repr=False)
+
+    def update(self, *, status: Optional[str] = None,
+                     progress: Optional[int] = None,
+                     error: Optional[str] = None,
+                     stage: Optional[str] = None):
+        if status is not None:
+            self.status = status
+            if status in FINISHED_STATUSES and self.finished_at is None:
+                self.finished_at = time.time()
+        if progress is not None:
+            self.progress = max(0, min(100, progress))
+        if stage is not None:
+            self.stage = stage
+        if error:
+            self.error_message = error
+        self.updated_at = datetime.now()
+
+    def report_progress(self, progress: int, stage: str = ""):
+        """供 DeepSearchAgent 回调；进度只增不减。"""
+        if progress >= self.progress:
+            self.update(progress=progress, stage=stage)
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "task_id": self.task_id,
+            "query": self.query,
+            "priority": self.priority,
+            "status": self.status,
+            "progress": self.progress,
+            "stage": self.stage,
+            "error_message": self.error_message,
+            "created_at": self.created_at.isoformat(),
+            "updated_at": self.updated_at.isoformat(),
+            "has_result": bool(self.report_md),
+            "output_path": self.output_path,
+            "draft_path": self.draft_path,
+            "state_path": self.state_path,
+        }
+
+
+class ResearchJobQueue:
+    """
+    有界工作线程池 + 优先级队列。
+    submit(fn, query=...) 返回 QueryTask；fn(task) 在工作线程中执行，返回值写入 task.future。
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, max_queue: Optional[int] = None,
+                 job_ttl_s: Optional[float] = None, max_finished: Optional[int] = None):
+        self.max_workers = max(1, max_workers if max_workers is not None
+                               else int(os.getenv("QE_MAX_WORKERS", "2")))
+        self.max_queue = max(0, max_queue if max_queue is not None
+                             else int(os.getenv("QE_MAX_QUEUE", "8")))
+        self.job_ttl_s = job_ttl_s if job_ttl_s is not None else float(os.getenv("QE_JOB_TTL_S", "3600"))
+        self.max_finished = max(0, max_finished if max_finished is not None
+                                else int(os.getenv("QE_JOB_MAX_FINISHED", "200")))
+
+        self._queue: "queue.PriorityQueue" = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._tasks: "OrderedDict[str, QueryTask]" = OrderedDict()
+        self._fns: Dict[str, Callable[[QueryTask], Any]] = {}
+        self._workers: List[threading.Thread] = []
+        self._pending = 0
+        self._running = 0
+        self._rejected = 0
+        self._completed = 0
+        self._failed = 0
+        self._cancelled = 0
+        self._evicted = 0
+
+    # ---------- 工作线程 ----------
+    def _ensure_workers(self):
+        if self._workers:
+            return
+        for i in range(self.max_workers):
+            t = threading.Thread(target=self._worker_loop, name=f"qe-research-{i}", daemon=True)
+            t.start()
+            self._workers.append(t)
+
+    def _worker_loop(self):
+        while True:
+            _prio, _seq, task_id = self._queue.get()
+            with self._lock:
+                task = self._tasks.get(task_id)
+                fn = self._fns.pop(task_id, None)
+                # 排队阶段已被取消/淘汰的任务：名额已在 cancel() 中归还
+                if task is None or fn is None or task.status != "pending":
+                    continue
+                # 与出队计数在同一把锁内认领：此后 cancel() 只会置位取消信号，不会再动 _pending
+                task.update(status="running", stage="started")
+                self._pending -= 1
+                self._running += 1
+            self._execute(task, fn)
+
+    def _execute(self, task: QueryTask, fn: Callable[[QueryTask], Any]):
+        try:
+            if not task.future.set_running_or_notify_cancel():
+                task.update(status="cancelled", error="任务已取消")
+                with self._lock:
+                    self._cancelled += 1
+                return
+            raise_if_cancelled(task.cancel_event)
+            result = fn(task)
+            task.update(status="completed", progress=100, stage="done")
+            task.future.set_result(result)
+            with self._lock:
+                self._completed += 1
+        except ResearchCancelled as e:
+            task.update(status="cancelled", progress=0, error="用户取消任务")
+            with self._lock:
+                self._cancelled += 1
+            if not task.future.done():
+                task.future.set_exception(e)
+        except Exception as e:
+            task.update(status="error", progress=0, error=str(e))
+            with self._lock:
+                self._failed += 1
+            if not task.future.done():
+                task.future.set_exception(e)
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._evict_locked()
+
+    # ---------- 提交 / 查询 / 取消 ----------
+    def submit(self, fn: Callable[[QueryTask], Any], *, query: str,
+               priority: int = PRIORITY_BACKGROUND, task_id: Optional[str] = None) -> QueryTask:
+        with self._lock:
+            self._evict_locked()
+            # 空闲工作线程可以立即接手的任务不占排队名额
+            idle = max(0, self.max_workers - self._running)
+            if self._pending >= self.max_queue + idle:
+                self._rejected += 1
+                raise QueryEngineBusy(
+                    f"QueryEngine busy: {self._running} running, {self._pending} queued "
+                    f"(max_workers={self.max_workers}, max_queue={self.max_queue})"
+                )
+            seq = next(self._seq)
+            task_id = task_id or f"query_{int(time.time()*1000)}_{seq}"
+            task = QueryTask(task_id=task_id, query=query, priority=priority)
+            self._tasks[task_id] = task
+            self._fns[task_id] = fn
+            self._pending += 1
+            self._ensure_workers()
+
+        def _on_future_done(f: Future, tid: str = task_id):
+            # 调用方取消了 future（例如 asyncio 侧超时）→ 同步取消任务本身
+            if f.cancelled():
+                self.cancel(tid)
+
+        task.future.add_done_callback(_on_future_done)
+        self._queue.put((priority, seq, task_id))
+        return task
+
+    def get(self, task_id: str) -> Optional[QueryTask]:
+        with self._lock:
+            return self._tasks.get(task_id)
+
+    def cancel(self, task_id: str) -> Optional[QueryTask]:
+        """排队中的任务立即取消；运行中的任务置位取消信号，在下一个检查点退出。"""
+        with self._lock:
+            task = self._tasks.get(task_id)
+            if task is None:
+                return None
+            task.cancel_event.set()
+            if task.status == "pending":
+                self._pending -= 1
+                self._cancelled += 1
+                self._fns.pop(task_id, None)
+                task.update(status="cancelled", progress=0, error="用户取消任务")
+        if task.status == "cancelled":
+            task.future.cancel()
+        return task
+
+    async def run(self, fn: Callable[[QueryTask], Any], *, query: str,
+                  priority: int = PRIORITY_INTERACTIVE, timeout_s: Optional[float] = None) -> Any:
+        """提交并等待结果（不阻塞事件循环）；超时或调用方被取消时取消该任务。"""
+        task = self.submit(fn, query=query, priority=priority)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(task.future), timeout=timeout_s)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            self.cancel(task.task_id)
+            raise
+
+    # ---------- 回收 ----------
+    def _evict_locked(self):
+        now = time.time()
+        finished = [t for t in self._tasks.values() if t.is_finished]
+        drop = {t.task_id for t in finished
+                if self.job_ttl_s >= 0 and t.finished_at is not None and now - t.finished_at > self.job_ttl_s}
+        overflow = len(finished) - len(drop) - self.max_finished
+        if overflow > 0:
+            keep = sorted((t for t in finished if t.task_id not in drop), key=lambda t: t.finished_at or 0.0)
+            drop.update(t.task_id for t in keep[:overflow])
+        for tid in drop:
+            self._tasks.pop(tid, None)
+            self._fns.pop(tid, None)
+        self._evicted += len(drop)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._tasks)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._evict_locked()
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "running": self._running,
+                "queued": self._pending,
+                "tracked": len(self._tasks),
+                "rejected": self._rejected,
+                "completed": self._completed,
+                "failed": self._failed,
+                "cancelled": self._cancelled,
+                "evicted": self._evicted,
+            }
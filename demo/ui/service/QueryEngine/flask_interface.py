@@ -3,77 +3,38 @@
 QueryEngine FastAPI 子路由（与 ReportEngine 同风格）
 - 路由前缀: /api/query
 - 异步/同步两用：run_query_sync(...) 可被主控 /api/chat 编排直接调用
-- 任务队列：/run -> /progress/{id} -> /result/{id}
+- 任务队列：/run -> /progress/{id} -> /result/{id}，所有研究任务经 ResearchJobQueue（优先级 + FIFO，QE_MAX_WORKERS / QE_MAX_QUEUE）运行，满载时返回 429
 - 工具直连：/tools（列举）  /tool（执行指定 Tavily 工具）
 """
 
 from __future__ import annotations
+import asyncio
 import os
 import json
-import time
 import threading
 import traceback
-from dataclasses import dataclass, field
-from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, Optional, List, Tuple
+from typing import Callable, Dict, Any, Optional, List, Tuple
 
 from fastapi import APIRouter, Body
 from fastapi.responses import JSONResponse, Response
 
 # 你的 QueryEngine 代码
 from .agent import DeepSearchAgent
+from .executor import (
+    PRIORITY_INTERACTIVE, QueryEngineBusy, QueryTask, ResearchCancelled, ResearchJobQueue, parse_priority,
+)
 from .utils.config import load_config
 
 query_router = APIRouter(prefix="/api/query", tags=["query"])
 
+# 共享实例：研究状态按调用隔离（见 agent.ResearchRun），可被执行池并发调用
 _QUERY_AGENT: Optional[DeepSearchAgent] = None
 _INITIALIZED: bool = False
 _LAST_ERROR: Optional[str] = None
 
-_TASKS: Dict[str, "QueryTask"] = {}
-_TASK_LOCK = threading.Lock()
-
-# ---------------- 任务结构体 ----------------
-@dataclass
-class QueryTask:
-    task_id: str
-    query: str
-    status: str = "pending"        # pending, running, completed, error, cancelled
-    progress: int = 0
-    error_message: str = ""
-    created_at: datetime = field(default_factory=datetime.now)
-    updated_at: datetime = field(default_factory=datetime.now)
-    report_md: str = ""            # 最终 Markdown 文本
-    output_path: str = ""          # 最终报告（若保存）.md
-    draft_path: str = ""           # 初稿 draft_*.md
-    state_path: str = ""           # 状态 state_*.json
-
-    def update(self, *, status: Optional[str] = None,
-                     progress: Optional[int] = None,
-                     error: Optional[str] = None):
-        if status is not None:
-            self.status = status
-        if progress is not None:
-            self.progress = max(0, min(100, progress))
-        if error:
-            self.error_message = error
-        self.updated_at = datetime.now()
-
-    def to_dict(self) -> Dict[str, Any]:
-        return {
-            "task_id": self.task_id,
-            "query": self.query,
-            "status": self.status,
-            "progress": self.progress,
-            "error_message": self.error_message,
-            "created_at": self.created_at.isoformat(),
-            "updated_at": self.updated_at.isoformat(),
-            "has_result": bool(self.report_md),
-            "output_path": self.output_path,
-            "draft_path": self.draft_path,
-            "state_path": self.state_path,
-        }
+# 研究任务队列（与 FastAPI 默认线程池隔离；已结束任务按 TTL / 数量回收）
+_JOBS = ResearchJobQueue()
 
 # ------------- 初始化（幂等） -------------
 def _resolve_output_dir_fallback(cfg_output_dir: Optional[str]) -> Path:
@@ -122,17 +83,6 @@ def initialize_query_engine() -> bool:
 initialize_query_engine()
 
 # ------------- 工具方法 -------------
-def _list_files(output_dir: Path, pattern: str) -> List[Path]:
-    return sorted(
-        output_dir.glob(pattern),
-        key=lambda p: p.stat().st_mtime,
-        reverse=True,
-    )
-
-def _diff_new_files(before: List[Path], after: List[Path]) -> List[Path]:
-    bs = {p.name for p in before}
-    return [p for p in after if p.name not in bs]
-
 def _safe_read_text(p: Path) -> str:
     try:
         return p.read_text(encoding="utf-8")
@@ -144,100 +94,63 @@ async def run_query_sync(query: str, *, save_report: bool = True, timeout_s: flo
     """
     主控 /api/chat 在识别到“应进行深度搜索/研究”时可直接调用。
     返回：
-      成功: {"ok": True, "result": {"length": int, "output_path": "...", "draft_path": "...", "state_path":"..."}}
-      失败: {"ok": False, "error": "..."}
+      成功: {"ok": True, "result": {"report_md": str, "length": int, "output_path": "...", "draft_path": "...",
+                                    "state_path": "...", "artifacts": {...}}}
+      其中路径均来自本次运行的产物清单（DeepSearchAgent._save_report），不扫描输出目录
+      失败: {"ok": False, "error": "..."}（执行池满载时额外带 "status": 429）
     """
     try:
         if not initialize_query_engine() or _QUERY_AGENT is None:
             return {"ok": False, "error": _LAST_ERROR or "QueryEngine not initialized"}
 
-        out_dir = Path(_QUERY_AGENT.config.output_dir).resolve()
-        out_dir.mkdir(parents=True, exist_ok=True)
-
-        # 记录前置文件集
-        b_deep  = _list_files(out_dir, "deep_search_report_*.md")
-        b_draft = _list_files(out_dir, "draft_*.md")
-        b_state = _list_files(out_dir, "state_*.json")
-
-        # 执行深度研究
-        md = _QUERY_AGENT.research(query, save_report=save_report)
-
-        # 采集新增
-        a_deep  = _list_files(out_dir, "deep_search_report_*.md")
-        a_draft = _list_files(out_dir, "draft_*.md")
-        a_state = _list_files(out_dir, "state_*.json")
-
-        new_deep  = _diff_new_files(b_deep,  a_deep)
-        new_draft = _diff_new_files(b_draft, a_draft)
-        new_state = _diff_new_files(b_state, a_state)
-
-        output_path = str((new_deep[0] if new_deep else (a_deep[0] if a_deep else Path()))) if (a_deep or new_deep) else ""
-        draft_path  = str((new_draft[0] if new_draft else (a_draft[0] if a_draft else Path()))) if (a_draft or new_draft) else ""
-        state_path  = str((new_state[0] if new_state else (a_state[0] if a_state else Path()))) if (a_state or new_state) else ""
-
-        return {
-            "ok": True,
-            "result": {
-                "length": len(md or ""),
-                "output_path": output_path,
-                "draft_path": draft_path,
-                "state_path": state_path
-            }
-        }
+        res = await _JOBS.run(
+            lambda task: _research_with_artifacts(
+                query, save_report=save_report,
+                cancel_event=task.cancel_event, progress_cb=task.report_progress,
+            ),
+            query=query, priority=PRIORITY_INTERACTIVE, timeout_s=timeout_s,
+        )
+        return {"ok": True, "result": res}
+    except QueryEngineBusy as e:
+        return {"ok": False, "error": str(e), "status": QueryEngineBusy.status_code}
+    except asyncio.TimeoutError:
+        return {"ok": False, "error": f"QueryEngine timeout after {timeout_s:.0f}s (cancelled)"}
+    except ResearchCancelled as e:
+        return {"ok": False, "error": f"QueryEngine cancelled: {e}"}
     except Exception as e:
         traceback.print_exc()
         return {"ok": False, "error": f"{type(e).__name__}: {e}"}
 
-# ------------- 后台任务执行逻辑（线程） -------------
-def _run_task_thread(task_id: str):
-    task = _TASKS.get(task_id)
-    if not task:
-        return
-    try:
-        task.update(status="running", progress=10)
-
-        ok = initialize_query_engine()
-        if not ok or _QUERY_AGENT is None:
-            task.update(status="error", progress=0, error=_LAST_ERROR or "QueryEngine not initialized")
-            return
-
-        out_dir = Path(_QUERY_AGENT.config.output_dir).resolve()
-        out_dir.mkdir(parents=True, exist_ok=True)
-
-        # 30%：预备
-        task.update(progress=30)
-        b_deep  = _list_files(out_dir, "deep_search_report_*.md")
-        b_draft = _list_files(out_dir, "draft_*.md")
-        b_state = _list_files(out_dir, "state_*.json")
-
-        # 80%：执行研究
-        task.update(progress=80)
-        md = _QUERY_AGENT.research(task.query, save_report=True)
-        task.report_md = md or ""
-
-        # 90%：捕获输出文件
-        task.update(progress=90)
-        a_deep  = _list_files(out_dir, "deep_search_report_*.md")
-        a_draft = _list_files(out_dir, "draft_*.md")
-        a_state = _list_files(out_dir, "state_*.json")
-
-        new_deep  = _diff_new_files(b_deep,  a_deep)
-        new_draft = _diff_new_files(b_draft, a_draft)
-        new_state = _diff_new_files(b_state, a_state)
-
-        if new_deep:  task.output_path = str(new_deep[0])
-        elif a_deep:  task.output_path = str(a_deep[0])
-
-        if new_draft: task.draft_path  = str(new_draft[0])
-        elif a_draft: task.draft_path  = str(a_draft[0])
-
-        if new_state: task.state_path  = str(new_state[0])
-        elif a_state: task.state_path  = str(a_state[0])
-
-        # 100%：完成
-        task.update(status="completed", progress=100)
-    except Exception as e:
-        task.update(status="error", progress=0, error=str(e))
+def _research_with_artifacts(query: str, *, save_report: bool = True,
+                             cancel_event: Optional[threading.Event] = None,
+                             progress_cb: Optional[Callable[[int, str], None]] = None) -> Dict[str, Any]:
+    """在任务队列工作线程中运行：研究 + 本次运行写出的产物清单。"""
+    res = _QUERY_AGENT.run_research(query, save_report=save_report,
+                                    cancel_event=cancel_event, progress_cb=progress_cb)
+    md = res.report_md or ""
+    artifacts = res.artifacts.to_dict()
+    return {
+        "report_md": md,
+        "length": len(md),
+        "output_path": artifacts["output_path"],
+        "draft_path": artifacts["draft_path"],
+        "state_path": artifacts["state_path"],
+        "artifacts": artifacts,
+    }
+
+# ------------- 后台任务执行逻辑（任务队列工作线程） -------------
+def _run_task(task: QueryTask) -> Dict[str, Any]:
+    """状态流转（running/completed/cancelled/error）由 ResearchJobQueue 负责；进度由 DeepSearchAgent 回报。"""
+    if not initialize_query_engine() or _QUERY_AGENT is None:
+        raise RuntimeError(_LAST_ERROR or "QueryEngine not initialized")
+
+    res = _research_with_artifacts(task.query, save_report=True,
+                                   cancel_event=task.cancel_event, progress_cb=task.report_progress)
+    task.report_md = res.pop("report_md", "")
+    task.output_path = res.get("output_path", "")
+    task.draft_path = res.get("draft_path", "")
+    task.state_path = res.get("state_path", "")
+    return res
 
 # ------------- REST API -------------
 @query_router.get("/status")
@@ -248,7 +161,8 @@ def get_status():
             "success": True,
             "initialized": init_ok and (_QUERY_AGENT is not None),
             "error": _LAST_ERROR,
-            "tasks": len(_TASKS),
+            "tasks": len(_JOBS),
+            "pool": _JOBS.stats(),
         }
         if _QUERY_AGENT is not None:
             cfg = _QUERY_AGENT.config
@@ -256,6 +170,7 @@ def get_status():
                 "output_dir": cfg.output_dir,
                 "model": getattr(getattr(_QUERY_AGENT, "llm_client", None), "get_model_info", lambda: "unknown")(),
                 "tavily_enabled": bool(getattr(cfg, "tavily_api_key", "")),
+                "search_cache": _QUERY_AGENT.search_agency.cache_stats(),
             })
         return JSONResponse(info)
     except Exception as e:
@@ -264,21 +179,18 @@ def get_status():
 @query_router.post("/run")
 def run_query(payload: Dict[str, Any] = Body(...)):
     """
-    启动异步深度研究任务（后台线程）
-    body: {"query": "..."}
+    启动异步深度研究任务（提交到研究任务队列；满载时返回 429）
+    body: {"query": "...", "priority": "high" | "normal" | "low" | int（可选，默认 low）}
     """
     try:
         query = (payload.get("query") or "").strip()
         if not query:
             return JSONResponse({"success": False, "error": "query 不能为空"}, status_code=400)
 
-        with _TASK_LOCK:
-            task_id = f"query_{int(time.time()*1000)}"
-            task = QueryTask(task_id=task_id, query=query)
-            _TASKS[task_id] = task
-
-        t = threading.Thread(target=_run_task_thread, args=(task_id,), daemon=True)
-        t.start()
+        try:
+            task = _JOBS.submit(_run_task, query=query, priority=parse_priority(payload.get("priority")))
+        except QueryEngineBusy as e:
+            return JSONResponse({"success": False, "error": str(e)}, status_code=QueryEngineBusy.status_code)
 
         return JSONResponse({"success": True, "task": task.to_dict()})
     except Exception as e:
@@ -287,7 +199,7 @@ def run_query(payload: Dict[str, Any] = Body(...)):
 @query_router.get("/progress/{task_id}")
 def get_progress(task_id: str):
     try:
-        task = _TASKS.get(task_id)
+        task = _JOBS.get(task_id)
         if not task:
             # 与 ReportEngine 一致：任务不存在也返回 completed，避免前端死等
             return JSONResponse({"success": True, "task": {
@@ -301,7 +213,7 @@ def get_progress(task_id: str):
 @query_router.get("/result/{task_id}")
 def get_result(task_id: str):
     try:
-        task = _TASKS.get(task_id)
+        task = _JOBS.get(task_id)
         if not task:
             return JSONResponse({"success": False, "error": "任务不存在"}, status_code=404)
         if task.status != "completed":
@@ -314,7 +226,7 @@ def get_result(task_id: str):
 @query_router.get("/result/{task_id}/json")
 def get_result_json(task_id: str):
     try:
-        task = _TASKS.get(task_id)
+        task = _JOBS.get(task_id)
         if not task:
             return JSONResponse({"success": False, "error": "任务不存在"}, status_code=404)
         if task.status != "completed":
@@ -326,14 +238,11 @@ def get_result_json(task_id: str):
 @query_router.post("/cancel/{task_id}")
 def cancel_task(task_id: str):
     try:
-        with _TASK_LOCK:
-            task = _TASKS.get(task_id)
-            if not task:
-                return JSONResponse({"success": False, "error": "任务不存在"}, status_code=404)
-            if task.status == "running":
-                task.update(status="cancelled", progress=0, error="用户取消任务")
-            _TASKS.pop(task_id, None)
-        return JSONResponse({"success": True, "message": "任务已取消"})
+        # 排队中的任务立即取消并归还名额；运行中的任务在下一个检查点退出
+        task = _JOBS.cancel(task_id)
+        if not task:
+            return JSONResponse({"success": False, "error": "任务不存在"}, status_code=404)
+        return JSONResponse({"success": True, "message": "任务已取消", "task": task.to_dict()})
     except Exception as e:
         return JSONResponse({"success": False, "error": str(e)}, status_code=500)
 
@@ -10,11 +10,21 @@ from .search import (
     ImageResult,
     print_response_summary
 )
+from .search_cache import (
+    SearchCache,
+    MemorySearchCache,
+    SQLiteSearchCache,
+    TieredSearchCache,
+)
 
 __all__ = [
     "TavilyNewsAgency", 
     "SearchResult", 
     "TavilyResponse", 
     "ImageResult",
-    "print_response_summary"
+    "print_response_summary",
+    "SearchCache",
+    "MemorySearchCache",
+    "SQLiteSearchCache",
+    "TieredSearchCache",
 ]
@@ -16,10 +16,12 @@
 
 import os
 from typing import List, Dict, Any, Optional
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, asdict
 
 # ✅ 稳健：使用包内相对导入（不再修改 sys.path）
 from ..utils.retry_helper import with_graceful_retry, SEARCH_API_RETRY_CONFIG  # type: ignore
+from .search_cache import SearchCache, build_search_cache_from_env, make_cache_key, ttl_for_tool
+from .singleflight import SingleFlight
 
 # 运行前请确保已安装 Tavily 库: pip install tavily-python
 try:
@@ -60,6 +62,23 @@ class TavilyResponse:
     images: List[ImageResult] = field(default_factory=list)
     response_time: Optional[float] = None
 
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TavilyResponse":
+        return cls(
+            query=data.get("query", ""),
+            answer=data.get("answer"),
+            results=[SearchResult(**r) for r in data.get("results") or []],
+            images=[ImageResult(**i) for i in data.get("images") or []],
+            response_time=data.get("response_time"),
+        )
+
+
+# 重试耗尽时的兜底返回值；以 `is` 判断，绝不写入缓存
+_SEARCH_FAILED = TavilyResponse(query="搜索失败")
+
 
 # --- 2. 核心客户端与专用工具集 ---
 
@@ -69,18 +88,59 @@ class TavilyNewsAgency:
     每个公共方法都设计为供 AI Agent 独立调用的工具。
     """
 
-    def __init__(self, api_key: Optional[str] = None):
+    _UNSET: Any = object()
+
+    def __init__(self, api_key: Optional[str] = None, cache: Optional[SearchCache] = _UNSET):
         """
         初始化客户端。
         Args:
             api_key: Tavily API 密钥，若不提供则从环境变量 TAVILY_API_KEY 读取。
+            cache: 搜索结果缓存；不传则按 QE_SEARCH_CACHE* 环境变量构建，传 None 关闭缓存。
         """
         key = api_key or os.getenv("TAVILY_API_KEY")
         if not key:
             raise ValueError("Tavily API Key 未找到！请设置环境变量 TAVILY_API_KEY 或在初始化时传入 api_key")
         self._client = TavilyClient(api_key=key)
-
-    @with_graceful_retry(SEARCH_API_RETRY_CONFIG, default_return=TavilyResponse(query="搜索失败"))
+        self._cache: Optional[SearchCache] = build_search_cache_from_env() if cache is self._UNSET else cache
+        # 相同键的并发请求只发一次 HTTP
+        self._inflight = SingleFlight()
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """缓存命中/未命中与在途合并计数（未启用缓存时 enabled=False）。"""
+        out: Dict[str, Any] = {"enabled": self._cache is not None}
+        if self._cache is not None:
+            out.update(self._cache.stats())
+        out["inflight"] = self._inflight.stats()
+        return out
+
+    def _cached_search(self, tool: str, **kwargs: Any) -> TavilyResponse:
+        """
+        按「规范化查询 + 工具 + 参数」查缓存；未命中时经 single-flight 调用 _search_internal：
+        并发的相同请求共享一次 HTTP 结果（异常同样传给每个等待者），只有 leader 写回缓存，失败兜底不缓存。
+        """
+        key = make_cache_key(tool, kwargs.get("query", ""), kwargs)
+        if self._cache is not None:
+            try:
+                cached = self._cache.get(key)
+            except Exception as e:
+                print(f"[SearchCache] 读取失败，直接请求: {e!r}")
+                cached = None
+            if cached is not None:
+                print(f"[SearchCache] 命中 ({tool}): {kwargs.get('query', '')}")
+                return TavilyResponse.from_dict(cached)
+
+        def _fetch() -> TavilyResponse:
+            resp = self._search_internal(**kwargs)
+            if self._cache is not None and resp is not _SEARCH_FAILED:
+                try:
+                    self._cache.set(key, resp.to_dict(), ttl_for_tool(tool), tool)
+                except Exception as e:
+                    print(f"[SearchCache] 写入失败: {e!r}")
+            return resp
+
+        return self._inflight.do(key, _fetch)
+
+    @with_graceful_retry(SEARCH_API_RETRY_CONFIG, default_return=_SEARCH_FAILED)
     def _search_internal(self, **kwargs: Any) -> TavilyResponse:
         """
         内部通用的搜索执行器，所有工具最终都调用此方法。
@@ -132,7 +192,8 @@ class TavilyNewsAgency:
         Agent 可提供搜索查询 (query) 和可选的最大结果数 (max_results)。
         """
         print(f"--- TOOL: 基础新闻搜索 (query: {query}) ---")
-        return self._search_internal(
+        return self._cached_search(
+            "basic_search_news",
             query=query,
             max_results=max_results,
             search_depth="basic",
@@ -146,7 +207,8 @@ class TavilyNewsAgency:
         Agent 只需提供搜索查询 (query)。
         """
         print(f"--- TOOL: 深度新闻分析 (query: {query}) ---")
-        return self._search_internal(
+        return self._cached_search(
+            "deep_search_news",
             query=query,
             search_depth="advanced",
             max_results=20,
@@ -160,7 +222,7 @@ class TavilyNewsAgency:
         Agent 只需提供搜索查询 (query)。
         """
         print(f"--- TOOL: 搜索24小时内新闻 (query: {query}) ---")
-        return self._search_internal(query=query, time_range="d", max_results=10)
+        return self._cached_search("search_news_last_24_hours", query=query, time_range="d", max_results=10)
 
     def search_news_last_week(self, query: str) -> TavilyResponse:
         """
@@ -169,7 +231,7 @@ class TavilyNewsAgency:
         Agent 只需提供搜索查询 (query)。
         """
         print(f"--- TOOL: 搜索本周新闻 (query: {query}) ---")
-        return self._search_internal(query=query, time_range="w", max_results=10)
+        return self._cached_search("search_news_last_week", query=query, time_range="w", max_results=10)
 
     def search_images_for_news(self, query: str) -> TavilyResponse:
         """
@@ -178,7 +240,8 @@ class TavilyNewsAgency:
         Agent 只需提供搜索查询 (query)。
         """
         print(f"--- TOOL: 查找新闻图片 (query: {query}) ---")
-        return self._search_internal(
+        return self._cached_search(
+            "search_images_for_news",
             query=query,
             include_images=True,
             include_image_descriptions=True,
@@ -192,7 +255,8 @@ class TavilyNewsAgency:
         需要提供查询 (query)、开始日期 (start_date) 和结束日期 (end_date)，格式均为 'YYYY-MM-DD'。
         """
         print(f"--- TOOL: 按指定日期范围搜索新闻 (query: {query}, from: {start_date}, to: {end_date}) ---")
-        return self._search_internal(
+        return self._cached_search(
+            "search_news_by_date",
             query=query,
             start_date=start_date,
             end_date=end_date,
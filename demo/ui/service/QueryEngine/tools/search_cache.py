@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+"""
+Tavily 搜索结果缓存（TTL + LRU）
+
+反思循环与重复提问会反复发出几乎相同的查询。这里按「规范化查询 + 工具名 + 参数」缓存
+TavilyResponse，降低延迟与 API 配额消耗。
+
+- MemorySearchCache: 进程内 LRU，按条目数与近似字节数双重限界
+- SQLiteSearchCache: 可选磁盘层，重启后仍可命中
+- TieredSearchCache: 内存 → 磁盘两级，磁盘命中回填内存
+- 每个工具独立 TTL（24 小时内新闻短，按日期范围搜索长），均可用环境变量覆盖
+
+环境变量:
+    QE_SEARCH_CACHE=0                    关闭缓存
+    QE_SEARCH_CACHE_MAX_ENTRIES=512      内存层最大条目数
+    QE_SEARCH_CACHE_MAX_BYTES=33554432   内存层近似字节上限
+    QE_SEARCH_CACHE_DB=path/to/cache.db  开启 SQLite 磁盘层
+    QE_SEARCH_CACHE_DB_MAX_ROWS=5000     磁盘层最大行数
+    QE_SEARCH_CACHE_TTL_<TOOL>=秒         覆盖某个工具的 TTL，如 QE_SEARCH_CACHE_TTL_SEARCH_NEWS_LAST_24_HOURS=300
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+# 各工具默认 TTL（秒）
+DEFAULT_TOOL_TTLS: Dict[str, float] = {
+    "search_news_last_24_hours": 10 * 60,
+    "search_news_last_week": 60 * 60,
+    "basic_search_news": 30 * 60,
+    "deep_search_news": 60 * 60,
+    "search_images_for_news": 6 * 60 * 60,
+    "search_news_by_date": 24 * 60 * 60,
+}
+DEFAULT_TTL: float = 30 * 60
+
+_WS_RE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    return _WS_RE.sub(" ", (query or "").strip()).lower()
+
+
+def make_cache_key(tool: str, query: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """规范化查询 + 工具名 + 参数（排序后、去 None）→ 稳定的 sha1 键。"""
+    clean = {k: v for k, v in (params or {}).items() if v is not None and k != "query"}
+    raw = json.dumps(
+        {"tool": tool, "query": normalize_query(query), "params": clean},
+        ensure_ascii=False, sort_keys=True, default=str,
+    )
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def ttl_for_tool(tool: str) -> float:
+    env = os.getenv(f"QE_SEARCH_CACHE_TTL_{tool.upper()}")
+    if env:
+        try:
+            return float(env)
+        except ValueError:
+            pass
+    return DEFAULT_TOOL_TTLS.get(tool, DEFAULT_TTL)
+
+
+class SearchCache:
+    """缓存接口：值为可 JSON 序列化的 dict（TavilyResponse 的 asdict 结果）。"""
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Dict[str, Any], ttl: float, tool: str = "") -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+
+class MemorySearchCache(SearchCache):
+    def __init__(self, max_entries: int = 512, max_bytes: int = 32 * 1024 * 1024):
+        self.max_entries = max(1, int(max_entries))
+        self.max_bytes = max(1, int(max_bytes))
+        self._data: "OrderedDict[str, Tuple[float, int, Dict[str, Any]]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            expires_at, size, value = item
+            if expires_at <= now:
+                self._pop(key)
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Dict[str, Any], ttl: float, tool: str = "") -> None:
+        if ttl <= 0:
+            return
+        size = len(json.dumps(value, ensure_ascii=False, default=str).encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._data:
+                self._pop(key)
+            self._data[key] = (time.time() + ttl, size, value)
+            self._bytes += size
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._data))
+                self._pop(oldest)
+                self.evictions += 1
+
+    def _pop(self, key: str) -> None:
+        item = self._data.pop(key, None)
+        if item is not None:
+            self._bytes -= item[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+class SQLiteSearchCache(SearchCache):
+    def __init__(self, path: str, max_rows: int = 5000):
+        self.path = path
+        self.max_rows = max(1, int(max_rows))
+        d = os.path.dirname(os.path.abspath(path))
+        os.makedirs(d, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS search_cache ("
+            " key TEXT PRIMARY KEY, tool TEXT, payload TEXT NOT NULL,"
+            " expires_at REAL NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_search_cache_exp ON search_cache(expires_at)")
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self.get_entry(key)
+        return entry[0] if entry else None
+
+    def get_entry(self, key: str) -> Optional[Tuple[Dict[str, Any], float]]:
+        """返回 (value, expires_at)，供上层按剩余 TTL 回填。"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, expires_at FROM search_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[1] <= now:
+                self.misses += 1
+                return None
+            self.hits += 1
+        try:
+            return json.loads(row[0]), row[1]
+        except ValueError:
+            return None
+
+    def set(self, key: str, value: Dict[str, Any], ttl: float, tool: str = "") -> None:
+        if ttl <= 0:
+            return
+        now = time.time()
+        payload = json.dumps(value, ensure_ascii=False, default=str)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO search_cache(key, tool, payload, expires_at, created_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, tool, payload, now + ttl, now),
+            )
+            self._writes += 1
+            # 每 64 次写入清理一次过期/超量行
+            if self._writes % 64 == 0:
+                self._conn.execute("DELETE FROM search_cache WHERE expires_at <= ?", (now,))
+                self._conn.execute(
+                    "DELETE FROM search_cache WHERE key IN ("
+                    " SELECT key FROM search_cache ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_rows,),
+                )
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM search_cache")
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            rows = self._conn.execute("SELECT COUNT(*) FROM search_cache").fetchone()[0]
+            return {"path": self.path, "rows": rows, "hits": self.hits, "misses": self.misses}
+
+
+class TieredSearchCache(SearchCache):
+    """内存层 + 可选磁盘层；磁盘命中后按剩余 TTL 回填内存。"""
+
+    def __init__(self, memory: MemorySearchCache, disk: Optional[SQLiteSearchCache] = None):
+        self.memory = memory
+        self.disk = disk
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        value = self.memory.get(key)
+        if value is None and self.disk is not None:
+            entry = self.disk.get_entry(key)
+            if entry is not None:
+                value, expires_at = entry
+                self.memory.set(key, value, ttl=expires_at - time.time())
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key: str, value: Dict[str, Any], ttl: float, tool: str = "") -> None:
+        self.memory.set(key, value, ttl, tool)
+        if self.disk is not None:
+            try:
+                self.disk.set(key, value, ttl, tool)
+            except sqlite3.Error as e:
+                print(f"[SearchCache] 磁盘缓存写入失败: {e!r}")
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = {"hits": self.hits, "misses": self.misses}
+        total = out["hits"] + out["misses"]
+        out["hit_rate"] = round(out["hits"] / total, 4) if total else 0.0
+        out["memory"] = self.memory.stats()
+        if self.disk is not None:
+            out["disk"] = self.disk.stats()
+        return out
+
+
+def build_search_cache_from_env() -> Optional[SearchCache]:
+    """按环境变量构建默认缓存；QE_SEARCH_CACHE=0 时返回 None。"""
+    if (os.getenv("QE_SEARCH_CACHE", "1").lower() in ("0", "false", "no", "off")):
+        return None
+    memory = MemorySearchCache(
+        max_entries=int(os.getenv("QE_SEARCH_CACHE_MAX_ENTRIES", "512")),
+        max_bytes=int(os.getenv("QE_SEARCH_CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+    )
+    disk = None
+    db_path = os.getenv("QE_SEARCH_CACHE_DB")
+    if db_path:
+        try:
+            disk = SQLiteSearchCache(db_path, max_rows=int(os.getenv("QE_SEARCH_CACHE_DB_MAX_ROWS", "5000")))
+        except (sqlite3.Error, OSError) as e:
+            print(f"[SearchCache] 磁盘缓存不可用，仅使用内存缓存: {e!r}")
+    return TieredSearchCache(memory, disk)
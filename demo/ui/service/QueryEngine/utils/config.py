@@ -29,6 +29,7 @@ class Config:
     max_content_length: int = 20000
     max_reflections: int = 2
     max_paragraphs: int = 5
+    paragraph_concurrency: int = 3
     output_dir: str = "reports"
     save_intermediate_states: bool = True
 
@@ -70,6 +71,7 @@ class Config:
                 max_content_length=int(os.getenv("SEARCH_CONTENT_MAX_LENGTH") or d.get("SEARCH_CONTENT_MAX_LENGTH", 20000)),
                 max_reflections=int(os.getenv("MAX_REFLECTIONS") or d.get("MAX_REFLECTIONS", 2)),
                 max_paragraphs=int(os.getenv("MAX_PARAGRAPHS") or d.get("MAX_PARAGRAPHS", 5)),
+                paragraph_concurrency=int(os.getenv("QE_PARAGRAPH_CONCURRENCY") or d.get("QE_PARAGRAPH_CONCURRENCY", 3)),
                 output_dir=os.getenv("OUTPUT_DIR") or d.get("OUTPUT_DIR", "reports"),
                 save_intermediate_states=(os.getenv("SAVE_INTERMEDIATE_STATES") or str(d.get("SAVE_INTERMEDIATE_STATES", "true"))).lower()=="true",
             )
@@ -120,6 +122,7 @@ def print_config(config: Config):
     print(f"最大内容长度: {config.max_content_length}")
     print(f"最大反思次数: {config.max_reflections}")
     print(f"最大段落数: {config.max_paragraphs}")
+    print(f"段落并发度: {config.paragraph_concurrency}")
     print(f"输出目录: {config.output_dir}")
     print(f"保存中间状态: {config.save_intermediate_states}")
     print(f"Zhipu API Key: {'已设置' if config.zhipu_api_key else '未设置'}")
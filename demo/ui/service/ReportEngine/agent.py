@@ -26,78 +26,12 @@ except Exception:
 from .nodes import TemplateSelectionNode, HTMLGenerationNode
 from .state import ReportState
 from .utils.config import load_config, Config
+# QueryEngine 每次保存后写入的「最近一次产物」清单
+from ..utils.path_utils import LATEST_ARTIFACTS_FILE as QUERY_LATEST_ARTIFACTS_FILE
 
 
-class FileCountBaseline:
-    """文件数量基准管理器（保留，但不再作为生成条件的唯一依据）"""
-
-    def __init__(self):
-        self.baseline_file = 'logs/report_baseline.json'
-        self.baseline_data = self._load_baseline()
-
-    def _load_baseline(self) -> Dict[str, int]:
-        try:
-            if os.path.exists(self.baseline_file):
-                with open(self.baseline_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-        except Exception as e:
-            print(f"加载基准数据失败: {e}")
-        return {}
-
-    def _save_baseline(self) -> None:
-        try:
-            os.makedirs(os.path.dirname(self.baseline_file), exist_ok=True)
-            with open(self.baseline_file, 'w', encoding='utf-8') as f:
-                json.dump(self.baseline_data, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            print(f"保存基准数据失败: {e}")
-
-    def initialize_baseline(self, directories: Dict[str, str]) -> Dict[str, int]:
-        current_counts = {}
-        for engine, directory in directories.items():
-            if os.path.exists(directory):
-                # query 目录：既统计 md 也统计 json（draft/state）
-                if engine == "query":
-                    files = [f for f in os.listdir(directory) if f.endswith('.md') or f.endswith('.json')]
-                else:
-                    files = [f for f in os.listdir(directory) if f.endswith('.md')]
-                current_counts[engine] = len(files)
-            else:
-                current_counts[engine] = 0
-        self.baseline_data = current_counts.copy()
-        self._save_baseline()
-        print(f"文件数量基准已初始化: {current_counts}")
-        return current_counts
-
-    def check_new_files(self, directories: Dict[str, str]) -> Dict[str, Any]:
-        current_counts: Dict[str, int] = {}
-        new_files_found: Dict[str, int] = {}
-        all_have_new = True
-
-        for engine, directory in directories.items():
-            if os.path.exists(directory):
-                if engine == "query":
-                    files = [f for f in os.listdir(directory) if f.endswith('.md') or f.endswith('.json')]
-                else:
-                    files = [f for f in os.listdir(directory) if f.endswith('.md')]
-                current_counts[engine] = len(files)
-                baseline_count = self.baseline_data.get(engine, 0)
-                if current_counts[engine] > baseline_count:
-                    new_files_found[engine] = current_counts[engine] - baseline_count
-                else:
-                    new_files_found[engine] = 0
-            else:
-                current_counts[engine] = 0
-                new_files_found[engine] = 0
-                all_have_new = False  # 目录都没就绪
-
-        return {
-            'ready': all_have_new,
-            'baseline_counts': self.baseline_data,
-            'current_counts': current_counts,
-            'new_files_found': new_files_found,
-            'missing_engines': [e for e, cnt in new_files_found.items() if cnt == 0],
-        }
+class QueryFileLocator:
+    """定位上游 QueryEngine 最新的 draft/state 产物"""
 
     def _latest_by_pattern(self, directory: str, prefix: str, suffix: str) -> Optional[str]:
         if not os.path.exists(directory):
@@ -110,12 +44,31 @@ class FileCountBaseline:
             return None
         return max(candidates, key=lambda p: os.path.getmtime(p))
 
+    def _read_latest_manifest(self, query_dir: str) -> Dict[str, Optional[str]]:
+        path = os.path.join(query_dir, QUERY_LATEST_ARTIFACTS_FILE)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        out: Dict[str, Optional[str]] = {}
+        for key, field_name in (("draft", "draft_path"), ("state", "state_path")):
+            p = data.get(field_name) if isinstance(data, dict) else None
+            out[key] = p if p and os.path.exists(p) else None
+        return out
+
     def get_latest_query_files(self, query_dir: str) -> Dict[str, Optional[str]]:
-        """返回 query_dir 下最新的 draft/state 文件路径"""
-        return {
-            "draft": self._latest_by_pattern(query_dir, "draft_", ".md"),
-            "state": self._latest_by_pattern(query_dir, "state_", ".json"),
-        }
+        """
+        返回 query_dir 下最新的 draft/state 文件路径：
+        优先读 QueryEngine 写出的产物清单（O(1)），清单缺失或文件已不存在时才扫描目录
+        """
+        latest = self._read_latest_manifest(query_dir)
+        if not latest.get("draft") and not latest.get("state"):
+            latest = {
+                "draft": self._latest_by_pattern(query_dir, "draft_", ".md"),
+                "state": self._latest_by_pattern(query_dir, "state_", ".json"),
+            }
+        return latest
 
 
 class ReportAgent:
@@ -125,9 +78,8 @@ class ReportAgent:
         self.config: Config = config or load_config()
         self._setup_logging()
 
-        # 文件基线（仅用于提示，不再卡流程）
-        self.file_baseline = FileCountBaseline()
-        self._initialize_file_baseline()
+        # 上游 QueryEngine 产物定位（产物清单优先，缺失时才扫描 query 目录）
+        self.query_files = QueryFileLocator()
 
         # LLM
         self.llm_client: BaseLLM = self._initialize_llm()
@@ -173,15 +125,7 @@ class ReportAgent:
         self.logger.addHandler(ch)
         self.logger.propagate = False
 
-    # ---------------- 基线 & LLM & 节点 ----------------
-    def _initialize_file_baseline(self) -> None:
-        directories = {
-            'insight': self.config.insight_dir,
-            'media': self.config.media_dir,
-            'query': self.config.query_dir,
-        }
-        self.file_baseline.initialize_baseline(directories)
-
+    # ---------------- LLM & 节点 ----------------
     def _initialize_llm(self) -> BaseLLM:
         provider = (os.getenv("REPORT_LLM_PROVIDER")
                     or getattr(self.config, "default_llm_provider", "")
@@ -333,7 +277,7 @@ class ReportAgent:
         if state_path and os.path.exists(state_path):
             file_paths["query_state"] = state_path
         if not file_paths:
-            latest = self.file_baseline.get_latest_query_files(qdir)
+            latest = self.query_files.get_latest_query_files(qdir)
             if latest.get("draft"):
                 file_paths["query_draft"] = latest["draft"]  # type: ignore
             if latest.get("state"):
@@ -464,7 +408,7 @@ class ReportAgent:
 
         # 若 query_report 为空，尝试在 query_dir 直接找最新的 draft/state
         if not query_report:
-            latest = self.file_baseline.get_latest_query_files(self.config.query_dir)
+            latest = self.query_files.get_latest_query_files(self.config.query_dir)
             if latest.get("draft") and os.path.exists(latest["draft"]):  # type: ignore
                 try:
                     draft_text = open(latest["draft"], "r", encoding="utf-8").read()  # type: ignore
@@ -585,21 +529,14 @@ class ReportAgent:
         self.logger.info(f"状态已保存到 {filepath}")
 
     def check_input_files(self, insight_dir: str, media_dir: str, query_dir: str, forum_log_path: str) -> Dict[str, Any]:
-        # 仍做一次基于基线的检查（用于日志提示）
-        directories = {'insight': insight_dir, 'media': media_dir, 'query': query_dir}
-        check_result = self.file_baseline.check_new_files(directories)
-
         # 关键：只要 query_dir 有 draft 或 state，就认为“可生成”
-        latest_query = self.file_baseline.get_latest_query_files(query_dir)
+        latest_query = self.query_files.get_latest_query_files(query_dir)
         has_draft = bool(latest_query.get("draft"))
         has_state = bool(latest_query.get("state"))
         forum_ready = os.path.exists(forum_log_path)
 
         result = {
             'ready': (has_draft or has_state),  # <- 只要 draft/state 任一存在就 ready
-            'baseline_counts': check_result['baseline_counts'],
-            'current_counts': check_result['current_counts'],
-            'new_files_found': check_result['new_files_found'],
             'missing_files': [],
             'files_found': [],
             'latest_files': {},
@@ -40,7 +40,7 @@ from fastapi.responses import FileResponse
 from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, Optional, Union, List
+from typing import Dict, Any, Optional, Union, List, Tuple
 
 from fastapi import APIRouter, Body
 from fastapi.responses import JSONResponse, Response
@@ -171,6 +171,19 @@ def _normpath(p: Optional[str]) -> str:
         return p or ""
 
 
+def _query_paths_from_payload(payload: Dict[str, Any]) -> Tuple[Optional[str], Optional[str]]:
+    """
+    从 payload 取上游 QueryEngine 产物路径 (draft, state)：
+    显式 draft_path/state_path（及旧别名）优先，其次 QueryEngine 返回的 artifacts 清单。
+    """
+    artifacts = payload.get("artifacts") or {}
+    if not isinstance(artifacts, dict):
+        artifacts = {}
+    draft = payload.get("draft_path") or payload.get("query_engine_draft") or artifacts.get("draft_path") or None
+    state = payload.get("state_path") or payload.get("query_engine_state") or artifacts.get("state_path") or None
+    return draft, state
+
+
 def _safe_get_report_title(agent: ReportAgent) -> str:
     """尽量从 Agent 拿到最后一次标题（如果没有也不要抛错）"""
     for attr in ("last_report_title", "report_title", "last_title"):
@@ -289,6 +302,7 @@ async def run_report_sync(
             "query": "（可选标题/主题）",
             "draft_path": "reports/draft_xxx.md",
             "state_path": "reports/state_xxx.json",
+            "artifacts": {...},            # 或直接传 run_query_sync 返回的产物清单
             "forum_path": "logs/forum.log",
             "custom_template": "",
             "save_html": True,
@@ -318,17 +332,15 @@ async def run_report_sync(
         if isinstance(query, dict):
             payload = dict(query)
             mode = (payload.get("mode") or "").lower().strip()
-            # 若未显式给 mode，但提供了 draft/state 路径，也按 files 处理
-            if (not mode) and (payload.get("draft_path") or payload.get("query_engine_draft")
-                               or payload.get("state_path") or payload.get("query_engine_state")):
+            draft_path, state_path = _query_paths_from_payload(payload)
+            # 若未显式给 mode，但提供了 draft/state 路径（或产物清单），也按 files 处理
+            if (not mode) and (draft_path or state_path):
                 mode = "files"
 
             # ====== A) HTML 路线（保持原有产线） ======
             if output_format == "html":
                 if mode == "files":
                     qtext = payload.get("query")  # 可为空，让 Agent 自行从 state 推断
-                    draft_path = payload.get("draft_path") or payload.get("query_engine_draft")
-                    state_path = payload.get("state_path") or payload.get("query_engine_state")
                     forum_path = payload.get("forum_path") or payload.get("forum_log_path")
                     ctpl = payload.get("custom_template") or custom_template
                     save_html = payload.get("save_html")
@@ -416,8 +428,7 @@ async def run_report_sync(
 
             if mode == "files":
                 # 结构化自 state/draft 合并
-                draft = payload.get("draft_path") or payload.get("query_engine_draft")
-                state = payload.get("state_path") or payload.get("query_engine_state")
+                draft, state = draft_path, state_path
                 meta = {
                     "title": payload.get("title") or payload.get("query") or "研究报告",
                     "subtitle": payload.get("subtitle"),
@@ -1,5 +1,6 @@
 import json
 
+from collections.abc import AsyncIterator
 from typing import Any
 
 import httpx
@@ -89,3 +90,32 @@ class ConversationClient:
 
     async def list_agents(self, payload: ListAgentRequest) -> ListAgentResponse:
         return ListAgentResponse(**await self._send_request(payload))
+
+    async def stream_updates(
+        self, conversation_id: str = '', read_timeout: float = 60.0
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Yield change notifications pushed over /updates/stream (SSE).
+
+        The server sends a keepalive every 15s, so read_timeout only fires
+        when the connection is actually dead.
+        """
+        params = {'conversation_id': conversation_id} if conversation_id else {}
+        timeout = httpx.Timeout(read_timeout, connect=5.0)
+        async with httpx.AsyncClient(timeout=timeout) as client:
+            async with client.stream(
+                'GET', self.base_url + '/updates/stream', params=params
+            ) as response:
+                response.raise_for_status()
+                kind = 'message'
+                async for line in response.aiter_lines():
+                    if line.startswith('event:'):
+                        kind = line[len('event:') :].strip()
+                    elif line.startswith('data:'):
+                        try:
+                            data = json.loads(line[len('data:') :].strip())
+                        except json.JSONDecodeError:
+                            continue
+                        data.setdefault('kind', kind)
+                        yield data
+                    elif not line:
+                        kind = 'message'
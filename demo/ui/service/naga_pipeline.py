@@ -59,6 +59,8 @@ class NagaState:
     qe_summary: str | None = None
     qe_draft_path: str | None = None
     qe_state_path: str | None = None
+    # exact files written by this QE run (state/draft/output paths), handed to RE as-is
+    qe_artifacts: Dict[str, Any] | None = None
     re_template: str | None = None
     re_report_path: str | None = None
     # final reply
@@ -127,6 +129,7 @@ async def query_engine_node(state: NagaState) -> NagaState:
 
         result = res.get("result") or {}
         state.qe_summary = result.get("report_md") or "[QE done] (no summary returned)"
+        state.qe_artifacts = result.get("artifacts")
         state.qe_draft_path = result.get("draft_path")
         state.qe_state_path = result.get("state_path")
     except Exception as e:  # pragma: no cover
@@ -197,6 +200,7 @@ async def report_engine_node(state: NagaState) -> NagaState:
         "query": state.user_input,
         "draft_path": state.qe_draft_path,
         "state_path": state.qe_state_path,
+        "artifacts": state.qe_artifacts,
         "custom_template": template,
         "output_format": out_fmt,
         "save_html": (out_fmt == "html"),
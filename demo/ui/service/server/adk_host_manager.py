@@ -38,6 +38,7 @@ from hosts.multiagent.remote_agent_connection import (
 from utils.agent_card import get_agent_card
 
 from service.server.application_manager import ApplicationManager
+from service.server.event_log import EventLog
 from service.types import Conversation, Event
 
 
@@ -55,11 +56,21 @@ class ADKHostManager(ApplicationManager):
         api_key: str = '',
         uses_vertex_ai: bool = False,
     ):
-        self._conversations: list[Conversation] = []
+        # Stores are keyed by id so lookups stay O(1) on long-running hosts;
+        # dicts keep insertion order, which the list APIs below rely on.
+        self._conversations: dict[str, Conversation] = {}
         self._messages: list[Message] = []
-        self._tasks: list[Task] = []
-        self._events: dict[str, Event] = {}
-        self._pending_message_ids: list[str] = []
+        # Map of message id to its position in _messages
+        self._message_index: dict[str, int] = {}
+        self._tasks: dict[str, Task] = {}
+        # Bounded per conversation; supports cursor reads for incremental polls
+        self._events = EventLog(on_append=self._on_event)
+        # Ordered set of message ids that are still being processed
+        self._pending_message_ids: dict[str, None] = {}
+        # Map of task id to (history list, indexed length, message ids)
+        self._task_history_ids: dict[
+            str, tuple[list[Message], int, set[str]]
+        ] = {}
         self._agents: list[AgentCard] = []
         self._artifact_chunks: dict[str, list[Artifact]] = {}
         self._session_service = InMemorySessionService()
@@ -109,7 +120,7 @@ class ADKHostManager(ApplicationManager):
         )
         conversation_id = session.id
         c = Conversation(conversation_id=conversation_id, is_active=True)
-        self._conversations.append(c)
+        self._conversations[conversation_id] = c
         return c
 
     def update_api_key(self, api_key: str):
@@ -134,24 +145,20 @@ class ADKHostManager(ApplicationManager):
             # Check if the last event in the conversation was tied to a task.
             if conversation.messages:
                 task_id = conversation.messages[-1].taskId
-                if task_id and task_still_open(
-                    next(
-                        filter(lambda x: x and x.id == task_id, self._tasks),
-                        None,
-                    )
-                ):
+                if task_id and task_still_open(self._tasks.get(task_id)):
                     message.taskId = task_id
         return message
 
     async def process_message(self, message: Message):
         message_id = message.messageId
         if message_id:
-            self._pending_message_ids.append(message_id)
+            self._pending_message_ids[message_id] = None
         context_id = message.contextId
         conversation = self.get_conversation(context_id)
-        self._messages.append(message)
+        self.add_message(message)
         if conversation:
             conversation.messages.append(message)
+            self.notify('message', context_id, message_id=message_id)
         self.add_event(
             Event(
                 id=str(uuid.uuid4()),
@@ -214,23 +221,49 @@ class ADKHostManager(ApplicationManager):
             response = await self.adk_content_to_message(
                 final_event.content, context_id, task_id
             )
-            self._messages.append(response)
+            self.add_message(response)
 
         if conversation and response:
             conversation.messages.append(response)
-        self._pending_message_ids.remove(message_id)
+            self.notify('message', context_id, message_id=response.messageId)
+        self._pending_message_ids.pop(message_id, None)
+        self.notify('pending', context_id, message_id=message_id, done=True)
+
+    def add_message(self, message: Message):
+        if message.messageId:
+            self._message_index[message.messageId] = len(self._messages)
+        self._messages.append(message)
+
+    def get_message(self, message_id: str | None) -> Message | None:
+        if not message_id or message_id not in self._message_index:
+            return None
+        return self._messages[self._message_index[message_id]]
+
+    def get_task(self, task_id: str | None) -> Task | None:
+        if not task_id:
+            return None
+        return self._tasks.get(task_id)
 
     def add_task(self, task: Task):
-        self._tasks.append(task)
+        if self._tasks.get(task.id) is not task:
+            self._task_history_ids.pop(task.id, None)
+        self._tasks[task.id] = task
 
     def update_task(self, task: Task):
-        for i, t in enumerate(self._tasks):
-            if t.id == task.id:
-                self._tasks[i] = task
-                return
+        current = self._tasks.get(task.id)
+        if current is None:
+            return
+        if current is not task:
+            self._task_history_ids.pop(task.id, None)
+        self._tasks[task.id] = task
 
     def task_callback(self, task: TaskCallbackArg, agent_card: AgentCard):
         self.emit_event(task, agent_card)
+        self.notify(
+            'task',
+            task.contextId,
+            task_id=task.id if isinstance(task, Task) else task.taskId,
+        )
         if isinstance(task, TaskStatusUpdateEvent):
             current_task = self.add_or_get_task(task)
             current_task.status = task.status
@@ -244,7 +277,7 @@ class ADKHostManager(ApplicationManager):
             self.update_task(current_task)
             return current_task
         # Otherwise this is a Task, either new or updated
-        if not any(filter(lambda x: x and x.id == task.id, self._tasks)):
+        if task.id not in self._tasks:
             self.attach_message_to_task(task.status.message, task.id)
             self.add_task(task)
             return task
@@ -320,7 +353,7 @@ class ADKHostManager(ApplicationManager):
         if task.history and (
             task.status.message
             and task.status.message.messageId
-            not in [x.messageId for x in task.history]
+            not in self._history_message_ids(task)
         ):
             task.history.append(task.status.message)
         elif not task.history and task.status.message:
@@ -332,6 +365,24 @@ class ADKHostManager(ApplicationManager):
                 task.history,
             )
 
+    def _history_message_ids(self, task: Task) -> set[str]:
+        """Message ids in task.history, maintained incrementally.
+
+        Tasks can be replaced wholesale by callbacks, so the cached set is
+        keyed on the identity and length of the history list and only the
+        new tail is indexed when it grows.
+        """
+        history = task.history or []
+        cached = self._task_history_ids.get(task.id)
+        if cached and cached[0] is history and cached[1] <= len(history):
+            _, seen, ids = cached
+        else:
+            seen, ids = 0, set()
+        for m in history[seen:]:
+            ids.add(m.messageId)
+        self._task_history_ids[task.id] = (history, len(history), ids)
+        return ids
+
     def add_or_get_task(self, event: TaskCallbackArg):
         task_id = None
         if isinstance(event, Message):
@@ -342,9 +393,7 @@ class ADKHostManager(ApplicationManager):
             task_id = event.taskId
         if not task_id:
             task_id = str(uuid.uuid4())
-        current_task = next(
-            filter(lambda x: x.id == task_id, self._tasks), None
-        )
+        current_task = self._tasks.get(task_id)
         if not current_task:
             context_id = event.contextId
             current_task = Task(
@@ -394,29 +443,65 @@ class ADKHostManager(ApplicationManager):
                 del self._artifact_chunks[artifact.artifactId][-1]
 
     def add_event(self, event: Event):
-        self._events[event.id] = event
+        self._events.append(event)
 
     def get_conversation(
         self, conversation_id: str | None
     ) -> Conversation | None:
         if not conversation_id:
             return None
-        return next(
-            filter(
-                lambda c: c and c.conversation_id == conversation_id,
-                self._conversations,
-            ),
-            None,
+        return self._conversations.get(conversation_id)
+
+    def delete_conversation(self, conversation_id: str) -> bool:
+        """Drops a conversation along with its messages, tasks and events."""
+        conversation = self._conversations.pop(conversation_id, None)
+        if conversation is None:
+            return False
+        message_ids = {m.messageId for m in conversation.messages}
+        message_ids.update(
+            m.messageId
+            for m in self._messages
+            if m.contextId == conversation_id
         )
+        message_ids.discard(None)
+        task_ids = {
+            task_id
+            for task_id, task in self._tasks.items()
+            if task.contextId == conversation_id
+        }
+
+        # Positions shift once messages are removed, so rebuild the index
+        self._messages[:] = [
+            m for m in self._messages if m.messageId not in message_ids
+        ]
+        self._message_index = {
+            m.messageId: i for i, m in enumerate(self._messages) if m.messageId
+        }
+        for task_id in task_ids:
+            del self._tasks[task_id]
+            self._task_history_ids.pop(task_id, None)
+        self._task_map = {
+            message_id: task_id
+            for message_id, task_id in self._task_map.items()
+            if message_id not in message_ids and task_id not in task_ids
+        }
+        for message_id in message_ids:
+            self._pending_message_ids.pop(message_id, None)
+            self._next_id.pop(message_id, None)
+        self._context_to_conversation = {
+            context_id: cid
+            for context_id, cid in self._context_to_conversation.items()
+            if cid != conversation_id
+        }
+        self._events.drop_conversation(conversation_id)
+        return True
 
     def get_pending_messages(self) -> list[tuple[str, str]]:
         rval = []
         for message_id in self._pending_message_ids:
             if message_id in self._task_map:
                 task_id = self._task_map[message_id]
-                task = next(
-                    filter(lambda x: x.id == task_id, self._tasks), None
-                )
+                task = self._tasks.get(task_id)
                 if not task:
                     rval.append((message_id, ''))
                 elif task.history and task.history[-1].parts:
@@ -451,15 +536,27 @@ class ADKHostManager(ApplicationManager):
 
     @property
     def conversations(self) -> list[Conversation]:
-        return self._conversations
+        return list(self._conversations.values())
+
+    @property
+    def messages(self) -> list[Message]:
+        return self._messages
 
     @property
     def tasks(self) -> list[Task]:
-        return self._tasks
+        return list(self._tasks.values())
 
     @property
     def events(self) -> list[Event]:
-        return sorted(self._events.values(), key=lambda x: x.timestamp)
+        return self._events.all()
+
+    def events_since(
+        self,
+        since: int = 0,
+        conversation_id: str | None = None,
+        limit: int | None = None,
+    ) -> tuple[list[Event], int]:
+        return self._events.since(since, conversation_id, limit)
 
     def adk_content_from_message(self, message: Message) -> types.Content:
         parts: list[types.Part] = []
@@ -6,6 +6,21 @@ from service.types import Conversation, Event
 
 
 class ApplicationManager(ABC):
+    # Set by ConversationServer; receives change notifications for SSE push
+    update_hub = None
+
+    def notify(self, kind: str, conversation_id: str | None = None, **data):
+        """Publish a lightweight change notification (ids only, no content)."""
+        if self.update_hub is not None:
+            self.update_hub.publish(kind, conversation_id, **data)
+
+    def _on_event(self, event: Event):
+        self.notify(
+            'event',
+            event.content.contextId if event.content else None,
+            seq=event.seq,
+        )
+
     @abstractmethod
     def create_conversation(self) -> Conversation:
         pass
@@ -26,6 +41,10 @@ class ApplicationManager(ABC):
     def get_pending_messages(self) -> list[tuple[str, str]]:
         pass
 
+    def delete_conversation(self, conversation_id: str) -> bool:
+        """Remove a conversation; returns False when it is unknown."""
+        return False
+
     @abstractmethod
     def get_conversation(
         self, conversation_id: str | None
@@ -51,3 +70,28 @@ class ApplicationManager(ABC):
     @abstractmethod
     def events(self) -> list[Event]:
         pass
+
+    def events_since(
+        self,
+        since: int = 0,
+        conversation_id: str | None = None,
+        limit: int | None = None,
+    ) -> tuple[list[Event], int]:
+        """Events after cursor `since` and the cursor to resume from.
+
+        Managers backed by an EventLog override this; the fallback treats
+        list positions as sequence numbers.
+        """
+        events = self.events
+        if since > len(events):
+            since = 0
+        rows = [
+            (i, e)
+            for i, e in enumerate(events[since:], start=since + 1)
+            if conversation_id is None
+            or (e.content.contextId or '') == conversation_id
+        ]
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            return [e for _, e in rows], rows[-1][0] if rows else since
+        return [e for _, e in rows], len(events)
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+event_log.py —— 会话事件日志（游标增量读取 + 按会话限量保留）
+- 每条事件分配全局递增序号 seq（写回 Event.seq），客户端用上次拿到的 next_cursor 增量拉取
+- 每个会话最多保留 A2A_EVENT_RETENTION 条（默认 1000），旧事件丢弃，长会话内存与轮询开销不再无限增长
+- 增量查询只遍历 seq 之后有新活动的会话：会话按最近活动排序，从最新往回扫，遇到无新事件的会话即停
+"""
+from __future__ import annotations
+
+import bisect
+import heapq
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Iterable, Optional
+
+from service.types import Event
+
+DEFAULT_RETENTION = int(os.getenv("A2A_EVENT_RETENTION", "1000"))
+
+
+def event_conversation_id(event: Event) -> str:
+    content = event.content
+    return (content.contextId if content is not None else "") or ""
+
+
+class _ConversationEvents:
+    __slots__ = ("seqs", "events")
+
+    def __init__(self):
+        self.seqs: list[int] = []
+        self.events: list[Event] = []
+
+
+class EventLog:
+    """线程安全：ADK 回调线程与 FastAPI 事件循环都会写入。"""
+
+    def __init__(self, retention: int | None = None,
+                 on_append: Optional[Callable[[Event], None]] = None):
+        self.retention = max(1, retention if retention is not None else DEFAULT_RETENTION)
+        # 写入后回调（锁外调用），用于推送变更通知
+        self.on_append = on_append
+        self._lock = threading.Lock()
+        self._seq = 0
+        # conversation_id -> 事件；按最近一次写入排序（最新在末尾）
+        self._by_conversation: "OrderedDict[str, _ConversationEvents]" = OrderedDict()
+        self._dropped = 0
+
+    @property
+    def head(self) -> int:
+        """最新一条事件的序号（没有事件时为 0）。"""
+        return self._seq
+
+    def append(self, event: Event) -> int:
+        seq = self._append(event)
+        if self.on_append is not None:
+            try:
+                self.on_append(event)
+            except Exception:
+                pass
+        return seq
+
+    def _append(self, event: Event) -> int:
+        with self._lock:
+            self._seq += 1
+            event.seq = self._seq
+            cid = event_conversation_id(event)
+            bucket = self._by_conversation.get(cid)
+            if bucket is None:
+                bucket = self._by_conversation[cid] = _ConversationEvents()
+            else:
+                self._by_conversation.move_to_end(cid)
+            bucket.seqs.append(self._seq)
+            bucket.events.append(event)
+            # 超出保留上限一半再整体裁剪，摊还 O(1)
+            overflow = len(bucket.events) - self.retention
+            if overflow > self.retention // 2:
+                del bucket.seqs[:overflow]
+                del bucket.events[:overflow]
+                self._dropped += overflow
+            return self._seq
+
+    def extend(self, events: Iterable[Event]) -> None:
+        for e in events:
+            self.append(e)
+
+    def _window(self, bucket: _ConversationEvents, since: int) -> list[tuple[int, Event]]:
+        # 只暴露保留窗口内的事件（裁剪是惰性的，这里截到 retention 条）
+        lo = max(bisect.bisect_right(bucket.seqs, since), len(bucket.seqs) - self.retention)
+        return list(zip(bucket.seqs[lo:], bucket.events[lo:]))
+
+    def since(self, since: int = 0, conversation_id: str | None = None,
+              limit: int | None = None) -> tuple[list[Event], int]:
+        """
+        返回 (seq > since 的事件（按 seq 升序）, next_cursor)。
+        since 大于当前 head（服务端重启过）时视为 0，客户端据 next_cursor < 自己的游标判断需要重置。
+        limit 截断时 next_cursor 为最后一条返回事件的 seq，客户端继续拉即可。
+        """
+        with self._lock:
+            if since > self._seq:
+                since = 0
+            if conversation_id is not None:
+                bucket = self._by_conversation.get(conversation_id)
+                rows = self._window(bucket, since) if bucket else []
+            else:
+                runs = []
+                for bucket in reversed(self._by_conversation.values()):
+                    if not bucket.seqs or bucket.seqs[-1] <= since:
+                        break
+                    runs.append(self._window(bucket, since))
+                rows = list(heapq.merge(*runs, key=lambda r: r[0]))
+            head = self._seq
+        if limit is not None and limit >= 0 and len(rows) > limit:
+            rows = rows[:limit]
+            return [e for _, e in rows], (rows[-1][0] if rows else since)
+        return [e for _, e in rows], head
+
+    def drop_conversation(self, conversation_id: str) -> int:
+        """删除某会话的全部事件，返回删除条数（序号不回退，游标仍有效）。"""
+        with self._lock:
+            bucket = self._by_conversation.pop(conversation_id, None)
+            return len(bucket.events) if bucket else 0
+
+    def all(self) -> list[Event]:
+        return self.since(0)[0]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(min(len(b.events), self.retention) for b in self._by_conversation.values())
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "head": self._seq,
+                "conversations": len(self._by_conversation),
+                "dropped": self._dropped,
+                "retention": self.retention,
+            }
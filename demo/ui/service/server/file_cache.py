@@ -0,0 +1,316 @@
+# -*- coding: utf-8 -*-
+"""
+file_cache.py —— ConversationServer 的消息文件缓存
+- 入缓存时 base64 只解码一次，之后下载直接给字节
+- 两级 LRU，按字节计量：内存（A2A_FILE_CACHE_BYTES，默认 64MB）放小文件与热文件；
+  大于 A2A_FILE_CACHE_SPILL_BYTES（默认 1MB）的直接落到本地临时目录，
+  内存层挤出的条目也下沉到磁盘；磁盘层超过 A2A_FILE_CACHE_DISK_BYTES（默认 1GB）再按 LRU 删除
+- 每个条目记录所属会话，会话删除时一并清理
+- ETag = 内容 sha1；支持单段 Range（bytes=a-b / a- / -n）与分块流式读取
+"""
+from __future__ import annotations
+
+import base64
+import binascii
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+MAX_MEMORY_BYTES = int(os.getenv("A2A_FILE_CACHE_BYTES", str(64 * 1024 * 1024)))
+SPILL_BYTES = int(os.getenv("A2A_FILE_CACHE_SPILL_BYTES", str(1024 * 1024)))
+MAX_DISK_BYTES = int(os.getenv("A2A_FILE_CACHE_DISK_BYTES", str(1024 * 1024 * 1024)))
+STREAM_CHUNK = 64 * 1024
+
+
+@dataclass
+class CachedFile:
+    cache_id: str
+    mime_type: str
+    size: int
+    etag: str
+    conversation_id: str = ""
+    data: Optional[bytes] = None     # 内存层
+    path: Optional[str] = None       # 磁盘层
+
+    def iter_range(self, start: int, end: int, chunk: int = STREAM_CHUNK) -> Iterator[bytes]:
+        """
+        按块产出 [start, end] 闭区间的字节。
+        数据源在调用时立即取得（内存字节 / 已打开的文件句柄），之后条目被下沉或淘汰删除都不影响本次读取；
+        磁盘文件已不存在时抛 FileNotFoundError。
+        """
+        if self.data is not None:
+            return _iter_bytes(self.data, start, end, chunk)
+        f = open(self.path, "rb")  # type: ignore[arg-type]
+        return _iter_file(f, start, end, chunk)
+
+
+def _iter_bytes(data: bytes, start: int, end: int, chunk: int) -> Iterator[bytes]:
+    view = memoryview(data)
+    for off in range(start, end + 1, chunk):
+        yield bytes(view[off:min(off + chunk, end + 1)])
+
+
+def _iter_file(f, start: int, end: int, chunk: int) -> Iterator[bytes]:
+    with f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            buf = f.read(min(chunk, remaining))
+            if not buf:
+                break
+            remaining -= len(buf)
+            yield buf
+
+
+def decode_file_bytes(raw: str | bytes | None) -> bytes:
+    """A2A FileWithBytes.bytes 为 base64 文本；不是合法 base64 时按原文 UTF-8 返回。"""
+    if raw is None:
+        return b""
+    if isinstance(raw, bytes):
+        raw = raw.decode("ascii", errors="ignore")
+    try:
+        return base64.b64decode(raw, validate=True)
+    except (binascii.Error, ValueError):
+        return raw.encode("utf-8")
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[tuple[int, int]]:
+    """
+    解析单段 Range 头，返回闭区间 (start, end)。
+    无 Range / 多段 / 非 bytes 单位 / 语法无效返回 None（按 RFC 9110 忽略该头，整文件响应）；
+    语法正确但不可满足抛 ValueError（416）。
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    spec = header[len("bytes="):].strip()
+    start_s, sep, end_s = spec.partition("-")
+    start_s, end_s = start_s.strip(), end_s.strip()
+    if not sep or (start_s and not start_s.isdigit()) or (end_s and not end_s.isdigit()):
+        return None
+    if not start_s:
+        if not end_s:
+            return None
+        n = int(end_s)
+        if n == 0:
+            raise ValueError("unsatisfiable range")
+        return max(0, size - n), size - 1
+    start = int(start_s)
+    end = int(end_s) if end_s else size - 1
+    if start > end:
+        return None  # last-pos < first-pos：语法无效
+    if start >= size:
+        raise ValueError("unsatisfiable range")
+    return start, min(end, size - 1)
+
+
+class FileCache:
+    def __init__(self, max_memory_bytes: int = MAX_MEMORY_BYTES,
+                 spill_bytes: int = SPILL_BYTES,
+                 max_disk_bytes: int = MAX_DISK_BYTES,
+                 spill_dir: Optional[str] = None):
+        self.max_memory_bytes = max(0, max_memory_bytes)
+        self.spill_bytes = max(0, spill_bytes)
+        self.max_disk_bytes = max(0, max_disk_bytes)
+        self._spill_dir = spill_dir
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, CachedFile]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_bytes = 0
+        # "messageId:partIndex" -> cache_id，以及反向索引（条目淘汰时一并删除）
+        self._part_to_id: dict[str, str] = {}
+        self._id_to_parts: dict[str, set[str]] = {}
+        self._by_conversation: dict[str, set[str]] = {}
+        # 已选中、正在锁外写盘的内存条目
+        self._spilling: set[str] = set()
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+    # ---------- 写入 ----------
+    def cache_id_for(self, part_key: str) -> Optional[str]:
+        with self._lock:
+            return self._part_to_id.get(part_key)
+
+    def put(self, part_key: str, raw: str | bytes | None, mime_type: str,
+            conversation_id: str = "") -> str:
+        """缓存一个文件 part，返回 cache_id（同一 part 重复调用返回已有 id）。"""
+        with self._lock:
+            existing = self._part_to_id.get(part_key)
+            if existing and existing in self._entries:
+                self._entries.move_to_end(existing)
+                return existing
+        data = decode_file_bytes(raw)
+        entry = CachedFile(
+            cache_id=str(uuid.uuid4()),
+            mime_type=mime_type or "application/octet-stream",
+            size=len(data),
+            etag='"%s"' % hashlib.sha1(data).hexdigest(),
+            conversation_id=conversation_id or "",
+        )
+        spill = len(data) > self.spill_bytes
+        if spill:
+            entry.path = self._write_spill(entry.cache_id, data)
+        else:
+            entry.data = data
+        with self._lock:
+            self._entries[entry.cache_id] = entry
+            if spill:
+                self._disk_bytes += entry.size
+            else:
+                self._memory_bytes += entry.size
+            self._part_to_id[part_key] = entry.cache_id
+            self._id_to_parts.setdefault(entry.cache_id, set()).add(part_key)
+            if entry.conversation_id:
+                self._by_conversation.setdefault(entry.conversation_id, set()).add(entry.cache_id)
+            to_spill = self._enforce_locked()
+        self._spill(to_spill)
+        return entry.cache_id
+
+    def _spill_root(self) -> str:
+        if self._spill_dir is None:
+            self._spill_dir = tempfile.mkdtemp(prefix="a2a-file-cache-")
+        os.makedirs(self._spill_dir, exist_ok=True)
+        return self._spill_dir
+
+    def _write_spill(self, cache_id: str, data: bytes) -> str:
+        path = os.path.join(self._spill_root(), cache_id)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    # ---------- 读取 ----------
+    def get(self, cache_id: str) -> Optional[CachedFile]:
+        with self._lock:
+            entry = self._entries.get(cache_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(cache_id)
+            self.hits += 1
+            return entry
+
+    def open_range(self, entry: CachedFile, start: int, end: int) -> Optional[Iterator[bytes]]:
+        """
+        在缓存锁内取得条目的数据源，返回分块迭代器；条目已被淘汰 / 文件已删除时返回 None。
+        响应开始前调用，避免流式读取途中文件被 LRU 删除。
+        """
+        with self._lock:
+            if self._entries.get(entry.cache_id) is not entry:
+                return None
+            try:
+                return entry.iter_range(start, end)
+            except FileNotFoundError:
+                return None
+
+    # ---------- 淘汰 ----------
+    def _enforce_locked(self) -> list[CachedFile]:
+        """
+        磁盘层超限按 LRU 删除；内存层超限时从最久未用开始挑出要下沉到磁盘的条目并返回，
+        由调用方在锁外写盘（_spill），大文件落盘不阻塞并发的 get / open_range。
+        """
+        if self._disk_bytes > self.max_disk_bytes:
+            for entry in list(self._entries.values()):
+                if self._disk_bytes <= self.max_disk_bytes:
+                    break
+                if entry.path is not None:
+                    self._remove_locked(entry.cache_id)
+                    self.evicted += 1
+        to_spill: list[CachedFile] = []
+        excess = self._memory_bytes - self.max_memory_bytes - sum(
+            self._entries[cid].size for cid in self._spilling if cid in self._entries
+        )
+        for entry in self._entries.values():
+            if excess <= 0:
+                break
+            if entry.data is None or entry.cache_id in self._spilling:
+                continue
+            self._spilling.add(entry.cache_id)
+            to_spill.append(entry)
+            excess -= entry.size
+        return to_spill
+
+    def _spill(self, entries: list[CachedFile]):
+        """锁外写盘，写完再在锁内切换到磁盘层；写盘期间条目仍从内存读取。"""
+        for entry in entries:
+            try:
+                path = self._write_spill(entry.cache_id, entry.data)  # type: ignore[arg-type]
+            except OSError:
+                with self._lock:
+                    self._spilling.discard(entry.cache_id)
+                continue
+            with self._lock:
+                self._spilling.discard(entry.cache_id)
+                if self._entries.get(entry.cache_id) is not entry:
+                    # 写盘期间已被删除（会话删除等）：文件作废
+                    stale = True
+                else:
+                    stale = False
+                    entry.path = path
+                    entry.data = None
+                    self._memory_bytes -= entry.size
+                    self._disk_bytes += entry.size
+                    more = self._enforce_locked()
+            if stale:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            else:
+                # 落盘后磁盘层可能超限，且并发写入期间内存层可能又涨了
+                entries.extend(more)
+
+    def _remove_locked(self, cache_id: str):
+        entry = self._entries.pop(cache_id, None)
+        if entry is None:
+            return
+        if entry.data is not None:
+            self._memory_bytes -= entry.size
+        if entry.path is not None:
+            self._disk_bytes -= entry.size
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+        for key in self._id_to_parts.pop(cache_id, ()):
+            if self._part_to_id.get(key) == cache_id:
+                del self._part_to_id[key]
+        ids = self._by_conversation.get(entry.conversation_id)
+        if ids is not None:
+            ids.discard(cache_id)
+            if not ids:
+                del self._by_conversation[entry.conversation_id]
+
+    def drop_conversation(self, conversation_id: str) -> int:
+        with self._lock:
+            ids = list(self._by_conversation.get(conversation_id, ()))
+            for cid in ids:
+                self._remove_locked(cid)
+            return len(ids)
+
+    def clear(self):
+        with self._lock:
+            for cid in list(self._entries):
+                self._remove_locked(cid)
+        if self._spill_dir is not None:
+            shutil.rmtree(self._spill_dir, ignore_errors=True)
+
+    def __contains__(self, cache_id: str) -> bool:
+        with self._lock:
+            return cache_id in self._entries
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "memory_bytes": self._memory_bytes,
+                "disk_bytes": self._disk_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evicted": self.evicted,
+            }
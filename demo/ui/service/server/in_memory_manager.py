@@ -18,6 +18,7 @@ from utils.agent_card import get_agent_card
 
 from service.server import test_image
 from service.server.application_manager import ApplicationManager
+from service.server.event_log import EventLog
 from service.types import Conversation, Event
 
 
@@ -32,7 +33,7 @@ class InMemoryFakeAgentManager(ApplicationManager):
     _conversations: list[Conversation]
     _messages: list[Message]
     _tasks: list[Task]
-    _events: list[Event]
+    _events: EventLog
     _pending_message_ids: list[str]
     _next_message_idx: int
     _agents: list[AgentCard]
@@ -41,7 +42,7 @@ class InMemoryFakeAgentManager(ApplicationManager):
         self._conversations = []
         self._messages = []
         self._tasks = []
-        self._events = []
+        self._events = EventLog(on_append=self._on_event)
         self._pending_message_ids = []
         self._next_message_idx = 0
         self._agents = []
@@ -118,6 +119,7 @@ class InMemoryFakeAgentManager(ApplicationManager):
             )
         )
         self._pending_message_ids.remove(message_id)
+        self.notify('pending', context_id, message_id=message_id, done=True)
         # Now clean up the task
         if task:
             task.status.state = TaskState.completed
@@ -153,6 +155,13 @@ class InMemoryFakeAgentManager(ApplicationManager):
         )
         return message
 
+    def delete_conversation(self, conversation_id: str) -> bool:
+        conversation = self.get_conversation(conversation_id)
+        if not conversation:
+            return False
+        self._conversations.remove(conversation)
+        return True
+
     def get_conversation(
         self, conversation_id: str | None
     ) -> Conversation | None:
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+message_dispatcher.py —— ConversationServer 的消息处理队列
+- 在服务端自己的事件循环上用固定数量的 worker 协程执行 manager.process_message，
+  不再每条消息起一个线程 + 一个新事件循环
+- 同一会话严格按到达顺序处理：每个会话一条 lane（双端队列），同一时刻最多一个 worker 在处理它；
+  不同会话之间并行，处理完一条把 lane 放回就绪队列末尾（会话间轮转，长会话不饿死别人）
+- 背压：排队中的消息总数达到上限时 submit 抛 DispatcherBusy（HTTP 429）
+- 指标：排队深度、在途数、排队等待与处理耗时（平均 / p95 / 最大）
+- 环境变量：A2A_MESSAGE_WORKERS（默认 4）/ A2A_MESSAGE_QUEUE_SIZE（默认 64）
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+MAX_WORKERS = int(os.getenv("A2A_MESSAGE_WORKERS", "4"))
+MAX_QUEUE = int(os.getenv("A2A_MESSAGE_QUEUE_SIZE", "64"))
+_LATENCY_WINDOW = 500
+
+
+class DispatcherBusy(RuntimeError):
+    """排队中的消息已达上限。"""
+
+    status_code = 429
+
+
+def _summary(samples: Deque[float]) -> Dict[str, float]:
+    if not samples:
+        return {"avg_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return {
+        "avg_ms": round(sum(ordered) / len(ordered) * 1000, 2),
+        "p95_ms": round(p95 * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2),
+    }
+
+
+class MessageDispatcher:
+    def __init__(self, handler: Callable[[Any], Awaitable[Any]],
+                 max_workers: Optional[int] = None, max_queue: Optional[int] = None):
+        self._handler = handler
+        self.max_workers = max(1, max_workers if max_workers is not None else MAX_WORKERS)
+        self.max_queue = max(1, max_queue if max_queue is not None else MAX_QUEUE)
+        # conversation_id -> [(message, enqueued_at)]；在就绪队列里或正被处理的 lane 记为 active
+        self._lanes: Dict[str, Deque[Tuple[Any, float]]] = {}
+        self._active: set[str] = set()
+        self._ready: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._workers: list[asyncio.Task] = []
+        self._queued = 0
+        self._in_flight = 0
+        self._processed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._wait_s: Deque[float] = deque(maxlen=_LATENCY_WINDOW)
+        self._process_s: Deque[float] = deque(maxlen=_LATENCY_WINDOW)
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._workers:
+            return
+        self._loop = loop
+        self._ready = asyncio.Queue()
+        # 之前若在别的循环上启动过（测试 / 重载），把未处理的 lane 重新挂到新队列上
+        self._active = set()
+        for cid, lane in self._lanes.items():
+            if lane:
+                self._active.add(cid)
+                self._ready.put_nowait(cid)
+        self._workers = [loop.create_task(self._worker(i)) for i in range(self.max_workers)]
+
+    def submit(self, conversation_id: str, message: Any) -> int:
+        """入队（需在服务端事件循环中调用）；返回当前排队深度。队列满时抛 DispatcherBusy。"""
+        self._ensure_started()
+        if self._queued >= self.max_queue:
+            self._rejected += 1
+            raise DispatcherBusy(
+                f"message queue full: {self._queued} queued, {self._in_flight} in flight "
+                f"(max_queue={self.max_queue}, workers={self.max_workers})"
+            )
+        cid = conversation_id or ""
+        self._lanes.setdefault(cid, deque()).append((message, time.monotonic()))
+        self._queued += 1
+        if cid not in self._active:
+            self._active.add(cid)
+            self._ready.put_nowait(cid)
+        return self._queued
+
+    async def _worker(self, idx: int):
+        while True:
+            cid = await self._ready.get()
+            lane = self._lanes.get(cid)
+            if not lane:
+                self._active.discard(cid)
+                self._lanes.pop(cid, None)
+                continue
+            message, enqueued_at = lane.popleft()
+            self._queued -= 1
+            self._in_flight += 1
+            started = time.monotonic()
+            self._wait_s.append(started - enqueued_at)
+            try:
+                await self._handler(message)
+                self._processed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._failed += 1
+                print(f"[dispatcher] process_message failed (conversation={cid}): {e}")
+            finally:
+                self._process_s.append(time.monotonic() - started)
+                self._in_flight -= 1
+                # 还有后续消息：排到就绪队列末尾，保证本会话顺序且与其它会话轮转
+                if lane:
+                    self._ready.put_nowait(cid)
+                else:
+                    self._active.discard(cid)
+                    self._lanes.pop(cid, None)
+
+    async def aclose(self):
+        for t in self._workers:
+            t.cancel()
+        for t in self._workers:
+            try:
+                await t
+            except (asyncio.CancelledError, Exception):
+                pass
+        self._workers = []
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "queued": self._queued,
+            "in_flight": self._in_flight,
+            "conversations_waiting": sum(1 for lane in self._lanes.values() if lane),
+            "processed": self._processed,
+            "failed": self._failed,
+            "rejected": self._rejected,
+            "queue_wait": _summary(self._wait_s),
+            "processing": _summary(self._process_s),
+        }
@@ -8,6 +8,7 @@ from typing import Optional, List, Any, Tuple
 
 from a2a.types import AgentCard, Artifact, Message, Part, Role, Task, TaskState, TaskStatus, TextPart
 from service.server.application_manager import ApplicationManager
+from service.server.event_log import EventLog
 from service.types import Conversation, Event
 
 # 优先使用我们新的 /api/chat 轻量适配器；没有就回退到原仓库的 NagaConversation
@@ -83,7 +84,7 @@ class NagaManager(ApplicationManager):
         self._conversations: list[Conversation] = []
         self._messages: list[Message] = []
         self._tasks: list[Task] = []
-        self._events: list[Event] = []
+        self._events = EventLog(on_append=self._on_event)  # 按会话限量保留，支持游标增量读取；写入即推送
         self._pending_message_ids: list[str] = []
         # ✅ 修复：task 映射应该是 dict，不是 list
         self._task_map: dict[str, str] = {}
@@ -134,6 +135,7 @@ class NagaManager(ApplicationManager):
         conv = self.get_conversation(message.contextId)
         if conv:
             conv.messages.append(message)
+            self.notify("message", message.contextId, message_id=message.messageId)
         self._events.append(
             Event(id=str(uuid.uuid4()), actor="user", content=message, timestamp=datetime.datetime.utcnow().timestamp())
         )
@@ -204,6 +206,7 @@ class NagaManager(ApplicationManager):
         self._messages.append(reply)
         if conv:
             conv.messages.append(reply)
+            self.notify("message", message.contextId, message_id=reply.messageId)
 
         # 更新事件 & 任务状态
         self._events.append(
@@ -215,6 +218,8 @@ class NagaManager(ApplicationManager):
 
         if message.messageId in self._pending_message_ids:
             self._pending_message_ids.remove(message.messageId)
+        self.notify("task", message.contextId, task_id=task_id)
+        self.notify("pending", message.contextId, message_id=message.messageId, done=True)
 
     # ---- 其它管理接口 -----------------------------------------------------
 
@@ -229,6 +234,13 @@ class NagaManager(ApplicationManager):
         # 在 _task_map（dict）中存在即视为“正在处理”
         return [(mid, "Working..." if mid in self._task_map else "") for mid in self._pending_message_ids]
 
+    def delete_conversation(self, conversation_id: str) -> bool:
+        conv = self.get_conversation(conversation_id)
+        if conv is None:
+            return False
+        self._conversations.remove(conv)
+        return True
+
     def get_conversation(self, conversation_id: Optional[str]) -> Optional[Conversation]:
         if not conversation_id:
             return None
@@ -248,7 +260,11 @@ class NagaManager(ApplicationManager):
 
     @property
     def events(self) -> list[Event]:
-        return self._events
+        return self._events.all()
+
+    def events_since(self, since: int = 0, conversation_id: Optional[str] = None,
+                     limit: Optional[int] = None) -> tuple[list[Event], int]:
+        return self._events.since(since, conversation_id, limit)
 
     @property
     def agents(self) -> list[AgentCard]:
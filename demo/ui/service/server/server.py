@@ -1,20 +1,21 @@
 # service/server/server.py —— NAGA/ADK/内存 后端统一路由 + 直达MCP通道（自适应 execute_tool_calls 签名 & 修复 role=agent）
 import asyncio
-import base64
 import inspect
 import os
-import threading
 import uuid
 from typing import Callable, List
 
 import httpx
 from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 
 # ---- A2A & 本项目类型 ----
 from a2a.types import FilePart, FileWithUri, Message, Part, TextPart
 from service.types import (
     CreateConversationResponse,
+    DeleteConversationResponse,
     GetEventResponse,
+    JSONRPCError,
     ListAgentResponse,
     ListConversationResponse,
     ListMessageResponse,
@@ -24,11 +25,19 @@ from service.types import (
     RegisterAgentResponse,
     SendMessageResponse,
 )
+from service.utils.llm_pool import reset_all_profiles as reset_llm_profiles
 from .application_manager import ApplicationManager
+from .file_cache import FileCache, parse_range
 from .in_memory_manager import InMemoryFakeAgentManager
+from .message_dispatcher import DispatcherBusy, MessageDispatcher
+from .update_hub import UpdateHub
 
 # ---- MCP 直达通道所需 ----
 from mcpserver.tool_call_utils import parse_tool_calls, execute_tool_calls  # 可能是老/新版本
+try:
+    from mcpserver.tool_call_utils import aexecute_tool_calls  # 原生异步并发版
+except ImportError:
+    aexecute_tool_calls = None
 from mcpserver import mcp_manager as mcp_manager_module
 
 try:
@@ -81,22 +90,31 @@ class ConversationServer:
         else:
             print("[server] Using InMemoryFakeAgentManager backend")
 
-        # 文件缓存：将消息里的 FilePart 转换为可下载 URI
-        self._file_cache: dict[str, FilePart] = {}
-        self._message_to_cache: dict[str, str] = {}
+        # 变更推送：管理器在消息/任务/事件变化时发通知，/updates/stream 以 SSE 推给浏览器
+        self.hub = UpdateHub()
+        self.manager.update_hub = self.hub
+
+        # 常规消息处理：服务端事件循环上的有界队列 + 固定 worker，同会话按序
+        self.dispatcher = MessageDispatcher(self.manager.process_message)
+
+        # 文件缓存：将消息里的 FilePart 转换为可下载 URI（按字节限量的 LRU，大文件落盘）
+        self._file_cache = FileCache()
 
         # 路由注册
         app.add_api_route("/conversation/create", self._create_conversation, methods=["POST"])
         app.add_api_route("/conversation/list", self._list_conversation, methods=["POST"])
+        app.add_api_route("/conversation/delete", self._delete_conversation, methods=["POST"])
         app.add_api_route("/message/send", self._send_message, methods=["POST"])
         app.add_api_route("/events/get", self._get_events, methods=["POST"])
         app.add_api_route("/message/list", self._list_messages, methods=["POST"])
         app.add_api_route("/message/pending", self._pending_messages, methods=["POST"])
+        app.add_api_route("/message/queue", self._message_queue_stats, methods=["GET"])
         app.add_api_route("/task/list", self._list_tasks, methods=["POST"])
         app.add_api_route("/agent/register", self._register_agent, methods=["POST"])
         app.add_api_route("/agent/list", self._list_agents, methods=["POST"])
         app.add_api_route("/message/file/{file_id}", self._files, methods=["GET"])
         app.add_api_route("/api_key/update", self._update_api_key, methods=["POST"])
+        app.add_api_route("/updates/stream", self._updates_stream, methods=["GET"])
 
     # ---------- 会话 ----------
     async def _create_conversation(self):
@@ -107,6 +125,16 @@ class ConversationServer:
     async def _list_conversation(self):
         return ListConversationResponse(result=self.manager.conversations)
 
+    async def _delete_conversation(self, request: Request):
+        """params 为会话 id；删除会话并清理它的文件缓存。"""
+        data = await request.json()
+        conversation_id = data.get("params") or ""
+        deleted = bool(conversation_id) and self.manager.delete_conversation(conversation_id)
+        dropped = self._file_cache.drop_conversation(conversation_id) if conversation_id else 0
+        if deleted:
+            self.manager.notify("conversation", conversation_id, deleted=True)
+        return DeleteConversationResponse(result={"deleted": deleted, "files_dropped": dropped})
+
     # ---------- 工具：从 Message 中尽力抽出纯文本 ----------
     def _extract_plain_text(self, msg: Message) -> str:
         txt = getattr(msg, "text", None)
@@ -133,7 +161,10 @@ class ConversationServer:
         - 新版: async def execute_tool_calls(tool_calls, mcp_manager) -> str
         - 老版: async def execute_tool_calls(tool_calls) -> str
         - 以及可能的同步定义
+        - 有 aexecute_tool_calls 时直接在当前循环并发执行
         """
+        if aexecute_tool_calls is not None:
+            return await aexecute_tool_calls(tool_calls)
         try:
             sig = inspect.signature(execute_tool_calls)
             params = list(sig.parameters.values())
@@ -198,6 +229,7 @@ class ConversationServer:
                     if not getattr(message, "messageId", None):
                         message.messageId = f"m-{uuid.uuid4()}"
                     conv.messages.append(message)
+                    self.manager.notify("message", conv_id, message_id=message.messageId)
             except Exception as e:
                 print(f"[server] WARN: append user message failed in MCP-direct path: {e}")
 
@@ -221,6 +253,7 @@ class ConversationServer:
                         parts=[Part(root=TextPart(text=text_out))],
                     )
                     conv.messages.append(agent_msg)
+                    self.manager.notify("message", conv_id, message_id=agent_msg.messageId)
             except Exception as e:
                 print(f"[server] WARN: append agent message failed in MCP-direct path: {e}")
 
@@ -233,12 +266,15 @@ class ConversationServer:
             )
 
         # ===== 常规路径：交给后台管线（ADK/NAGA/InMemory）去处理 =====
-        loop = asyncio.get_event_loop()
-        if hasattr(self.manager, "process_message_threadsafe"):
-            t = threading.Thread(target=lambda: getattr(self.manager, "process_message_threadsafe")(message, loop))
-        else:
-            t = threading.Thread(target=lambda: asyncio.run(self.manager.process_message(message)))
-        t.start()
+        try:
+            self.dispatcher.submit(message.contextId or "", message)
+        except DispatcherBusy as e:
+            return JSONResponse(
+                status_code=DispatcherBusy.status_code,
+                content=SendMessageResponse(
+                    id=payload.get("id"), error=JSONRPCError(code=-32000, message=str(e))
+                ).model_dump(mode="json", exclude_none=True),
+            )
 
         return SendMessageResponse(
             result=MessageInfo(
@@ -247,17 +283,63 @@ class ConversationServer:
             )
         )
 
+    @staticmethod
+    def _int_param(params: dict, key: str, default: int | None) -> int | None:
+        try:
+            v = params.get(key)
+            return default if v is None else max(0, int(v))
+        except (TypeError, ValueError):
+            return default
+
     async def _list_messages(self, request: Request):
+        """params 为会话 id（全量，兼容旧客户端）或 {conversation_id, since, limit}（增量）。"""
         data = await request.json()
-        conversation_id = data["params"]
+        params = data.get("params")
+        if isinstance(params, dict):
+            conversation_id = params.get("conversation_id")
+            since = self._int_param(params, "since", 0)
+            limit = self._int_param(params, "limit", None)
+        else:
+            conversation_id, since, limit = params, 0, None
         conversation = self.manager.get_conversation(conversation_id)
-        if conversation:
-            return ListMessageResponse(result=self._cache_content(conversation.messages))
-        return ListMessageResponse(result=[])
+        if not conversation:
+            return ListMessageResponse(result=[], next_cursor=0)
+        messages = conversation.messages
+        total = len(messages)
+        # 游标超过总数：服务端重启过，返回全量，客户端据 next_cursor 重置
+        if since > total:
+            since = 0
+        end = total if limit is None else min(total, since + limit)
+        return ListMessageResponse(result=self._cache_content(messages[since:end]), next_cursor=end)
 
     # ---------- 事件 / 任务 / Agent ----------
     async def _get_events(self, request: Request):
-        return GetEventResponse(result=self.manager.events)
+        """params 可选 {since, conversation_id, limit}：只返回游标之后的事件。"""
+        params = {}
+        try:
+            data = await request.json()
+            params = data.get("params") or {}
+        except Exception:
+            pass
+        if not isinstance(params, dict):
+            params = {}
+        events, cursor = self.manager.events_since(
+            self._int_param(params, "since", 0),
+            params.get("conversation_id"),
+            self._int_param(params, "limit", None),
+        )
+        return GetEventResponse(result=events, next_cursor=cursor)
+
+    async def _updates_stream(self, conversation_id: str = ""):
+        """SSE：推送 message / task / event / pending 变更通知（可按会话过滤），UI 收到后按游标拉增量。"""
+        return StreamingResponse(
+            self.hub.stream(conversation_id or None),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    async def _message_queue_stats(self):
+        return self.dispatcher.stats()
 
     async def _pending_messages(self):
         return PendingMessageResponse(result=self.manager.get_pending_messages())
@@ -276,6 +358,10 @@ class ConversationServer:
 
     # ---------- 文件 ----------
     def _cache_content(self, messages: list[Message]):
+        """
+        返回给客户端的消息副本：内联字节的文件换成 /message/file/<cache_id>。
+        会话里存的原消息保持不动（仍带字节），缓存条目被淘汰后下次列举会从原 part 重新入缓存。
+        """
         rval: list[Message] = []
         for m in messages:
             mid = self._get_message_id(m)
@@ -283,16 +369,17 @@ class ConversationServer:
                 m.messageId = mid
 
             new_parts: list[Part] = []
+            replaced = False
             for i, p in enumerate(m.parts):
                 part = p.root
-                if getattr(part, "kind", "") != "file":
+                # 只有内联字节的文件需要缓存；已是 URI 的原样保留
+                if getattr(part, "kind", "") != "file" or getattr(part.file, "bytes", None) is None:
                     new_parts.append(p)
                     continue
 
-                message_part_id = f"{mid}:{i}"
-                cache_id = self._message_to_cache.get(message_part_id) or str(uuid.uuid4())
-                self._message_to_cache[message_part_id] = cache_id
-
+                cache_id = self._file_cache.put(
+                    f"{m.messageId or mid}:{i}", part.file.bytes, part.file.mimeType or "", m.contextId or ""
+                )
                 new_parts.append(
                     Part(
                         root=FilePart(
@@ -303,26 +390,55 @@ class ConversationServer:
                         )
                     )
                 )
-                if cache_id not in self._file_cache:
-                    self._file_cache[cache_id] = part
+                replaced = True
 
-            m.parts = new_parts
-            rval.append(m)
+            rval.append(m.model_copy(update={"parts": new_parts}) if replaced else m)
         return rval
 
-    def _files(self, file_id: str):
-        if file_id not in self._file_cache:
-            raise Exception("file not found")
-        part = self._file_cache[file_id]
-        if "image" in part.file.mimeType:
-            return Response(content=base64.b64decode(part.file.bytes), media_type=part.file.mimeType)
-        return Response(content=part.file.bytes, media_type=part.file.mimeType)
+    def _files(self, file_id: str, request: Request):
+        """支持 ETag（If-None-Match → 304）与单段 Range（206 / 416），内容分块流式返回。"""
+        entry = self._file_cache.get(file_id)
+        if entry is None:
+            return Response(status_code=404, content="file not found")
+        headers = {
+            "ETag": entry.etag,
+            "Accept-Ranges": "bytes",
+            "Cache-Control": "private, max-age=3600",
+        }
+        if_none_match = request.headers.get("if-none-match", "")
+        if entry.etag in [t.strip() for t in if_none_match.split(",")] or if_none_match.strip() == "*":
+            return Response(status_code=304, headers=headers)
+
+        status = 200
+        start, end = 0, entry.size - 1
+        if_range = request.headers.get("if-range")
+        if entry.size and (not if_range or if_range.strip() == entry.etag):
+            try:
+                rng = parse_range(request.headers.get("range"), entry.size)
+            except ValueError:
+                headers["Content-Range"] = f"bytes */{entry.size}"
+                return Response(status_code=416, headers=headers)
+            if rng is not None:
+                start, end = rng
+                status = 206
+                headers["Content-Range"] = f"bytes {start}-{end}/{entry.size}"
+        headers["Content-Length"] = str(max(0, end - start + 1))
+        if entry.size == 0:
+            return Response(content=b"", status_code=status, headers=headers, media_type=entry.mime_type)
+        # 返回响应前就打开数据源：流式途中条目被淘汰也能读完
+        body = self._file_cache.open_range(entry, start, end)
+        if body is None:
+            return Response(status_code=404, content="file not found")
+        return StreamingResponse(body, status_code=status, headers=headers, media_type=entry.mime_type)
 
     # ---------- 仅 ADK：在线改 key（其它后端忽略） ----------
     async def _update_api_key(self, request: Request):
         try:
             data = await request.json()
             api_key = data.get("api_key", "")
+            if api_key:
+                # 主链路 LLM 池按进程缓存了凭据：换 key 后让它重新解析
+                reset_llm_profiles()
             if api_key and hasattr(self.manager, "update_api_key"):
                 getattr(self.manager, "update_api_key")(api_key)
                 return {"status": "success"}
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+update_hub.py —— ConversationServer 的变更推送（SSE）
+- 管理器在消息 / 任务 / 事件 / pending 变化时 publish 一条轻量通知（只带 id 与游标，不带正文）
+- 每个 SSE 连接一个订阅队列，可按会话过滤；publish 线程安全（ADK 回调可能来自其它线程/事件循环）
+- 客户端收到通知后用 /events/get、/message/list 的游标接口拉增量；连接断开再退回轮询
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import time
+from typing import Any, AsyncIterator, Optional
+
+SUBSCRIBER_QUEUE_SIZE = 256
+HEARTBEAT_S = 15.0
+
+
+class _Subscriber:
+    __slots__ = ("loop", "queue", "conversation_id", "dropped")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, conversation_id: Optional[str]):
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.conversation_id = conversation_id
+        self.dropped = 0
+
+    def offer(self, item: dict) -> None:
+        # 在订阅者自己的事件循环里执行；队列满时丢最旧的一条（通知只是"有变化"，丢了也能靠游标补齐）
+        if self.queue.full():
+            try:
+                self.queue.get_nowait()
+                self.dropped += 1
+            except asyncio.QueueEmpty:
+                pass
+        self.queue.put_nowait(item)
+
+
+class UpdateHub:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: set[_Subscriber] = set()
+        self.published = 0
+
+    def publish(self, kind: str, conversation_id: Optional[str] = None, **data: Any) -> None:
+        item = {"kind": kind, "conversation_id": conversation_id or "", "ts": time.time(), **data}
+        with self._lock:
+            self.published += 1
+            targets = [s for s in self._subscribers
+                       if not s.conversation_id or not conversation_id or s.conversation_id == conversation_id]
+        for sub in targets:
+            try:
+                sub.loop.call_soon_threadsafe(sub.offer, item)
+            except RuntimeError:
+                # 订阅者的事件循环已关闭
+                self._discard(sub)
+
+    def _discard(self, sub: _Subscriber) -> None:
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    @property
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+    async def stream(self, conversation_id: Optional[str] = None,
+                     heartbeat_s: float = HEARTBEAT_S) -> AsyncIterator[str]:
+        """SSE 文本流：先发 ready，之后每条变更一帧；空闲时发注释心跳保活。"""
+        sub = _Subscriber(asyncio.get_running_loop(), conversation_id)
+        with self._lock:
+            self._subscribers.add(sub)
+        try:
+            yield _sse("ready", {"conversation_id": conversation_id or ""})
+            while True:
+                try:
+                    item = await asyncio.wait_for(sub.queue.get(), timeout=heartbeat_s)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield _sse(item["kind"], item)
+        finally:
+            self._discard(sub)
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
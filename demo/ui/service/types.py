@@ -44,6 +44,8 @@ class Event(BaseModel):
     # TODO: Extend to support internal concepts for models, like function calls.
     content: Message
     timestamp: float
+    # Monotonic sequence number assigned by the server's event log
+    seq: int = 0
 
 
 class SendMessageRequest(JSONRPCRequest):
@@ -51,14 +53,23 @@ class SendMessageRequest(JSONRPCRequest):
     params: Message
 
 
+class MessageQuery(BaseModel):
+    conversation_id: str
+    # Number of messages the client already has; only later ones are returned
+    since: int = 0
+    limit: int | None = None
+
+
 class ListMessageRequest(JSONRPCRequest):
     method: Literal['message/list'] = 'message/list'
-    # This is the conversation id
-    params: str
+    # Either the conversation id (full list) or a cursor query
+    params: str | MessageQuery
 
 
 class ListMessageResponse(JSONRPCResponse):
     result: list[Message] | None = None
+    # Pass back as `since` to fetch only newer messages
+    next_cursor: int | None = None
 
 
 class MessageInfo(BaseModel):
@@ -70,12 +81,22 @@ class SendMessageResponse(JSONRPCResponse):
     result: Message | MessageInfo | None = None
 
 
+class EventQuery(BaseModel):
+    # Last `next_cursor` the client saw; 0 returns everything retained
+    since: int = 0
+    conversation_id: str | None = None
+    limit: int | None = None
+
+
 class GetEventRequest(JSONRPCRequest):
     method: Literal['events/get'] = 'events/get'
+    params: EventQuery | None = None
 
 
 class GetEventResponse(JSONRPCResponse):
     result: list[Event] | None = None
+    # Pass back as `since`; smaller than the client's cursor after a restart
+    next_cursor: int | None = None
 
 
 class ListConversationRequest(JSONRPCRequest):
@@ -102,6 +123,17 @@ class CreateConversationResponse(JSONRPCResponse):
     result: Conversation | None = None
 
 
+class DeleteConversationRequest(JSONRPCRequest):
+    method: Literal['conversation/delete'] = 'conversation/delete'
+    # This is the conversation id
+    params: str
+
+
+class DeleteConversationResponse(JSONRPCResponse):
+    # {'deleted': bool, 'files_dropped': int}
+    result: dict[str, Any] | None = None
+
+
 class ListTaskRequest(JSONRPCRequest):
     method: Literal['task/list'] = 'task/list'
 
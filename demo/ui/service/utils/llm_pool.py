@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+"""
+LLM Client Pool（主链路异步 LLM 客户端池）
+- 作用：按 profile/provider 复用 AsyncOpenAI 客户端（底层 httpx 连接池 + keep-alive），避免每次请求重建 TLS 连接
+- 限流：每个 provider 一个并发信号量（NAGA_PROVIDER_CONCURRENCY），慢 provider 不会拖住整个进程
+- 退避：asyncio.sleep 指数退避，遵循 NAGA_MAX_RETRIES / NAGA_BACKOFF_BASE，不阻塞事件循环
+- 凭据：首次解析后缓存；运行时换 key 后调用 reset_all_profiles()（/api_key/update 已接入）重新解析
+- 放置路径：service/utils/llm_pool.py
+"""
+
+import asyncio
+import os
+import random
+import threading
+import weakref
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import httpx
+    from openai import AsyncOpenAI
+except Exception:  # 允许在未安装依赖的环境中先导入
+    httpx = None  # type: ignore
+    AsyncOpenAI = None  # type: ignore
+
+
+RETRIABLE_STATUS = (429, 500, 502, 503, 504)
+
+# 进程内所有客户端池，供 reset_all_profiles() 统一失效凭据
+_POOLS: "weakref.WeakSet[AsyncLLMClientPool]" = weakref.WeakSet()
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+def is_retriable_error(e: BaseException) -> bool:
+    name = e.__class__.__name__
+    text = str(e) or ""
+    status = getattr(e, "status_code", None) or getattr(e, "status", None)
+    return (
+        status in RETRIABLE_STATUS
+        or ("RateLimit" in name)
+        or ("Timeout" in name)
+        or ("429" in text)
+        or ("当前API请求过多" in text)
+    )
+
+
+class AsyncLLMClientPool:
+    """
+    进程级异步 LLM 客户端注册表。
+
+    - 客户端按 (事件循环, provider, base_url, api_key) 缓存：httpx.AsyncClient 的连接绑定在创建它的事件循环上，
+      Mesop / FastAPI / 后台线程各自的 loop 拿到各自的连接池；loop 被回收或关闭后对应条目随之丢弃
+    - 并发信号量按 (事件循环, provider) 缓存，同一 provider 的在途请求数不超过 max_concurrency
+    """
+
+    def __init__(
+        self,
+        resolve_creds: Callable[[], Tuple[str, str, str, str]],
+        *,
+        timeout: Optional[float] = None,
+        max_retries: Optional[int] = None,
+        backoff_base: Optional[float] = None,
+        max_concurrency: Optional[int] = None,
+        max_connections: Optional[int] = None,
+    ):
+        self._resolve_creds = resolve_creds
+        self.timeout = timeout if timeout is not None else _env_float("NAGA_REQ_TIMEOUT", 60.0)
+        self.max_retries = max_retries if max_retries is not None else _env_int("NAGA_MAX_RETRIES", 4)
+        self.backoff_base = backoff_base if backoff_base is not None else _env_float("NAGA_BACKOFF_BASE", 1.0)
+        self.max_concurrency = max(1, max_concurrency if max_concurrency is not None
+                                   else _env_int("NAGA_PROVIDER_CONCURRENCY", 8))
+        self.max_connections = max(1, max_connections if max_connections is not None
+                                   else _env_int("NAGA_POOL_MAX_CONNECTIONS", 32))
+
+        self._lock = threading.Lock()
+        # loop -> {(provider, base_url, api_key): client}；弱引用键，loop 回收后自动释放
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple, Any]]" = \
+            weakref.WeakKeyDictionary()
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = \
+            weakref.WeakKeyDictionary()
+        self._profiles: Dict[str, Tuple[str, str, str, str]] = {}
+        # reset_profiles() 投递到其它 loop 上、尚未完成的关闭任务
+        self._closing: set = set()
+        _POOLS.add(self)
+
+    # ---------- 凭据 / 客户端 ----------
+    def resolve(self, profile: str) -> Tuple[str, str, str, str]:
+        """profile -> (provider, base_url, api_key, model)，首次解析后缓存。"""
+        with self._lock:
+            creds = self._profiles.get(profile)
+        if creds is None:
+            creds = self._resolve_creds()
+            provider, base, key, model = creds
+            if not key:
+                raise RuntimeError(f"Missing API key for provider={provider}")
+            print(f"[naga-config] Provider={provider}  BaseURL={base}  Model={model}")
+            with self._lock:
+                self._profiles[profile] = creds
+        return creds
+
+    def _new_client(self, base: str, key: str):
+        if AsyncOpenAI is None or httpx is None:
+            raise RuntimeError("openai/httpx not installed")
+        limits = httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_connections,
+            keepalive_expiry=30.0,
+        )
+        http_client = httpx.AsyncClient(limits=limits, timeout=self.timeout)
+        # 重试由本模块统一负责，关闭 SDK 内置重试避免叠加
+        return AsyncOpenAI(
+            api_key=key, base_url=base, timeout=self.timeout,
+            max_retries=0, http_client=http_client,
+        )
+
+    def get_client(self, profile: str = "naga"):
+        """返回 (client, model, provider)；同一 loop 内同一 provider 复用一个客户端。"""
+        provider, base, key, model = self.resolve(profile)
+        loop = asyncio.get_running_loop()
+        ck = (provider, base, key)
+        with self._lock:
+            self._prune_closed_loops_locked()
+            clients = self._clients.setdefault(loop, {})
+            cli = clients.get(ck)
+            if cli is None:
+                cli = self._new_client(base, key)
+                clients[ck] = cli
+        return cli, model, provider
+
+    def _semaphore(self, provider: str) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            sems = self._semaphores.setdefault(loop, {})
+            sem = sems.get(provider)
+            if sem is None:
+                sem = asyncio.Semaphore(self.max_concurrency)
+                sems[provider] = sem
+        return sem
+
+    def _prune_closed_loops_locked(self) -> None:
+        # 已关闭的 loop 上的客户端无法再使用也无法 aclose，直接丢弃引用
+        for loop in [lp for lp in self._clients if lp.is_closed()]:
+            del self._clients[loop]
+        for loop in [lp for lp in self._semaphores if lp.is_closed()]:
+            del self._semaphores[loop]
+
+    # ---------- 调用 ----------
+    async def chat(
+        self,
+        messages: List[dict],
+        *,
+        profile: str = "naga",
+        temperature: float = 0.7,
+        model: Optional[str] = None,
+    ) -> str:
+        cli, default_model, provider = self.get_client(profile)
+        model = model or default_model
+        sem = self._semaphore(provider)
+        last_err: Optional[BaseException] = None
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with sem:
+                    r = await cli.chat.completions.create(
+                        model=model, messages=messages, temperature=temperature,
+                    )
+                return (r.choices[0].message.content or "").strip()
+            except Exception as e:
+                last_err = e
+                if attempt < self.max_retries and is_retriable_error(e):
+                    delay = min(8.0, self.backoff_base * (2 ** attempt)) + random.random() * 0.25
+                    status = getattr(e, "status_code", None) or getattr(e, "status", None)
+                    print(f"[LLM][retry {attempt+1}/{self.max_retries}] {e.__class__.__name__} "
+                          f"(provider={provider}, status={status}) -> sleep {delay:.2f}s")
+                    # 退避期间不占用信号量，让同 provider 的其他请求继续
+                    await asyncio.sleep(delay)
+                    continue
+                break
+        raise last_err if last_err else RuntimeError("LLM request failed without explicit error")
+
+    def reset_profiles(self) -> None:
+        """
+        凭据变更（换 key / 切换 NAGA_PROVIDER）后调用：下次请求重新解析凭据。
+        旧凭据的客户端从注册表移除，并投递到各自所属的事件循环上关闭（释放 httpx 连接池）；
+        所属 loop 已关闭的直接丢弃。
+        """
+        with self._lock:
+            self._profiles.clear()
+            dropped = [(loop, list(clients.values())) for loop, clients in self._clients.items()]
+            self._clients.clear()
+        for loop, clients in dropped:
+            if loop.is_closed() or not loop.is_running():
+                continue
+            for cli in clients:
+                fut = asyncio.run_coroutine_threadsafe(self._close_quietly(cli), loop)
+                self._closing.add(fut)
+                fut.add_done_callback(self._closing.discard)
+
+    @staticmethod
+    async def _close_quietly(cli: Any) -> None:
+        try:
+            await cli.close()
+        except Exception:
+            pass
+
+    async def aclose(self) -> None:
+        """关闭当前事件循环上创建的客户端。"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            clients = list(self._clients.pop(loop, {}).values())
+            self._semaphores.pop(loop, None)
+        for cli in clients:
+            await self._close_quietly(cli)
+
+
+def reset_all_profiles() -> None:
+    """让进程内所有客户端池丢弃缓存的凭据与客户端（运行时换 key 后调用）。"""
+    for pool in list(_POOLS):
+        pool.reset_profiles()
@@ -2,10 +2,18 @@
 from pathlib import Path
 import json
 from typing import List, Dict, Any, Optional
-from service.utils.path_utils import get_query_dir
+from service.utils.path_utils import LATEST_ARTIFACTS_FILE, get_query_dir
 
 def _pick_latest_state_file() -> Optional[Path]:
     qdir = get_query_dir()
+    try:
+        manifest = json.loads((qdir / LATEST_ARTIFACTS_FILE).read_text(encoding="utf-8"))
+        sp = Path(manifest.get("state_path") or "")
+        if manifest.get("state_path") and sp.exists():
+            return sp
+    except (OSError, ValueError, AttributeError):
+        pass
+    # 清单缺失时才退回目录扫描
     candidates = sorted(qdir.glob("state_*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
     return candidates[0] if candidates else None
 
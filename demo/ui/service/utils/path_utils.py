@@ -25,6 +25,9 @@ MEDIA_OUT_DIR = Path(os.getenv(
     str(REPORTS_ROOT / "media_engine_streamlit_reports")
 )).resolve()
 
+# QueryEngine 每次保存后在输出目录写入的「最近一次产物」清单（ReportEngine / materials_assembler 读取）
+LATEST_ARTIFACTS_FILE = "latest_artifacts.json"
+
 def ensure_dir(p: Path) -> Path:
     p.mkdir(parents=True, exist_ok=True)
     return p
@@ -1,9 +1,12 @@
 # state/host_agent_service.py —— pending + 表单识别 版本（覆盖现有文件）
 
+import contextlib
 import json
 import os
+import threading
 import traceback
 import uuid
+from collections import OrderedDict, deque
 from typing import Any, Optional, List, Tuple
 
 from a2a.types import FileWithBytes, Message, Part, Role, Task, TaskState, TextPart
@@ -12,12 +15,14 @@ from service.types import (
     Conversation,
     CreateConversationRequest,
     Event,
+    EventQuery,
     GetEventRequest,
     ListAgentRequest,
     ListConversationRequest,
     ListMessageRequest,
     ListTaskRequest,
     MessageInfo,
+    MessageQuery,
     PendingMessageRequest,
     RegisterAgentRequest,
     SendMessageRequest,
@@ -34,6 +39,19 @@ from .state import (
 
 SERVER_URL = os.getenv("A2A_UI_BASE", "http://127.0.0.1:12000").rstrip("/")
 _client = ConversationClient(SERVER_URL)
+# 服务端推送（SSE）开关；关闭后 wait_by_pending / 页面刷新都退回纯轮询
+PUSH_ENABLED = os.getenv("A2A_UI_PUSH", "true").lower() not in ("0", "false", "no")
+
+# ---------------------------
+# 增量拉取缓存：事件 / 消息只取服务端游标之后的新增部分
+# ---------------------------
+_EVENT_CACHE_MAX = int(os.getenv("A2A_UI_EVENT_CACHE", "2000"))
+_MESSAGE_CACHE_CONVERSATIONS = int(os.getenv("A2A_UI_MESSAGE_CACHE_CONVERSATIONS", "32"))
+_cache_lock = threading.Lock()
+_event_cache: "deque[Event]" = deque(maxlen=_EVENT_CACHE_MAX)
+_event_cursor = 0
+# conversation_id -> 已缓存的消息（服务端消息列表只追加，长度即游标）
+_message_cache: "OrderedDict[str, List[Message]]" = OrderedDict()
 
 # ---------------------------
 # 核心：会话 + 发送 + 等待完成
@@ -55,23 +73,46 @@ async def send_user_text(context_id: str, text: str) -> Tuple[str, str]:
     result: MessageInfo = resp.result
     return result.message_id, result.context_id
 
+async def _is_pending(message_id: str) -> bool:
+    pend = await _client.get_pending_messages(PendingMessageRequest(method="message/pending", params={}))
+    return message_id in dict(pend.result or [])
+
+async def _wait_pending_via_stream(message_id: str, context_id: str) -> None:
+    async with contextlib.aclosing(_client.stream_updates(context_id)) as updates:
+        async for upd in updates:
+            kind = upd.get("kind")
+            if kind == "ready":
+                # 订阅建立后再确认一次，避免消息在订阅前就已处理完而错过通知
+                if not await _is_pending(message_id):
+                    return
+            elif kind == "pending" and upd.get("message_id") == message_id:
+                return
+
 async def wait_by_pending(message_id: str, context_id: str, timeout_s: float = 45.0, poll_interval: float = 0.6) -> None:
-    """仅等待完成，不返回文本。文本/表单请随后用 get_last_agent_reply 拉取。"""
+    """
+    仅等待完成，不返回文本。文本/表单请随后用 get_last_agent_reply 拉取。
+    优先订阅服务端推送（/updates/stream），推送不可用时退回按 poll_interval 轮询 pending。
+    """
     import asyncio
-    elapsed = 0.0
-    while elapsed < timeout_s:
-        pend = await _client.get_pending_messages(PendingMessageRequest(method="message/pending", params={}))
-        pending_map = dict(pend.result or [])
-        if message_id not in pending_map:
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout_s
+    if PUSH_ENABLED:
+        try:
+            await asyncio.wait_for(_wait_pending_via_stream(message_id, context_id), timeout=timeout_s)
+            return
+        except asyncio.TimeoutError:
+            return
+        except Exception as e:
+            print(f"[host_agent_service] update stream unavailable, falling back to polling: {e}")
+    while loop.time() < deadline:
+        if not await _is_pending(message_id):
             return
         await asyncio.sleep(poll_interval)
-        elapsed += poll_interval
     return
 
 async def get_last_agent_reply(context_id: str) -> Tuple[str, Any]:
     """返回 ('form', form_dict) 或 ('text', text_str)；若没有则 ('none','')."""
-    lm = await _client.list_messages(ListMessageRequest(method="message/list", params=context_id))
-    msgs: List[Message] = lm.result or []
+    msgs: List[Message] = await ListMessages(context_id)
     for m in reversed(msgs):
         if m.role == Role.agent:
             # 优先识别 data/form
@@ -156,8 +197,26 @@ async def AddRemoteAgent(path: str):
     await _client.register_agent(RegisterAgentRequest(method="agent/register", params=path))
 
 async def GetEvents() -> list[Event]:
-    response = await _client.get_events(GetEventRequest(method="events/get", params={}))
-    return response.result if response.result else []
+    """返回本地缓存的事件；每次只向服务端要游标之后的新事件。"""
+    global _event_cursor
+    with _cache_lock:
+        since = _event_cursor
+    response = await _client.get_events(GetEventRequest(method="events/get", params=EventQuery(since=since)))
+    fresh = response.result or []
+    with _cache_lock:
+        if response.next_cursor is None:
+            # 旧版服务端：不支持游标，结果就是全量
+            _event_cache.clear()
+            _event_cache.extend(fresh)
+        else:
+            if response.next_cursor < _event_cursor:
+                # 服务端重启过，序号从头开始
+                _event_cache.clear()
+                _event_cursor = 0
+            # 并发拉取可能拿到重叠的增量，按 seq 去重
+            _event_cache.extend(e for e in fresh if e.seq > _event_cursor)
+            _event_cursor = max(_event_cursor, response.next_cursor)
+        return list(_event_cache)
 
 async def GetProcessingMessages():
     response = await _client.get_pending_messages(PendingMessageRequest(method="message/pending", params={}))
@@ -170,8 +229,26 @@ async def GetTasks():
     return response.result if response.result else []
 
 async def ListMessages(conversation_id: str) -> list[Message]:
-    response = await _client.list_messages(ListMessageRequest(method="message/list", params=conversation_id))
-    return response.result if response.result else []
+    """会话消息（本地缓存 + 增量拉取 since=已缓存条数）。"""
+    with _cache_lock:
+        since = len(_message_cache.get(conversation_id, []))
+    response = await _client.list_messages(ListMessageRequest(
+        method="message/list", params=MessageQuery(conversation_id=conversation_id, since=since)))
+    fresh = response.result or []
+    if response.next_cursor is None:
+        return fresh
+    with _cache_lock:
+        cached = _message_cache.pop(conversation_id, [])
+        if response.next_cursor < since:
+            # 服务端重启 / 会话被重建：返回的是全量
+            merged = list(fresh)
+        else:
+            # 其它协程可能已先一步补齐，只保留游标之前的部分再接上本次增量
+            merged = cached[:since] + fresh
+        _message_cache[conversation_id] = merged
+        while len(_message_cache) > _MESSAGE_CACHE_CONVERSATIONS:
+            _message_cache.popitem(last=False)
+        return list(merged)
 
 async def UpdateApiKey(api_key: str):
     import httpx
@@ -13,7 +13,7 @@ from .quintuple_extractor import extract_quintuples
 from .quintuple_graph import (
     store_quintuples,
     query_graph_by_keywords,
-    get_all_quintuples,
+    count_quintuples,
 )
 
 # DeepSeek RAG 组合查询
@@ -292,7 +292,7 @@ class GRAGMemoryManager:
             return {"enabled": False}
 
         try:
-            all_quintuples = get_all_quintuples()
+            total_quintuples = count_quintuples()
             try:
                 task_stats = task_manager.get_stats()
             except Exception:
@@ -300,7 +300,7 @@ class GRAGMemoryManager:
 
             return {
                 "enabled": True,
-                "total_quintuples": len(all_quintuples),
+                "total_quintuples": total_quintuples,
                 "context_length": len(self.recent_context),
                 "cache_size": len(self.extraction_cache),
                 "active_tasks": len(self.active_tasks),
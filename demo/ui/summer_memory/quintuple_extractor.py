@@ -43,6 +43,15 @@ class QuintupleResponse(BaseModel):
     quintuples: List[Quintuple]
 
 
+class BatchQuintupleItem(BaseModel):
+    index: int
+    quintuples: List[Quintuple]
+
+
+class BatchQuintupleResponse(BaseModel):
+    items: List[BatchQuintupleItem]
+
+
 async def extract_quintuples_async(text):
     """异步版本的五元组提取"""
     # 首先尝试使用结构化输出
@@ -110,6 +119,73 @@ async def _extract_quintuples_async_structured(text):
     return []
 
 
+async def extract_quintuples_batch_async(texts: List[str]) -> List[List[Tuple[str, str, str, str, str]]]:
+    """
+    微批版本：把多段文本编号后放进一次结构化请求，按编号映射回各自的五元组列表。
+    返回值与 texts 一一对应；单条文本直接走 extract_quintuples_async。
+    批量请求失败时，逐条回退到单文本提取（并发执行）；批量结果里缺失的编号同样逐条补提。
+    """
+    if not texts:
+        return []
+    if len(texts) == 1:
+        return [await extract_quintuples_async(texts[0])]
+
+    system_prompt = """
+你是一个专业的中文文本信息抽取专家。你的任务是从给定的多段中文文本中分别抽取五元组关系。
+五元组格式为：(主体, 主体类型, 动作, 客体, 客体类型)。
+
+类型包括但不限于：人物、地点、组织、物品、概念、时间、事件、活动等。
+
+每段文本以 [编号] 开头。请为每一段单独输出一个条目：index 为该段的编号，quintuples 为只从该段中抽取的五元组；
+某段没有可抽取的关系时，输出空列表。不要把不同段落的信息混在一起。
+"""
+    numbered = "\n\n".join(f"[{i}]\n{t}" for i, t in enumerate(texts))
+
+    max_retries = 2
+    for attempt in range(max_retries):
+        logger.info(f"尝试批量结构化提取五元组 (第{attempt + 1}次, {len(texts)} 段)")
+        try:
+            completion = await async_client.beta.chat.completions.parse(
+                model=config.api.model,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": f"请分别从以下 {len(texts)} 段文本中提取五元组：\n\n{numbered}"}
+                ],
+                response_format=BatchQuintupleResponse,
+                max_tokens=config.api.max_tokens,
+                temperature=0.3,
+                timeout=600 + (attempt * 20)
+            )
+            parsed = completion.choices[0].message.parsed
+            results: List[List[Tuple[str, str, str, str, str]]] = [[] for _ in texts]
+            returned = set()
+            for item in parsed.items:
+                if 0 <= item.index < len(texts):
+                    returned.add(item.index)
+                    results[item.index].extend(
+                        (q.subject, q.subject_type, q.predicate, q.object, q.object_type)
+                        for q in item.quintuples
+                    )
+        except Exception as e:
+            logger.warning(f"批量结构化输出失败: {str(e)}")
+            if attempt < max_retries - 1:
+                await asyncio.sleep(1 + attempt)
+            continue
+
+        # 模型漏掉的编号不能当作“无关系”：逐条重新提取
+        missing = [i for i in range(len(texts)) if i not in returned]
+        if missing:
+            logger.warning(f"批量结果缺少 {len(missing)} 段（编号 {missing}），逐条补提")
+            retried = await asyncio.gather(*(extract_quintuples_async(texts[i]) for i in missing))
+            for i, quintuples in zip(missing, retried):
+                results[i] = quintuples
+        logger.info(f"批量结构化输出成功，{len(texts)} 段共提取到 {sum(len(r) for r in results)} 个五元组")
+        return results
+
+    logger.info("批量提取失败，回退到逐条提取")
+    return list(await asyncio.gather(*(extract_quintuples_async(t) for t in texts)))
+
+
 async def _extract_quintuples_async_fallback(text):
     """传统JSON解析的异步五元组提取（回退方案）"""
     prompt = f"""
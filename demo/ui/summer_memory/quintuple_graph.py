@@ -1,15 +1,22 @@
 """
 五元组图存储模块（兼容 GRAGMemoryManager）
 
-- 默认使用本地 JSON 文件 logs/knowledge_graph/quintuples.json 持久化
-- 如果安装并配置了 Neo4j + py2neo，则会同步写入图数据库
+- 默认使用本地 SQLite 存储 logs/knowledge_graph/quintuples.db（倒排索引，见 quintuple_store.py）
+  旧版 logs/knowledge_graph/quintuples.json 会在首次打开时自动导入
+- 如果安装并配置了 Neo4j + py2neo，则会同步写入图数据库：
+  每次写入一个事务，按 GRAG_NEO4J_BATCH_SIZE 分批的参数化 UNWIND 语句，瞬时错误按 GRAG_NEO4J_MAX_RETRIES 重试
 """
 
 import json as _json
 import logging
 import sys
 import os
-from typing import Iterable, List, Sequence, Tuple
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .quintuple_store import QuintupleStore
 
 logger = logging.getLogger(__name__)
 
@@ -17,13 +24,11 @@ logger = logging.getLogger(__name__)
 # 可选依赖：Neo4j / py2neo
 # ----------------------------------------------------------------------
 try:
-    from py2neo import Graph, Node, Relationship
+    from py2neo import Graph
 
     _HAVE_PY2NEO = True
 except Exception as e:  # 允许在无 Neo4j 环境下运行
     Graph = None          # type: ignore
-    Node = None           # type: ignore
-    Relationship = None   # type: ignore
     _HAVE_PY2NEO = False
     logger.warning(
         "[GRAG] 未安装 py2neo 或导入失败，将禁用 Neo4j 图存储，仅使用本地 JSON 图: %s",
@@ -98,40 +103,184 @@ except Exception as e:
         GRAG_ENABLED = False
 
 # ----------------------------------------------------------------------
-# 本地 JSON 存储
+# 本地存储（SQLite + 倒排索引）
 # ----------------------------------------------------------------------
 
 # BASE_DIR = demo/ui
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))
-QUINTUPLES_FILE = os.path.join(BASE_DIR, "logs", "knowledge_graph", "quintuples.json")
+QUINTUPLES_FILE = os.path.join(BASE_DIR, "logs", "knowledge_graph", "quintuples.json")  # 旧版，仅用于一次性导入
+QUINTUPLES_DB = os.path.join(BASE_DIR, "logs", "knowledge_graph", "quintuples.db")
+
+_STORE: Optional[QuintupleStore] = None
+_STORE_LOCK = threading.Lock()
 
 
-def _ensure_dir() -> None:
-    """确保五元组 JSON 目录存在"""
-    os.makedirs(os.path.dirname(QUINTUPLES_FILE), exist_ok=True)
+def get_store() -> QuintupleStore:
+    """懒加载本地五元组存储（进程内单例）"""
+    global _STORE
+    if _STORE is None:
+        with _STORE_LOCK:
+            if _STORE is None:
+                _STORE = QuintupleStore(QUINTUPLES_DB, legacy_json_path=QUINTUPLES_FILE)
+    return _STORE
 
 
 def load_quintuples() -> List[Tuple[str, str, str, str, str]]:
-    """从本地 JSON 读取全部五元组"""
+    """从本地存储读取全部五元组（按写入顺序）"""
     try:
-        with open(QUINTUPLES_FILE, "r", encoding="utf-8") as f:
-            data = _json.load(f)
-        return [tuple(item) for item in data]
-    except FileNotFoundError:
-        return []
+        return get_store().all()
     except Exception as e:
-        logger.error("[GRAG] 读取五元组文件失败: %s", e)
+        logger.error("[GRAG] 读取五元组存储失败: %s", e)
         return []
 
 
 def save_quintuples(quintuples: Sequence[Tuple[str, str, str, str, str]]) -> None:
-    """写入全部五元组到 JSON 文件"""
-    _ensure_dir()
+    """用给定集合整体替换本地存储（日常写入请用 store_quintuples，仅增量）"""
+    try:
+        get_store().replace_all(quintuples)
+    except Exception as e:
+        logger.error("[GRAG] 保存五元组存储失败: %s", e)
+
+
+def count_quintuples() -> int:
+    """五元组总数（COUNT(*)，不加载全量）"""
     try:
-        with open(QUINTUPLES_FILE, "w", encoding="utf-8") as f:
-            _json.dump(list(quintuples), f, ensure_ascii=False, indent=2)
+        return get_store().count()
     except Exception as e:
-        logger.error("[GRAG] 保存五元组文件失败: %s", e)
+        logger.error("[GRAG] 统计五元组失败: %s", e)
+        return 0
+
+
+# ----------------------------------------------------------------------
+# Neo4j 批量写入（UNWIND）
+# ----------------------------------------------------------------------
+
+NEO4J_BATCH_SIZE = int(os.getenv("GRAG_NEO4J_BATCH_SIZE", "500"))
+NEO4J_MAX_RETRIES = int(os.getenv("GRAG_NEO4J_MAX_RETRIES", "3"))
+NEO4J_BACKOFF_BASE = float(os.getenv("GRAG_NEO4J_BACKOFF_BASE", "0.5"))
+
+_MERGE_ENTITIES_CYPHER = (
+    "UNWIND $rows AS row "
+    "MERGE (e:Entity {name: row.name}) "
+    "SET e.entity_type = row.entity_type"
+)
+
+# 关系类型无法参数化，按类型分组，每种类型一条语句（类型名做反引号转义）
+_MERGE_RELATIONS_CYPHER = (
+    "UNWIND $rows AS row "
+    "MATCH (h:Entity {name: row.head}) "
+    "MATCH (t:Entity {name: row.tail}) "
+    "MERGE (h)-[r:%s]->(t) "
+    "SET r.head_type = row.head_type, r.tail_type = row.tail_type"
+)
+
+
+def _cypher_rel_type(rel: str) -> str:
+    return "`" + rel.replace("`", "``") + "`"
+
+
+def _is_transient_neo4j_error(e: BaseException) -> bool:
+    name = e.__class__.__name__
+    text = str(e) or ""
+    code = str(getattr(e, "code", "") or "")
+    return (
+        isinstance(e, (ConnectionError, TimeoutError))
+        or "Transient" in name
+        or "ServiceUnavailable" in name
+        or "SessionExpired" in name
+        or "TransientError" in code
+        or "TransientError" in text
+        or "DeadlockDetected" in text
+    )
+
+
+def _chunks(rows: List[Dict[str, Any]], size: int) -> Iterable[List[Dict[str, Any]]]:
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+
+def _commit(g: Any, tx: Any) -> None:
+    # py2neo 2021+: graph.commit(tx)；更早版本：tx.commit()
+    if callable(getattr(g, "commit", None)):
+        g.commit(tx)
+    else:
+        tx.commit()
+
+
+def _rollback(g: Any, tx: Any) -> None:
+    try:
+        if callable(getattr(g, "rollback", None)):
+            g.rollback(tx)
+        else:
+            tx.rollback()
+    except Exception:
+        pass
+
+
+def write_quintuples_to_neo4j(
+    g: Any,
+    quintuples: Iterable[Tuple[str, str, str, str, str]],
+    *,
+    batch_size: Optional[int] = None,
+    max_retries: Optional[int] = None,
+    backoff_base: Optional[float] = None,
+) -> int:
+    """
+    把一批五元组在一个事务内写入 Neo4j，返回写入的关系数。
+
+    - 实体：按 name 去重后 UNWIND MERGE（同名实体以本批最后出现的 entity_type 为准，与逐条 merge 一致）
+    - 关系：按关系类型分组 UNWIND MERGE，关系上挂 head_type / tail_type
+    - 每条语句最多 batch_size 行；瞬时错误（连接中断、TransientError 等）整体回滚后重试，MERGE 保证幂等
+    g: py2neo.Graph 或任何提供 begin() / commit(tx) 与 tx.run(cypher, **params) 的对象
+    """
+    batch_size = max(1, batch_size if batch_size is not None else NEO4J_BATCH_SIZE)
+    max_retries = max(0, max_retries if max_retries is not None else NEO4J_MAX_RETRIES)
+    backoff_base = backoff_base if backoff_base is not None else NEO4J_BACKOFF_BASE
+
+    entities: "OrderedDict[str, str]" = OrderedDict()
+    relations: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+    for head, head_type, rel, tail, tail_type in quintuples:
+        if not head or not tail or not rel:
+            logger.warning(
+                "[GRAG] 跳过无效五元组（head / rel / tail 为空）: %r",
+                (head, head_type, rel, tail, tail_type),
+            )
+            continue
+        entities[head] = head_type
+        entities[tail] = tail_type
+        relations.setdefault(rel, []).append(
+            {"head": head, "tail": tail, "head_type": head_type, "tail_type": tail_type}
+        )
+
+    if not relations:
+        return 0
+
+    entity_rows = [{"name": n, "entity_type": t} for n, t in entities.items()]
+    total = sum(len(rows) for rows in relations.values())
+
+    for attempt in range(max_retries + 1):
+        tx = g.begin()
+        try:
+            for chunk in _chunks(entity_rows, batch_size):
+                tx.run(_MERGE_ENTITIES_CYPHER, rows=chunk)
+            for rel, rows in relations.items():
+                cypher = _MERGE_RELATIONS_CYPHER % _cypher_rel_type(rel)
+                for chunk in _chunks(rows, batch_size):
+                    tx.run(cypher, rows=chunk)
+            _commit(g, tx)
+            return total
+        except Exception as e:
+            _rollback(g, tx)
+            if attempt < max_retries and _is_transient_neo4j_error(e):
+                delay = backoff_base * (2 ** attempt)
+                logger.warning(
+                    "[GRAG] Neo4j 批量写入瞬时错误，%.2fs 后重试 (%d/%d): %s",
+                    delay, attempt + 1, max_retries, e,
+                )
+                time.sleep(delay)
+                continue
+            raise
+    return 0
 
 
 # ----------------------------------------------------------------------
@@ -140,73 +289,37 @@ def save_quintuples(quintuples: Sequence[Tuple[str, str, str, str, str]]) -> Non
 
 def store_quintuples(new_quintuples: Iterable[Tuple[str, str, str, str, str]]) -> bool:
     """
-    存储五元组到本地 JSON 和 Neo4j（如果启用），返回是否成功。
+    存储五元组到本地存储和 Neo4j（如果启用），返回是否成功。
+    本地写入只涉及本批五元组（唯一约束去重 + 增量倒排索引），不重写历史数据。
 
     new_quintuples: Iterable[(head, head_type, rel, tail, tail_type)]
     """
     try:
-        # 先合并到本地集合，自动去重
-        existing = set(load_quintuples())
         new_set = set(tuple(t) for t in new_quintuples)
-        all_quintuples = existing | new_set
-
-        # 持久化到本地 JSON
-        save_quintuples(all_quintuples)
+        added = get_store().add_many(new_set)
 
-        # 如果没开 Neo4j 或连接不可用，只写文件即可
+        # 如果没开 Neo4j 或连接不可用，只写本地即可
         if not (GRAG_ENABLED and graph is not None):
             logger.info(
-                "[GRAG] Neo4j 未启用或连接失败，仅写入 JSON：新增 %d 条，现有总数 %d 条",
+                "[GRAG] Neo4j 未启用或连接失败，仅写入本地存储：本批 %d 条，新增 %d 条",
                 len(new_set),
-                len(all_quintuples),
+                len(added),
             )
             return True
 
-        # 同步写入 Neo4j
-        success = True
-        success_count = 0
-
-        for head, head_type, rel, tail, tail_type in new_set:
-            if not head or not tail:
-                logger.warning(
-                    "[GRAG] 跳过无效五元组（head 或 tail 为空）: %r",
-                    (head, head_type, rel, tail, tail_type),
-                )
-                continue
-
-            try:
-                # 创建节点（这里用 name 作为唯一键）
-                h_node = Node("Entity", name=head, entity_type=head_type)
-                t_node = Node("Entity", name=tail, entity_type=tail_type)
-
-                graph.merge(h_node, "Entity", "name")
-                graph.merge(t_node, "Entity", "name")
-
-                # 关系上也挂主体/客体类型信息
-                r = Relationship(
-                    h_node,
-                    rel,
-                    t_node,
-                    head_type=head_type,
-                    tail_type=tail_type,
-                )
-                graph.merge(r)
-                success_count += 1
-            except Exception as e:
-                logger.error(
-                    "[GRAG] 存储五元组到 Neo4j 失败: %r，错误: %s",
-                    (head, head_type, rel, tail, tail_type),
-                    e,
-                )
-                success = False
+        # 同步写入 Neo4j（一个事务 + 分批 UNWIND）
+        try:
+            written = write_quintuples_to_neo4j(graph, new_set)
+        except Exception as e:
+            logger.error("[GRAG] 批量写入 Neo4j 失败（%d 条）: %s", len(new_set), e)
+            return False
 
         logger.info(
             "[GRAG] 成功写入 Neo4j 五元组: %d/%d",
-            success_count,
+            written,
             len(new_set),
         )
-        # 只要写入了一部分就算整体成功
-        return success_count > 0 and success
+        return written > 0
 
     except Exception as e:
         logger.error("[GRAG] 存储五元组失败: %s", e)
@@ -227,26 +340,13 @@ def get_all_quintuples() -> List[Tuple[str, str, str, str, str]]:
 
 
 # ----------------------------------------------------------------------
-# 关键词查询（支持 Neo4j + 本地 JSON 回退）
+# 关键词查询（支持 Neo4j + 本地倒排索引回退）
 # ----------------------------------------------------------------------
 
-def _score_quintuple_by_keywords(
-    quintuple: Tuple[str, str, str, str, str],
-    keywords: Sequence[str],
-) -> int:
-    """简单打分：五元组中命中了多少个关键词"""
-    text = " ".join(quintuple)
-    score = 0
-    for kw in keywords:
-        if kw and kw in text:
-            score += 1
-    return score
-
-
 def query_graph_by_keywords(keywords: Sequence[str]) -> List[Tuple[str, str, str, str, str]]:
     """
     使用关键词在 Neo4j 中做一个简单查询，返回匹配到的一些五元组。
-    如果 Neo4j 未启用或查不到结果，则回退到本地 JSON 中进行关键词搜索。
+    如果 Neo4j 未启用或查不到结果，则回退到本地存储的倒排索引中进行关键词搜索。
 
     keywords: e.g. ["组会", "张三"]
     """
@@ -298,28 +398,21 @@ def query_graph_by_keywords(keywords: Sequence[str]) -> List[Tuple[str, str, str
                     uniq.append(q)
             return uniq
 
-    # 2）Neo4j 不可用 / 没查到结果：回退到本地 JSON
-    all_quintuples = load_quintuples()
-    scored: List[Tuple[int, Tuple[str, str, str, str, str]]] = []
-
-    for q in all_quintuples:
-        score = _score_quintuple_by_keywords(q, keywords)
-        if score > 0:
-            scored.append((score, q))
-
-    if not scored:
-        logger.info("[GRAG] 本地 JSON 中也未命中任何关键词: %s", keywords)
+    # 2）Neo4j 不可用 / 没查到结果：回退到本地倒排索引（按命中关键词个数打分）
+    TOP_K = 50
+    try:
+        top_quintuples = get_store().search(keywords, top_k=TOP_K)
+    except Exception as e:
+        logger.error("[GRAG] 本地五元组检索出错: %s", e)
         return []
 
-    # 按命中关键词数量排序
-    scored.sort(key=lambda x: x[0], reverse=True)
+    if not top_quintuples:
+        logger.info("[GRAG] 本地存储中也未命中任何关键词: %s", keywords)
+        return []
 
-    TOP_K = 50
-    top_quintuples = [q for _, q in scored[:TOP_K]]
     logger.info(
-        "[GRAG] 从本地 JSON 中命中五元组: %d 条（总数=%d, keywords=%s）",
+        "[GRAG] 从本地存储中命中五元组: %d 条（keywords=%s）",
         len(top_quintuples),
-        len(all_quintuples),
         keywords,
     )
     return top_quintuples
@@ -0,0 +1,201 @@
+"""
+五元组本地存储引擎（SQLite + 倒排索引）
+
+- 写入：INSERT OR IGNORE 去重，只为真正新增的五元组建立倒排项，复杂度 O(新增条数)
+- 倒排索引：把 "head head_type rel tail tail_type" 切成相邻字符二元组（bigram），
+  token -> 五元组 id；关键词查询先按 bigram 求交得到候选，再做子串校验，结果与原先的
+  线性子串扫描一致，但只触碰包含这些 bigram 的行
+- 统计：COUNT(*)，无需整表加载
+- 兼容：首次打开时若存在旧版 quintuples.json，自动导入一次（store_meta 记录，不重复导入）
+"""
+
+import json as _json
+import logging
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+Quintuple = Tuple[str, str, str, str, str]
+
+# 文本末尾补一个哨兵字符，保证每个字符都是某个 bigram 的首字符（单字关键词走前缀范围查询）
+_SENTINEL = "\x00"
+
+
+def quintuple_text(q: Sequence[str]) -> str:
+    """关键词匹配用的文本：五元组各字段以空格拼接"""
+    return " ".join(q)
+
+
+def _bigrams(text: str) -> Set[str]:
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+def index_tokens(q: Sequence[str]) -> Set[str]:
+    return _bigrams(quintuple_text(q) + _SENTINEL)
+
+
+class QuintupleStore:
+    def __init__(self, path: str, legacy_json_path: Optional[str] = None):
+        self.path = path
+        d = os.path.dirname(os.path.abspath(path))
+        os.makedirs(d, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS quintuples (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                head TEXT NOT NULL, head_type TEXT NOT NULL, rel TEXT NOT NULL,
+                tail TEXT NOT NULL, tail_type TEXT NOT NULL,
+                UNIQUE (head, head_type, rel, tail, tail_type)
+            );
+            CREATE TABLE IF NOT EXISTS quintuple_postings (
+                token TEXT NOT NULL,
+                qid INTEGER NOT NULL,
+                PRIMARY KEY (token, qid)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS store_meta (key TEXT PRIMARY KEY, value TEXT);
+            """
+        )
+        self._conn.commit()
+        if legacy_json_path:
+            self._import_legacy_json(legacy_json_path)
+
+    # ---------- 写入 ----------
+    def _insert_locked(self, quintuples: Iterable[Sequence[str]]) -> List[Quintuple]:
+        added: List[Quintuple] = []
+        postings: List[Tuple[str, int]] = []
+        for item in quintuples:
+            q = tuple("" if x is None else str(x) for x in item)
+            if len(q) != 5:
+                continue
+            cur = self._conn.execute(
+                "INSERT OR IGNORE INTO quintuples(head, head_type, rel, tail, tail_type) VALUES (?, ?, ?, ?, ?)",
+                q,
+            )
+            if cur.rowcount:
+                qid = cur.lastrowid
+                postings.extend((tok, qid) for tok in index_tokens(q))
+                added.append(q)  # type: ignore[arg-type]
+        if postings:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO quintuple_postings(token, qid) VALUES (?, ?)", postings
+            )
+        return added
+
+    def add_many(self, quintuples: Iterable[Sequence[str]]) -> List[Quintuple]:
+        """写入并返回真正新增（之前不存在）的五元组"""
+        with self._lock:
+            try:
+                added = self._insert_locked(quintuples)
+                self._conn.commit()
+                return added
+            except Exception:
+                self._conn.rollback()
+                raise
+
+    def replace_all(self, quintuples: Iterable[Sequence[str]]) -> None:
+        with self._lock:
+            try:
+                self._conn.execute("DELETE FROM quintuple_postings")
+                self._conn.execute("DELETE FROM quintuples")
+                self._insert_locked(quintuples)
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+
+    def _import_legacy_json(self, json_path: str) -> None:
+        with self._lock:
+            done = self._conn.execute(
+                "SELECT value FROM store_meta WHERE key = 'legacy_json_imported'"
+            ).fetchone()
+        if done or not os.path.exists(json_path):
+            return
+        try:
+            with open(json_path, "r", encoding="utf-8") as f:
+                data = _json.load(f)
+        except Exception as e:
+            logger.error("[GRAG] 导入旧版五元组 JSON 失败: %s", e)
+            return
+        with self._lock:
+            try:
+                added = self._insert_locked(data if isinstance(data, list) else [])
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO store_meta(key, value) VALUES ('legacy_json_imported', ?)",
+                    (json_path,),
+                )
+                self._conn.commit()
+            except Exception as e:
+                self._conn.rollback()
+                logger.error("[GRAG] 导入旧版五元组 JSON 失败: %s", e)
+                return
+        logger.info("[GRAG] 已从 %s 导入 %d 条五元组到本地存储", json_path, len(added))
+
+    # ---------- 读取 ----------
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM quintuples").fetchone()[0]
+
+    def all(self) -> List[Quintuple]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT head, head_type, rel, tail, tail_type FROM quintuples ORDER BY id"
+            ).fetchall()
+        return [tuple(r) for r in rows]  # type: ignore[misc]
+
+    def _candidate_ids_locked(self, keyword: str) -> Set[int]:
+        if len(keyword) == 1:
+            # 单字：token 以该字开头的所有 bigram（主键有序，前缀范围查询）
+            rows = self._conn.execute(
+                "SELECT DISTINCT qid FROM quintuple_postings WHERE token >= ? AND token < ?",
+                (keyword, keyword + "\U0010ffff"),
+            ).fetchall()
+            return {r[0] for r in rows}
+        grams = sorted(_bigrams(keyword))
+        placeholders = ",".join("?" * len(grams))
+        rows = self._conn.execute(
+            f"SELECT qid FROM quintuple_postings WHERE token IN ({placeholders})"
+            f" GROUP BY qid HAVING COUNT(*) = ?",
+            (*grams, len(grams)),
+        ).fetchall()
+        return {r[0] for r in rows}
+
+    def search(self, keywords: Sequence[str], top_k: int = 50) -> List[Quintuple]:
+        """
+        返回按命中关键词数降序排列的五元组（同分按写入顺序）。
+        命中判定与旧版一致：关键词是 "head head_type rel tail tail_type" 的子串。
+        """
+        keywords = [kw for kw in keywords if kw]
+        if not keywords:
+            return []
+        scores: Dict[int, int] = {}
+        rows_by_id: Dict[int, Quintuple] = {}
+        with self._lock:
+            for kw in keywords:
+                ids = sorted(self._candidate_ids_locked(kw) - rows_by_id.keys())
+                for chunk_start in range(0, len(ids), 500):
+                    chunk = ids[chunk_start:chunk_start + 500]
+                    placeholders = ",".join("?" * len(chunk))
+                    for r in self._conn.execute(
+                        f"SELECT id, head, head_type, rel, tail, tail_type FROM quintuples"
+                        f" WHERE id IN ({placeholders})",
+                        chunk,
+                    ):
+                        rows_by_id[r[0]] = tuple(r[1:])  # type: ignore[assignment]
+        for qid, q in rows_by_id.items():
+            text = quintuple_text(q)
+            score = sum(1 for kw in keywords if kw in text)
+            if score > 0:
+                scores[qid] = score
+        ranked = sorted(scores, key=lambda qid: (-scores[qid], qid))
+        return [rows_by_id[qid] for qid in ranked[:top_k]]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
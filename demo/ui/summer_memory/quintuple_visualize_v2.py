@@ -8,8 +8,16 @@ logger = logging.getLogger(__name__)
 
 def load_quintuples_from_json():
     """
-    直接从JSON文件中读取五元组数据，解耦数据库依赖
+    读取五元组数据，解耦数据库依赖：优先读本地五元组存储（quintuples.db），不可用时读旧版 JSON 文件
     """
+    try:
+        from .quintuple_graph import get_all_quintuples
+        stored = get_all_quintuples()
+        if stored:
+            print(f"本地五元组存储读取成功，包含 {len(stored)} 条记录")
+            return set(stored)
+    except Exception as e:
+        print(f"本地五元组存储不可用，改读 JSON 文件: {e}")
     try:
         json_file = "logs/knowledge_graph/quintuples.json"
         print(f"尝试读取 {json_file} 文件...")
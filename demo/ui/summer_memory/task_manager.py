@@ -3,6 +3,7 @@ import logging
 import threading
 import time
 from typing import Dict, List, Optional, Callable, Any, Tuple
+from collections import deque
 from dataclasses import dataclass
 from enum import Enum
 import hashlib
@@ -57,13 +58,20 @@ class QuintupleTaskManager:
             self.max_queue_size = max_queue_size or config.grag.max_queue_size
             self.task_timeout = config.grag.task_timeout
             self.auto_cleanup_hours = config.grag.auto_cleanup_hours
+            self.batch_max_texts = getattr(config.grag, "batch_max_texts", 8)
+            self.batch_max_chars = getattr(config.grag, "batch_max_chars", 6000)
+            self.batch_window_ms = getattr(config.grag, "batch_window_ms", 150)
             self.enabled = True
         except Exception:
             self.max_workers = max_workers or 3
             self.max_queue_size = max_queue_size or 100
             self.task_timeout = 30
             self.auto_cleanup_hours = 24
+            self.batch_max_texts = 8
+            self.batch_max_chars = 6000
+            self.batch_window_ms = 150
             self.enabled = True
+        self.batch_max_texts = max(1, int(self.batch_max_texts))
 
         # 任务存储
         self.tasks: Dict[str, ExtractionTask] = {}
@@ -77,6 +85,13 @@ class QuintupleTaskManager:
         # 统计信息
         self.completed_tasks = 0
         self.failed_tasks = 0
+        self.llm_calls = 0                 # 批次数（= 提取 LLM 调用数）
+        self.batched_texts = 0             # 经批次处理的文本条数
+        self.last_batch_size = 0
+        self._queue_latencies: deque = deque(maxlen=200)   # 入队 → 开始处理（秒）
+        # 到达间隔的指数滑动平均：间隔短于批窗口时才值得等待凑批
+        self._last_enqueue_at: Optional[float] = None
+        self._arrival_gap_ema: Optional[float] = None
 
         # 回调函数
         self.on_task_completed: Optional[Callable] = None
@@ -213,6 +228,11 @@ class QuintupleTaskManager:
                 logger.warning(f"任务队列已满 ({self.task_queue.qsize()}/{self.max_queue_size})")
 
             await self.task_queue.put(task)
+            now = time.time()
+            if self._last_enqueue_at is not None:
+                gap = now - self._last_enqueue_at
+                self._arrival_gap_ema = gap if self._arrival_gap_ema is None else 0.7 * self._arrival_gap_ema + 0.3 * gap
+            self._last_enqueue_at = now
             logger.info(f"任务已加入队列: {task_id}")
             return task_id
         except Exception as e:
@@ -246,100 +266,28 @@ class QuintupleTaskManager:
             return None, "任务被取消"
 
     async def _worker_loop(self, worker_id: str):
-        """工作协程主循环"""
+        """
+        工作协程主循环（事件驱动 + 微批）：
+        - 阻塞在 queue.get() 上，有任务入队才被唤醒，不做定时轮询
+        - 拿到第一条后立即取走队列中已有的任务；若近期到达间隔短于批窗口，再在窗口内等待凑批
+        - 批次受条数（batch_max_texts）与字符数（batch_max_chars）双重限制，超出的留到下一批
+        """
         logger.info(f"工作协程启动: {worker_id}")
-
-        # === 添加启动确认日志 ===
         logger.info(f"✅ {worker_id} 已进入工作循环，状态: running={self.is_running}")
 
+        carry: Optional[ExtractionTask] = None
         while self.is_running:
             try:
-                # === 添加队列状态日志 ===
-                logger.debug(f"{worker_id} 正在等待新任务 (队列大小: {self.task_queue.qsize()})")
-
-                # 使用带超时的get，避免永久阻塞
-                try:
-                    task = await asyncio.wait_for(self.task_queue.get(), timeout=1.0)
-                except asyncio.TimeoutError:
-                    # 超时但继续循环检查
-                    continue
-
-                logger.info(f"{worker_id} 获取到任务: {task.task_id}")
-
-                if task.status != TaskStatus.PENDING:
-                    logger.warning(f"任务状态异常: {task.task_id} ({task.status.value})")
-                    self.task_queue.task_done()
-                    continue
-
-                # 更新任务状态
-                task.status = TaskStatus.RUNNING
-                task.started_at = time.time()
-                logger.info(f"{worker_id} 开始处理任务: {task.task_id}")
-
-                # 执行任务
-                result = None
-                error = None
-                try:
-                    # 导入提取函数（避免循环导入）
-                    from .quintuple_extractor import extract_quintuples_async
-                    logger.info(f"{worker_id} 调用五元组提取API: {task.task_id}")
-
-                    # 使用超时控制执行任务
-                    result = await asyncio.wait_for(
-                        extract_quintuples_async(task.text),
-                        timeout=self.task_timeout
-                    )
-                    logger.info(f"{worker_id} 提取到 {len(result)} 个五元组: {task.text}")
-
-                    # 更新任务状态
-                    async with self.lock:
-                        task.status = TaskStatus.COMPLETED
-                        task.result = result
-                        task.completed_at = time.time()
-                        self.completed_tasks += 1
-
-                except asyncio.TimeoutError:
-                    error = "任务执行超时"
-                    logger.warning(f"{worker_id} 任务超时: {task.task_id}")
-                    async with self.lock:
-                        task.status = TaskStatus.FAILED
-                        task.error = error
-                        task.completed_at = time.time()
-                        self.failed_tasks += 1
-
-                except Exception as e:
-                    error = str(e)
-                    logger.error(f"{worker_id} 任务失败: {task.task_id}, 错误: {error}")
-                    traceback.print_exc()
-                    async with self.lock:
-                        task.status = TaskStatus.FAILED
-                        task.error = error
-                        task.completed_at = time.time()
-                        self.failed_tasks += 1
-
-                # 设置future结果
-                if not task.future.done():
-                    if task.status == TaskStatus.COMPLETED:
-                        task.future.set_result(result)
-                    else:
-                        task.future.set_exception(Exception(error or "任务失败"))
-
-                # 触发回调
-                try:
-                    if task.status == TaskStatus.COMPLETED and self.on_task_completed:
-                        self.on_task_completed(task.task_id, result)
-                    elif task.status == TaskStatus.FAILED and self.on_task_failed:
-                        self.on_task_failed(task.task_id, error)
-                except Exception as e:
-                    logger.error(f"任务回调失败: {task.task_id}, 错误: {str(e)}")
-
-                # 标记任务完成
-                self.task_queue.task_done()
-                logger.info(f"{worker_id} 任务处理完成: {task.task_id}")
-
+                first = carry if carry is not None else await self.task_queue.get()
+                carry = None
+                batch, carry = await self._collect_batch(first)
+                if batch:
+                    await self._run_batch(worker_id, batch)
 
             except asyncio.CancelledError:
                 logger.info(f"{worker_id} 工作协程被取消")
+                if carry is not None:
+                    self._requeue([carry])
                 break
 
             except Exception as e:
@@ -348,6 +296,138 @@ class QuintupleTaskManager:
                 # 防止异常导致循环崩溃
                 await asyncio.sleep(1)
 
+    def _take_if_pending(self, task: ExtractionTask, batch: List[ExtractionTask]) -> bool:
+        """非 PENDING（如已取消）的任务直接丢弃"""
+        if task.status != TaskStatus.PENDING:
+            logger.warning(f"任务状态异常: {task.task_id} ({task.status.value})")
+            self.task_queue.task_done()
+            return False
+        batch.append(task)
+        return True
+
+    def _requeue(self, tasks: List[ExtractionTask]) -> None:
+        """已出队但还没开始执行的任务放回队列（工作协程被取消时），队列已满则标记失败"""
+        for task in tasks:
+            try:
+                self.task_queue.put_nowait(task)
+            except asyncio.QueueFull:
+                logger.warning(f"任务放回队列失败（队列已满）: {task.task_id}")
+                task.status = TaskStatus.FAILED
+                task.error = "工作协程被取消，任务未执行"
+                task.completed_at = time.time()
+                self.failed_tasks += 1
+                if not task.future.done():
+                    task.future.set_exception(Exception(task.error))
+            # 抵消本次出队对应的 get()，未完成计数只由放回的 put 维持
+            self.task_queue.task_done()
+
+    async def _collect_batch(self, first: ExtractionTask) -> Tuple[List[ExtractionTask], Optional[ExtractionTask]]:
+        batch: List[ExtractionTask] = []
+        try:
+            return await self._fill_batch(first, batch)
+        except asyncio.CancelledError:
+            self._requeue(batch)
+            raise
+
+    async def _fill_batch(self, first: ExtractionTask,
+                          batch: List[ExtractionTask]) -> Tuple[List[ExtractionTask], Optional[ExtractionTask]]:
+        self._take_if_pending(first, batch)
+        chars = sum(len(t.text) for t in batch)
+
+        window_s = max(0.0, self.batch_window_ms / 1000.0)
+        wait_for_more = (
+            window_s > 0
+            and self._arrival_gap_ema is not None
+            and self._arrival_gap_ema < window_s
+        )
+        deadline = time.monotonic() + window_s
+
+        while len(batch) < self.batch_max_texts:
+            if not self.task_queue.empty():
+                task = self.task_queue.get_nowait()
+            else:
+                remaining = deadline - time.monotonic()
+                if not (wait_for_more and batch) or remaining <= 0:
+                    break
+                try:
+                    task = await asyncio.wait_for(self.task_queue.get(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+            if batch and chars + len(task.text) > self.batch_max_chars:
+                # 放不下：作为下一批的第一条
+                return batch, task
+            if self._take_if_pending(task, batch):
+                chars += len(task.text)
+        return batch, None
+
+    async def _run_batch(self, worker_id: str, batch: List[ExtractionTask]) -> None:
+        now = time.time()
+        for task in batch:
+            task.status = TaskStatus.RUNNING
+            task.started_at = now
+            self._queue_latencies.append(now - task.created_at)
+        self.llm_calls += 1
+        self.batched_texts += len(batch)
+        self.last_batch_size = len(batch)
+        logger.info(f"{worker_id} 开始处理批次: {len(batch)} 条 ({', '.join(t.task_id for t in batch)})")
+
+        results: Optional[List[List]] = None
+        error: Optional[str] = None
+        try:
+            # 导入提取函数（避免循环导入）
+            from .quintuple_extractor import extract_quintuples_batch_async
+            # 批次越大输出越长，超时按条数适度放宽
+            timeout = self.task_timeout * (1 + 0.5 * (len(batch) - 1))
+            results = await asyncio.wait_for(
+                extract_quintuples_batch_async([t.text for t in batch]),
+                timeout=timeout,
+            )
+        except asyncio.TimeoutError:
+            error = "任务执行超时"
+            logger.warning(f"{worker_id} 批次超时: {len(batch)} 条")
+        except Exception as e:
+            error = str(e)
+            logger.error(f"{worker_id} 批次失败: {len(batch)} 条, 错误: {error}")
+            traceback.print_exc()
+
+        for i, task in enumerate(batch):
+            if error is None and results is not None and i < len(results):
+                await self._finish_task(task, results[i], None)
+                logger.info(f"{worker_id} 提取到 {len(results[i])} 个五元组: {task.text}")
+            else:
+                await self._finish_task(task, None, error or "批量结果缺失")
+            self.task_queue.task_done()
+        logger.info(f"{worker_id} 批次处理完成: {len(batch)} 条")
+
+    async def _finish_task(self, task: ExtractionTask, result: Optional[List], error: Optional[str]) -> None:
+        async with self.lock:
+            if task.status == TaskStatus.CANCELLED:
+                return
+            task.completed_at = time.time()
+            if error is None:
+                task.status = TaskStatus.COMPLETED
+                task.result = result
+                self.completed_tasks += 1
+            else:
+                task.status = TaskStatus.FAILED
+                task.error = error
+                self.failed_tasks += 1
+
+        # 设置future结果
+        if not task.future.done():
+            if task.status == TaskStatus.COMPLETED:
+                task.future.set_result(result)
+            else:
+                task.future.set_exception(Exception(error or "任务失败"))
+
+        # 触发回调
+        try:
+            if task.status == TaskStatus.COMPLETED and self.on_task_completed:
+                self.on_task_completed(task.task_id, result)
+            elif task.status == TaskStatus.FAILED and self.on_task_failed:
+                self.on_task_failed(task.task_id, error)
+        except Exception as e:
+            logger.error(f"任务回调失败: {task.task_id}, 错误: {str(e)}")
 
     async def clear_completed_tasks(self, max_age_hours: int = None):
         """清理已完成的任务"""
@@ -450,6 +530,7 @@ class QuintupleTaskManager:
         completed_tasks = self.completed_tasks
         failed_tasks = self.failed_tasks
         cancelled_tasks = sum(1 for task in self.tasks.values() if task.status == TaskStatus.CANCELLED)
+        latencies = sorted(self._queue_latencies)
 
         return {
             "enabled": self.enabled,
@@ -463,7 +544,16 @@ class QuintupleTaskManager:
             "max_queue_size": self.max_queue_size,
             "queue_size": self.task_queue.qsize(),
             "queue_usage": f"{self.task_queue.qsize()}/{self.max_queue_size}",
-            "task_timeout": self.task_timeout
+            "task_timeout": self.task_timeout,
+            # 微批吞吐与排队延迟
+            "llm_calls": self.llm_calls,
+            "texts_per_call": round(self.batched_texts / self.llm_calls, 2) if self.llm_calls else 0.0,
+            "last_batch_size": self.last_batch_size,
+            "batch_max_texts": self.batch_max_texts,
+            "batch_window_ms": self.batch_window_ms,
+            "queue_latency_avg_ms": round(sum(latencies) / len(latencies) * 1000, 1) if latencies else 0.0,
+            "queue_latency_p95_ms": round(latencies[int(0.95 * (len(latencies) - 1))] * 1000, 1) if latencies else 0.0,
+            "queue_latency_max_ms": round(latencies[-1] * 1000, 1) if latencies else 0.0,
         }
 
 
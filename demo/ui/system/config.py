@@ -143,6 +143,10 @@ class GragConfig:
         self.max_queue_size: int = int(data.get("max_queue_size", 100))
         self.task_timeout: int = int(data.get("task_timeout", 30))
         self.auto_cleanup_hours: int = int(data.get("auto_cleanup_hours", 24))
+        # 微批提取：多条对话合并为一次结构化 LLM 调用
+        self.batch_max_texts: int = int(data.get("batch_max_texts", 8))
+        self.batch_max_chars: int = int(data.get("batch_max_chars", 6000))
+        self.batch_window_ms: int = int(data.get("batch_window_ms", 150))
 
         # Neo4j 图数据库配置
         self.neo4j_uri: str = data.get("neo4j_uri", "bolt://127.0.0.1:7687")
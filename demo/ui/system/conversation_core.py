@@ -85,10 +85,10 @@ class ConversationCore:
             
         # 检查是否有工具调用需要处理
         if full_response:
-            from mcpserver.tool_call_utils import parse_tool_calls, execute_tool_calls
+            from mcpserver.tool_call_utils import parse_tool_calls, aexecute_tool_calls
             tool_calls = parse_tool_calls(full_response)
             if tool_calls:
-                tool_result = execute_tool_calls(tool_calls)
+                tool_result = await aexecute_tool_calls(tool_calls)
                 yield f"\n\n工具调用结果：\n{tool_result}"
 
 # 第三方库导入
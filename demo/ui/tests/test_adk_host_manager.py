@@ -1,8 +1,23 @@
+import os
+import time
 import unittest
 
+from unittest import mock
+
+from a2a.types import (
+    Message,
+    Part,
+    Role,
+    Task,
+    TaskState,
+    TaskStatus,
+    TaskStatusUpdateEvent,
+)
+from a2a.types import TextPart as A2ATextPart
 from common.types import DataPart, FilePart, TextPart
 from google.genai import types
 from service.server.adk_host_manager import ADKHostManager
+from service.types import Conversation, Event
 
 
 class ADKHostManagerTest(unittest.TestCase):
@@ -199,5 +214,228 @@ class ADKHostManagerTest(unittest.TestCase):
         )
 
 
+def _make_manager() -> ADKHostManager:
+    """Build a manager without starting the ADK runner or host agent."""
+    with (
+        mock.patch('service.server.adk_host_manager.HostAgent'),
+        mock.patch.object(ADKHostManager, '_initialize_host'),
+    ):
+        return ADKHostManager(http_client=mock.Mock())
+
+
+def _populate(manager: ADKHostManager, n_messages: int) -> None:
+    """Fill the stores with n_messages spread over conversations and tasks."""
+    for i in range(n_messages):
+        conversation_id = f'conv-{i // 100}'
+        if i % 100 == 0:
+            manager._conversations[conversation_id] = Conversation(
+                conversation_id=conversation_id, is_active=True
+            )
+        message = Message(
+            messageId=f'msg-{i}',
+            contextId=conversation_id,
+            taskId=f'task-{i // 10}',
+            role=Role.agent,
+            parts=[Part(root=A2ATextPart(text=str(i)))],
+        )
+        manager.add_message(message)
+        manager.get_conversation(conversation_id).messages.append(message)
+        if i % 10 == 0:
+            manager.add_task(
+                Task(
+                    id=f'task-{i // 10}',
+                    contextId=conversation_id,
+                    status=TaskStatus(state=TaskState.working),
+                    history=[],
+                )
+            )
+        manager.attach_message_to_task(message, f'task-{i // 10}')
+    # A handful of in-flight messages, as on a busy host
+    for i in range(0, n_messages, max(1, n_messages // 20)):
+        manager._pending_message_ids[f'msg-{i}'] = None
+
+
+def _time_lookups(manager: ADKHostManager, n_messages: int) -> float:
+    """Best-of-three time for a fixed mix of id lookups and updates."""
+    n_tasks = n_messages // 10
+    n_conversations = n_messages // 100
+    best = float('inf')
+    for _ in range(3):
+        start = time.perf_counter()
+        for i in range(2000):
+            manager.get_conversation(f'conv-{(i * 7) % n_conversations}')
+            manager.get_message(f'msg-{(i * 31) % n_messages}')
+            task = manager.add_or_get_task(
+                TaskStatusUpdateEvent(
+                    taskId=f'task-{(i * 13) % n_tasks}',
+                    contextId='conv-0',
+                    status=TaskStatus(state=TaskState.working),
+                    final=False,
+                )
+            )
+            manager.update_task(task)
+        manager.get_pending_messages()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+class ADKHostManagerIndexTest(unittest.TestCase):
+    """Id-keyed stores: index structures, lookups and ordering."""
+
+    def test_index_structures_track_stores(self) -> None:
+        manager = _make_manager()
+        _populate(manager, 1000)
+        self.assertEqual(len(manager._message_index), 1000)
+        for message_id, position in manager._message_index.items():
+            self.assertEqual(manager._messages[position].messageId, message_id)
+        self.assertEqual(
+            list(manager._tasks), [f'task-{i}' for i in range(100)]
+        )
+        self.assertTrue(
+            all(task_id == t.id for task_id, t in manager._tasks.items())
+        )
+        self.assertEqual(
+            list(manager._conversations), [f'conv-{i}' for i in range(10)]
+        )
+
+    def test_lookups_by_id(self) -> None:
+        manager = _make_manager()
+        _populate(manager, 1000)
+        self.assertEqual(manager.get_message('msg-42').parts[0].root.text, '42')
+        self.assertIsNone(manager.get_message('missing'))
+        self.assertEqual(len(manager.get_conversation('conv-3').messages), 100)
+        self.assertIsNone(manager.get_conversation('missing'))
+        self.assertEqual(manager.get_task('task-7').id, 'task-7')
+
+    def test_list_apis_keep_insertion_order(self) -> None:
+        manager = _make_manager()
+        _populate(manager, 1000)
+        self.assertEqual(
+            [c.conversation_id for c in manager.conversations],
+            [f'conv-{i}' for i in range(10)],
+        )
+        self.assertEqual(
+            [t.id for t in manager.tasks], [f'task-{i}' for i in range(100)]
+        )
+        self.assertEqual(
+            [m.messageId for m in manager.messages[:3]],
+            ['msg-0', 'msg-1', 'msg-2'],
+        )
+
+    def test_update_task_replaces_in_place(self) -> None:
+        manager = _make_manager()
+        _populate(manager, 100)
+        replacement = Task(
+            id='task-3',
+            contextId='conv-0',
+            status=TaskStatus(state=TaskState.completed),
+        )
+        manager.update_task(replacement)
+        self.assertIs(manager.get_task('task-3'), replacement)
+        self.assertEqual([t.id for t in manager.tasks][3], 'task-3')
+        # Unknown ids are ignored rather than appended
+        manager.update_task(
+            Task(
+                id='other',
+                contextId='conv-0',
+                status=TaskStatus(state=TaskState.completed),
+            )
+        )
+        self.assertIsNone(manager.get_task('other'))
+
+    def test_history_dedupe_survives_task_replacement(self) -> None:
+        manager = _make_manager()
+        first = Message(
+            messageId='h-1',
+            role=Role.agent,
+            parts=[Part(root=A2ATextPart(text='a'))],
+        )
+        second = Message(
+            messageId='h-2',
+            role=Role.agent,
+            parts=[Part(root=A2ATextPart(text='b'))],
+        )
+        task = Task(
+            id='t',
+            contextId='c',
+            status=TaskStatus(state=TaskState.working, message=first),
+        )
+        manager.insert_message_history(task, first)
+        manager.insert_message_history(task, first)
+        task.status.message = second
+        manager.insert_message_history(task, second)
+        self.assertEqual([m.messageId for m in task.history], ['h-1', 'h-2'])
+        # A callback may hand over a fresh Task object with its own history
+        task.history = [first]
+        manager.insert_message_history(task, second)
+        self.assertEqual([m.messageId for m in task.history], ['h-1', 'h-2'])
+
+    def test_history_cache_evicted_when_task_replaced(self) -> None:
+        manager = _make_manager()
+        _populate(manager, 100)
+        task = manager.get_task('task-3')
+        manager._history_message_ids(task)
+        self.assertIn('task-3', manager._task_history_ids)
+        # Re-storing the same object keeps the cache entry
+        manager.update_task(task)
+        self.assertIn('task-3', manager._task_history_ids)
+        manager.update_task(
+            Task(
+                id='task-3',
+                contextId='conv-0',
+                status=TaskStatus(state=TaskState.completed),
+            )
+        )
+        self.assertNotIn('task-3', manager._task_history_ids)
+
+    def test_delete_conversation_cleans_up_indexes(self) -> None:
+        manager = _make_manager()
+        _populate(manager, 300)
+        for message in manager.messages:
+            manager.add_event(
+                Event(
+                    id=f'event-{message.messageId}',
+                    actor='agent',
+                    content=message,
+                    timestamp=0,
+                )
+            )
+        for task in manager.tasks:
+            manager._history_message_ids(task)
+
+        self.assertTrue(manager.delete_conversation('conv-1'))
+        self.assertFalse(manager.delete_conversation('conv-1'))
+        self.assertIsNone(manager.get_conversation('conv-1'))
+        self.assertIsNone(manager.get_message('msg-150'))
+        self.assertIsNone(manager.get_task('task-15'))
+        self.assertEqual(len(manager._message_index), 200)
+        for message_id, position in manager._message_index.items():
+            self.assertEqual(manager._messages[position].messageId, message_id)
+        self.assertEqual(
+            manager.get_message('msg-250').parts[0].root.text, '250'
+        )
+        self.assertEqual(len(manager._tasks), 20)
+        self.assertEqual(set(manager._task_history_ids), set(manager._tasks))
+        self.assertNotIn('msg-150', manager._task_map)
+        self.assertNotIn('msg-150', manager._pending_message_ids)
+        self.assertEqual(manager.events_since(0, 'conv-1')[0], [])
+        self.assertEqual(len(manager.events), 200)
+
+    @unittest.skipUnless(
+        os.getenv('ADK_HOST_BENCHMARK'),
+        'timing benchmark; set ADK_HOST_BENCHMARK=1 to run',
+    )
+    def test_lookup_cost_is_flat_at_100k_messages(self) -> None:
+        small = _make_manager()
+        _populate(small, 1_000)
+        large = _make_manager()
+        _populate(large, 100_000)
+
+        small_s = _time_lookups(small, 1_000)
+        large_s = _time_lookups(large, 100_000)
+        # Linear scans would be ~100x slower; allow generous timing noise.
+        self.assertLess(large_s, small_s * 5)
+
+
 if __name__ == '__main__':
     unittest.main()
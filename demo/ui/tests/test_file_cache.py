@@ -0,0 +1,106 @@
+import asyncio
+import base64
+import unittest
+
+from a2a.types import FilePart, FileWithBytes, Message, Part, Role
+from service.server.file_cache import FileCache
+from service.server.server import ConversationServer
+
+
+class _FakeRequest:
+    def __init__(self, headers: dict | None = None) -> None:
+        self.headers = headers or {}
+
+
+def _file_message(index: int, payload: bytes) -> Message:
+    return Message(
+        messageId=f'msg-{index}',
+        contextId='conv-0',
+        role=Role.agent,
+        parts=[
+            Part(
+                root=FilePart(
+                    file=FileWithBytes(
+                        bytes=base64.b64encode(payload).decode('ascii'),
+                        mimeType='application/octet-stream',
+                    )
+                )
+            )
+        ],
+    )
+
+
+async def _read_body(response) -> bytes:
+    chunks = []
+    async for chunk in response.body_iterator:
+        chunks.append(chunk)
+    return b''.join(chunks)
+
+
+class FileCacheEvictionTest(unittest.TestCase):
+    """Evicted attachments of a live conversation can still be downloaded."""
+
+    def setUp(self) -> None:
+        # Everything spills to disk; the disk tier holds one 1 KB file
+        self.cache = FileCache(
+            max_memory_bytes=0, spill_bytes=0, max_disk_bytes=1500
+        )
+        self.addCleanup(self.cache.clear)
+        self.server = ConversationServer.__new__(ConversationServer)
+        self.server._file_cache = self.cache
+        self.server._get_message_id = lambda m: m.messageId
+        self.payloads = [bytes([i]) * 1024 for i in range(3)]
+        self.messages = [
+            _file_message(i, data) for i, data in enumerate(self.payloads)
+        ]
+
+    def _cache_id(self, message: Message) -> str:
+        return message.parts[0].root.file.uri.rsplit('/', 1)[-1]
+
+    def _download(self, cache_id: str):
+        response = self.server._files(cache_id, _FakeRequest())
+        body = None
+        if response.status_code == 200:
+            body = asyncio.run(_read_body(response))
+        return response.status_code, body
+
+    def test_stored_messages_keep_their_bytes(self) -> None:
+        listed = self.server._cache_content(self.messages)
+        self.assertTrue(listed[0].parts[0].root.file.uri)
+        self.assertIsNotNone(self.messages[0].parts[0].root.file.bytes)
+
+    def test_relist_recovers_evicted_attachment(self) -> None:
+        first_id = self._cache_id(
+            self.server._cache_content(self.messages[:1])[0]
+        )
+        # Pushes the disk tier past its limit and evicts the first file
+        self.server._cache_content(self.messages[1:])
+        self.assertEqual(self.cache.stats()['evicted'], 2)
+        self.assertEqual(self._download(first_id)[0], 404)
+
+        # A client paging back to the older message gets a fresh link
+        relisted = self.server._cache_content(self.messages[:1])
+        status, body = self._download(self._cache_id(relisted[0]))
+        self.assertEqual(status, 200)
+        self.assertEqual(body, self.payloads[0])
+
+    def test_spill_moves_memory_entries_to_disk(self) -> None:
+        cache = FileCache(
+            max_memory_bytes=1500, spill_bytes=4096, max_disk_bytes=1 << 20
+        )
+        self.addCleanup(cache.clear)
+        ids = [
+            cache.put(f'p{i}', base64.b64encode(data), 'text/plain')
+            for i, data in enumerate(self.payloads)
+        ]
+        stats = cache.stats()
+        self.assertLessEqual(stats['memory_bytes'], 1500)
+        self.assertEqual(stats['disk_bytes'], 2048)
+        for cache_id, data in zip(ids, self.payloads):
+            entry = cache.get(cache_id)
+            body = cache.open_range(entry, 0, entry.size - 1)
+            self.assertEqual(b''.join(body), data)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import unittest
+
+from summer_memory.quintuple_graph import write_quintuples_to_neo4j
+
+
+class RecordingTransaction:
+    """Stand-in for a py2neo transaction that records issued statements."""
+
+    def __init__(self, graph: 'RecordingGraph') -> None:
+        self.graph = graph
+        self.statements = []
+
+    def run(self, cypher: str, **params) -> None:
+        if self.graph.fail_next:
+            error = self.graph.fail_next.pop(0)
+            raise error
+        self.statements.append((cypher, params))
+
+
+class RecordingGraph:
+    """Stand-in for py2neo.Graph: begin() / commit(tx) / rollback(tx)."""
+
+    def __init__(self, fail_next=None) -> None:
+        self.fail_next = list(fail_next or [])
+        self.begun = 0
+        self.committed = []
+        self.rolled_back = 0
+
+    def begin(self) -> RecordingTransaction:
+        self.begun += 1
+        return RecordingTransaction(self)
+
+    def commit(self, tx: RecordingTransaction) -> None:
+        self.committed.append(tx)
+
+    def rollback(self, tx: RecordingTransaction) -> None:
+        self.rolled_back += 1
+
+
+class TransientError(Exception):
+    pass
+
+
+class WriteQuintuplesToNeo4jTest(unittest.TestCase):
+    """Tests for the batched UNWIND writer used by store_quintuples."""
+
+    def setUp(self) -> None:
+        self.quintuples = [
+            ('张三', '人物', '参加', '组会', '事件'),
+            ('李四', '人物', '参加', '组会', '事件'),
+            ('张三', '人物', '认识', '李四', '人物'),
+        ]
+
+    def test_single_transaction_one_statement_per_kind(self) -> None:
+        """Entities and each relation type are written in one statement each."""
+        graph = RecordingGraph()
+        written = write_quintuples_to_neo4j(graph, self.quintuples)
+
+        self.assertEqual(written, 3)
+        self.assertEqual(graph.begun, 1)
+        self.assertEqual(len(graph.committed), 1)
+        statements = graph.committed[0].statements
+        self.assertEqual(len(statements), 3)
+
+        entity_cypher, entity_params = statements[0]
+        self.assertIn('UNWIND $rows', entity_cypher)
+        self.assertEqual(
+            [row['name'] for row in entity_params['rows']],
+            ['张三', '组会', '李四'],
+        )
+        self.assertIn('[r:`参加`]', statements[1][0])
+        self.assertEqual(len(statements[1][1]['rows']), 2)
+        self.assertIn('[r:`认识`]', statements[2][0])
+
+    def test_batch_size_splits_rows(self) -> None:
+        """Rows beyond batch_size go into additional statements."""
+        graph = RecordingGraph()
+        quintuples = [(f'e{i}', 'T', 'rel', f'f{i}', 'T') for i in range(5)]
+        write_quintuples_to_neo4j(graph, quintuples, batch_size=2)
+
+        statements = graph.committed[0].statements
+        sizes = [len(params['rows']) for _, params in statements]
+        # 10 entities -> 2+2+2+2+2, 5 relations -> 2+2+1
+        self.assertEqual(sizes, [2, 2, 2, 2, 2, 2, 2, 1])
+
+    def test_relation_type_is_escaped(self) -> None:
+        """Backticks in relation names cannot break out of the type literal."""
+        graph = RecordingGraph()
+        write_quintuples_to_neo4j(graph, [('a', 'T', 'x`y', 'b', 'T')])
+        self.assertIn('[r:`x``y`]', graph.committed[0].statements[1][0])
+
+    def test_invalid_quintuples_are_skipped(self) -> None:
+        """Quintuples without head, relation or tail issue no statements."""
+        graph = RecordingGraph()
+        written = write_quintuples_to_neo4j(graph, [('', 'T', 'r', 'b', 'T')])
+        self.assertEqual(written, 0)
+        self.assertEqual(graph.begun, 0)
+
+    def test_transient_error_retries_whole_transaction(self) -> None:
+        """A transient failure rolls back and replays the transaction."""
+        graph = RecordingGraph(fail_next=[TransientError('Neo.TransientError')])
+        written = write_quintuples_to_neo4j(
+            graph, self.quintuples, max_retries=2, backoff_base=0
+        )
+        self.assertEqual(written, 3)
+        self.assertEqual(graph.begun, 2)
+        self.assertEqual(graph.rolled_back, 1)
+        self.assertEqual(len(graph.committed), 1)
+
+    def test_non_transient_error_is_raised(self) -> None:
+        """Other errors roll back and propagate without retrying."""
+        graph = RecordingGraph(fail_next=[ValueError('syntax error')])
+        with self.assertRaises(ValueError):
+            write_quintuples_to_neo4j(
+                graph, self.quintuples, max_retries=2, backoff_base=0
+            )
+        self.assertEqual(graph.begun, 1)
+        self.assertEqual(graph.rolled_back, 1)
+        self.assertEqual(graph.committed, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -132,114 +132,123 @@ class OrchestratorAgent(BaseAgent):
             )
             start_node_id = planner_node.id
         # Paused state is when the agent might need more information.
+        # Only one question is shown at a time; the reply answers the node
+        # that asked it, other paused nodes are asked on later turns.
         elif self.graph.state == Status.PAUSED:
             start_node_id = self.graph.paused_node_id
             self.set_node_attributes(node_id=start_node_id, query=query)
 
-        # This loop can be avoided if the workflow graph is dynamic or
-        # is built from the results of the planner when the planner
-        # iself is not a part of the graph.
-        # TODO: Make the graph dynamically iterable over edges
-        while True:
-            # Set attributes on the node so we propagate task and context
-            self.set_node_attributes(
-                node_id=start_node_id,
-                task_id=task_id,
-                context_id=context_id,
-            )
-            # Resume workflow, used when the workflow nodes are updated.
-            should_resume_workflow = False
-            async for chunk in self.graph.run_workflow(
-                start_node_id=start_node_id
-            ):
-                if isinstance(chunk.root, SendStreamingMessageSuccessResponse):
-                    # The graph node retured TaskStatusUpdateEvent
-                    # Check if the node is complete and continue to the next node
-                    if isinstance(chunk.root.result, TaskStatusUpdateEvent):
-                        task_status_event = chunk.root.result
-                        context_id = task_status_event.contextId
-                        if (
-                            task_status_event.status.state
-                            == TaskState.completed
-                            and context_id
-                        ):
-                            ## yeild??
-                            continue
-                        if (
-                            task_status_event.status.state
-                            == TaskState.input_required
-                        ):
-                            question = task_status_event.status.message.parts[
-                                0
-                            ].root.text
-
-                            try:
-                                answer = json.loads(
-                                    self.answer_user_question(question)
-                                )
-                                logger.info(f'Agent Answer {answer}')
-                                if answer['can_answer'] == 'yes':
-                                    # Orchestrator can answer on behalf of the user set the query
-                                    # Resume workflow from paused state.
-                                    query = answer['answer']
-                                    start_node_id = self.graph.paused_node_id
-                                    self.set_node_attributes(
-                                        node_id=start_node_id, query=query
-                                    )
-                                    should_resume_workflow = True
-                            except Exception:
-                                logger.info('Cannot convert answer data')
-
-                    # The graph node retured TaskArtifactUpdateEvent
-                    # Store the node and continue.
-                    if isinstance(chunk.root.result, TaskArtifactUpdateEvent):
-                        artifact = chunk.root.result.artifact
-                        self.results.append(artifact)
-                        if artifact.name == 'PlannerAgent-result':
-                            # Planning agent returned data, update graph.
-                            artifact_data = artifact.parts[0].root.data
-                            if 'trip_info' in artifact_data:
-                                self.travel_context = artifact_data['trip_info']
-                            logger.info(
-                                f'Updating workflow with {len(artifact_data["tasks"])} task nodes'
-                            )
-                            # Define the edges
-                            current_node_id = start_node_id
-                            for idx, task_data in enumerate(
-                                artifact_data['tasks']
+        # Nodes share one MCP session and HTTP client per turn; close them
+        # before returning to the user.
+        try:
+            # This loop can be avoided if the workflow graph is dynamic or
+            # is built from the results of the planner when the planner
+            # iself is not a part of the graph.
+            # TODO: Make the graph dynamically iterable over edges
+            while True:
+                # Set attributes on the node so we propagate task and context
+                self.set_node_attributes(
+                    node_id=start_node_id,
+                    task_id=task_id,
+                    context_id=context_id,
+                )
+                # Resume workflow, used when the workflow nodes are updated.
+                should_resume_workflow = False
+                async for node, chunk in self.graph.stream_workflow(
+                    start_node_id=start_node_id
+                ):
+                    if isinstance(chunk.root, SendStreamingMessageSuccessResponse):
+                        # The graph node retured TaskStatusUpdateEvent
+                        # Check if the node is complete and continue to the next node
+                        if isinstance(chunk.root.result, TaskStatusUpdateEvent):
+                            task_status_event = chunk.root.result
+                            context_id = task_status_event.contextId
+                            if (
+                                task_status_event.status.state
+                                == TaskState.completed
+                                and context_id
                             ):
-                                node = self.add_graph_node(
-                                    task_id=task_id,
-                                    context_id=context_id,
-                                    query=task_data['description'],
-                                    node_id=current_node_id,
+                                ## yeild??
+                                continue
+                            if (
+                                task_status_event.status.state
+                                == TaskState.input_required
+                            ):
+                                question = task_status_event.status.message.parts[
+                                    0
+                                ].root.text
+
+                                try:
+                                    answer = json.loads(
+                                        self.answer_user_question(question)
+                                    )
+                                    logger.info(f'Agent Answer {answer}')
+                                    if answer['can_answer'] == 'yes':
+                                        # Orchestrator can answer on behalf of the user set the query
+                                        # Resume workflow from paused state.
+                                        query = answer['answer']
+                                        start_node_id = node.id
+                                        self.set_node_attributes(
+                                            node_id=start_node_id, query=query
+                                        )
+                                        node.state = Status.READY
+                                        should_resume_workflow = True
+                                except Exception:
+                                    logger.info('Cannot convert answer data')
+
+                        # The graph node retured TaskArtifactUpdateEvent
+                        # Store the node and continue.
+                        if isinstance(chunk.root.result, TaskArtifactUpdateEvent):
+                            artifact = chunk.root.result.artifact
+                            self.results.append(artifact)
+                            if artifact.name == 'PlannerAgent-result':
+                                # Planning agent returned data, update graph.
+                                artifact_data = artifact.parts[0].root.data
+                                if 'trip_info' in artifact_data:
+                                    self.travel_context = artifact_data['trip_info']
+                                logger.info(
+                                    f'Updating workflow with {len(artifact_data["tasks"])} task nodes'
                                 )
-                                current_node_id = node.id
-                                # Restart graph from the newly inserted subgraph state
-                                # Start from the new node just created.
-                                if idx == 0:
-                                    should_resume_workflow = True
-                                    start_node_id = node.id
-                        else:
-                            # Not planner but artifacts from other tasks,
-                            # continue to the next node in the workflow.
-                            # client does not get the artifact,
-                            # a summary is shown at the end of the workflow.
-                            continue
-                # When the workflow needs to be resumed, do not yield partial.
+                                # Define the edges: the planned tasks (flights,
+                                # hotel, car) are independent, so each depends
+                                # only on the planner and they run in parallel.
+                                planner_node_id = node.id
+                                for idx, task_data in enumerate(
+                                    artifact_data['tasks']
+                                ):
+                                    task_node = self.add_graph_node(
+                                        task_id=task_id,
+                                        context_id=context_id,
+                                        query=task_data['description'],
+                                        node_id=planner_node_id,
+                                    )
+                                    # Restart graph from the newly inserted subgraph state
+                                    # Start from the new nodes just created.
+                                    if idx == 0:
+                                        should_resume_workflow = True
+                                        start_node_id = task_node.id
+                            else:
+                                # Not planner but artifacts from other tasks,
+                                # continue to the next node in the workflow.
+                                # client does not get the artifact,
+                                # a summary is shown at the end of the workflow.
+                                continue
+                    # When the workflow needs to be resumed, do not yield partial.
+                    if not should_resume_workflow:
+                        logger.info('No workflow resume detected, yielding chunk')
+                        # Yield partial execution
+                        yield chunk
+                # The graph is complete and no updates, so okay to break from the loop.
                 if not should_resume_workflow:
-                    logger.info('No workflow resume detected, yielding chunk')
-                    # Yield partial execution
-                    yield chunk
-            # The graph is complete and no updates, so okay to break from the loop.
-            if not should_resume_workflow:
-                logger.info(
-                    'Workflow iteration complete and no restart requested. Exiting main loop.'
-                )
-                break
-            else:
-                # Readable logs
-                logger.info('Restarting workflow loop.')
+                    logger.info(
+                        'Workflow iteration complete and no restart requested. Exiting main loop.'
+                    )
+                    break
+                else:
+                    # Readable logs
+                    logger.info('Restarting workflow loop.')
+        finally:
+            await self.graph.aclose()
         if self.graph.state == Status.COMPLETED:
             # All individual actions complete, now generate the summary
             logger.info(f'Generating summary for {len(self.results)} results')
@@ -1,8 +1,12 @@
+import asyncio
 import json
 import logging
+import os
+import time
 import uuid
 
 from collections.abc import AsyncIterable
+from contextlib import AsyncExitStack, asynccontextmanager
 from enum import Enum
 from uuid import uuid4
 
@@ -21,10 +25,16 @@ from a2a.types import (
 )
 from a2a_mcp.common.utils import get_mcp_server_config
 from a2a_mcp.mcp import client
+from mcp import ClientSession
 
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on workflow nodes running at the same time.
+MAX_PARALLELISM = int(os.getenv('A2A_WORKFLOW_MAX_PARALLELISM', '4'))
+HTTP_MAX_CONNECTIONS = int(os.getenv('A2A_WORKFLOW_HTTP_MAX_CONNECTIONS', '20'))
+_NODE_DONE = object()
+
 
 class Status(Enum):
     """Represents the status of a workflow and its associated node."""
@@ -36,6 +46,82 @@ class Status(Enum):
     INITIALIZED = 'INITIALIZED'
 
 
+@asynccontextmanager
+async def _mcp_session(session: ClientSession | None = None):
+    """Yields session, or a new MCP session when none is shared."""
+    if session is not None:
+        yield session
+        return
+    config = get_mcp_server_config()
+    async with client.init_session(
+        config.host, config.port, config.transport
+    ) as new_session:
+        yield new_session
+
+
+class WorkflowResources:
+    """Connections shared by every node of a workflow graph.
+
+    One MCP client session and one pooled HTTP client are opened on first
+    use and kept until aclose(), instead of a handshake per node.
+    """
+
+    def __init__(self):
+        self._lock = asyncio.Lock()
+        self._session: ClientSession | None = None
+        self._session_task: asyncio.Task | None = None
+        self._close_event: asyncio.Event | None = None
+        self._http_client: httpx.AsyncClient | None = None
+        self.mcp_sessions_opened = 0
+        self.http_clients_opened = 0
+
+    async def mcp_session(self) -> ClientSession:
+        async with self._lock:
+            if self._session is None or self._session_task.done():
+                ready = asyncio.get_running_loop().create_future()
+                self._close_event = asyncio.Event()
+                self._session_task = asyncio.create_task(
+                    self._hold_session(ready, self._close_event)
+                )
+                self._session = await ready
+                self.mcp_sessions_opened += 1
+            return self._session
+
+    async def _hold_session(
+        self, ready: asyncio.Future, close_event: asyncio.Event
+    ):
+        # The transport's task group must be entered and exited by the same
+        # task, so one task owns the session while nodes share it.
+        try:
+            async with _mcp_session() as session:
+                ready.set_result(session)
+                await close_event.wait()
+        except Exception as e:
+            if not ready.done():
+                ready.set_exception(e)
+            else:
+                logger.warning(f'Workflow MCP session closed: {e}')
+
+    def http_client(self) -> httpx.AsyncClient:
+        if self._http_client is None or self._http_client.is_closed:
+            self._http_client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS)
+            )
+            self.http_clients_opened += 1
+        return self._http_client
+
+    async def aclose(self):
+        if self._close_event is not None:
+            self._close_event.set()
+        if self._session_task is not None:
+            await asyncio.gather(self._session_task, return_exceptions=True)
+        self._session = None
+        self._session_task = None
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+
+
 class WorkflowNode:
     """Represents a single node in a workflow graph.
 
@@ -57,25 +143,27 @@ class WorkflowNode:
         self.task = task
         self.results = None
         self.state = Status.READY
+        # Seconds spent resolving the agent and connecting, last run.
+        self.setup_s: float | None = None
+        # The input_required chunk this node is waiting on while PAUSED.
+        self.pending_question = None
 
-    async def get_planner_resource(self) -> AgentCard | None:
+    async def get_planner_resource(
+        self, session: ClientSession | None = None
+    ) -> AgentCard | None:
         logger.info(f'Getting resource for node {self.id}')
-        config = get_mcp_server_config()
-        async with client.init_session(
-            config.host, config.port, config.transport
-        ) as session:
+        async with _mcp_session(session) as session:
             response = await client.find_resource(
                 session, 'resource://agent_cards/planner_agent'
             )
             data = json.loads(response.contents[0].text)
             return AgentCard(**data['agent_card'][0])
 
-    async def find_agent_for_task(self) -> AgentCard | None:
+    async def find_agent_for_task(
+        self, session: ClientSession | None = None
+    ) -> AgentCard | None:
         logger.info(f'Find agent for task - {self.task}')
-        config = get_mcp_server_config()
-        async with client.init_session(
-            config.host, config.port, config.transport
-        ) as session:
+        async with _mcp_session(session) as session:
             result = await client.find_agent(session, self.task)
             agent_card_json = json.loads(result.content[0].text)
             logger.debug(f'Found agent {agent_card_json} for task {self.task}')
@@ -86,15 +174,28 @@ class WorkflowNode:
         query: str,
         task_id: str,
         context_id: str,
+        resources: WorkflowResources | None = None,
     ) -> AsyncIterable[dict[str, any]]:
         logger.info(f'Executing node {self.id}')
+        started = time.perf_counter()
+        session = await resources.mcp_session() if resources else None
         agent_card = None
         if self.node_key == 'planner':
-            agent_card = await self.get_planner_resource()
+            agent_card = await self.get_planner_resource(session)
         else:
-            agent_card = await self.find_agent_for_task()
-        async with httpx.AsyncClient() as httpx_client:
+            agent_card = await self.find_agent_for_task(session)
+        async with AsyncExitStack() as stack:
+            if resources is not None:
+                httpx_client = resources.http_client()
+            else:
+                httpx_client = await stack.enter_async_context(
+                    httpx.AsyncClient()
+                )
             client = A2AClient(httpx_client, agent_card)
+            self.setup_s = time.perf_counter() - started
+            logger.info(
+                f'Node {self.id} setup took {self.setup_s * 1000:.1f} ms'
+            )
 
             payload: dict[str, any] = {
                 'message': {
@@ -120,15 +221,21 @@ class WorkflowNode:
 
 
 class WorkflowGraph:
-    """Represents a graph of workflow nodes."""
+    """Represents a graph of workflow nodes.
 
-    def __init__(self):
+    Nodes run as soon as all of their predecessors are complete, up to
+    max_parallelism at a time, so independent branches overlap.
+    """
+
+    def __init__(self, max_parallelism: int | None = None):
         self.graph = nx.DiGraph()
         self.nodes = {}
         self.latest_node = None
         self.node_type = None
         self.state = Status.INITIALIZED
         self.paused_node_id = None
+        self.max_parallelism = max(1, max_parallelism or MAX_PARALLELISM)
+        self.resources = WorkflowResources()
 
     def add_node(self, node) -> None:
         logger.info(f'Adding node {node.id}')
@@ -145,55 +252,159 @@ class WorkflowGraph:
     async def run_workflow(
         self, start_node_id: str = None
     ) -> AsyncIterable[dict[str, any]]:
-        logger.info('Executing workflow graph')
-        if not start_node_id or start_node_id not in self.nodes:
-            start_nodes = [n for n, d in self.graph.in_degree() if d == 0]
-        else:
-            start_nodes = [self.nodes[start_node_id].id]
+        async for _, chunk in self.stream_workflow(start_node_id):
+            yield chunk
 
-        applicable_graph = set()
+    async def stream_workflow(
+        self, start_node_id: str = None
+    ) -> AsyncIterable[tuple[WorkflowNode, any]]:
+        """Runs the pending nodes and yields (node, chunk) as chunks arrive.
 
-        for node_id in start_nodes:
-            applicable_graph.add(node_id)
-            applicable_graph.update(nx.descendants(self.graph, node_id))
+        Pending nodes are those not yet completed or paused, plus
+        start_node_id (e.g. a paused node being resumed). Nodes added while
+        this runs are picked up by the next call. When a node pauses for
+        input, no further nodes are started; nodes already running finish.
 
-        complete_graph = list(nx.topological_sort(self.graph))
-        sub_graph = [n for n in complete_graph if n in applicable_graph]
-        logger.info(f'Sub graph {sub_graph} size {len(sub_graph)}')
+        Parallel nodes may pause in the same run, but only one question is
+        put to the user at a time: paused_node_id names the node whose
+        question was yielded, and the user's reply belongs to it. The other
+        paused nodes keep their question, and the next run that ends without
+        a new pause yields the oldest of them.
+        """
+        logger.info('Executing workflow graph')
+        pending = {
+            node_id
+            for node_id, node in self.nodes.items()
+            if node.state in (Status.READY, Status.RUNNING)
+        }
+        if start_node_id in self.nodes:
+            pending.add(start_node_id)
+        order = [n for n in nx.topological_sort(self.graph) if n in pending]
+        logger.info(
+            f'Sub graph {order} size {len(order)}, '
+            f'max parallelism {self.max_parallelism}'
+        )
         self.state = Status.RUNNING
-        # Alternative is to loop over all nodes, but we only need the connected nodes.
-        for node_id in sub_graph:
-            node = self.nodes[node_id]
-            node.state = Status.RUNNING
-            query = self.graph.nodes[node_id].get('query')
-            task_id = self.graph.nodes[node_id].get('task_id')
-            context_id = self.graph.nodes[node_id].get('context_id')
-            async for chunk in node.run_node(query, task_id, context_id):
+        self.paused_node_id = None
+        events = asyncio.Queue(maxsize=16 * self.max_parallelism)
+        running: dict[str, asyncio.Task] = {}
+
+        async def run(node: WorkflowNode):
+            attrs = self.graph.nodes[node.id]
+            try:
+                async for chunk in node.run_node(
+                    attrs.get('query'),
+                    attrs.get('task_id'),
+                    attrs.get('context_id'),
+                    resources=self.resources,
+                ):
+                    await events.put((node, chunk))
+                await events.put((node, _NODE_DONE))
+            except Exception as e:
+                await events.put((node, e))
+
+        def is_ready(node_id: str) -> bool:
+            return node_id == start_node_id or all(
+                self.nodes[p].state == Status.COMPLETED
+                for p in self.graph.predecessors(node_id)
+            )
+
+        def launch_ready():
+            for node_id in list(order):
+                if (
+                    self.state == Status.PAUSED
+                    or len(running) >= self.max_parallelism
+                ):
+                    return
+                if is_ready(node_id):
+                    order.remove(node_id)
+                    node = self.nodes[node_id]
+                    node.state = Status.RUNNING
+                    node.pending_question = None
+                    running[node_id] = asyncio.create_task(run(node))
+
+        try:
+            launch_ready()
+            while running:
+                node, item = await events.get()
+                if item is _NODE_DONE:
+                    running.pop(node.id, None)
+                    if node.state == Status.RUNNING:
+                        node.state = Status.COMPLETED
+                    launch_ready()
+                    continue
+                if isinstance(item, Exception):
+                    running.pop(node.id, None)
+                    node.state = Status.READY
+                    raise item
+                chunk = item
                 # When the workflow node is paused, do not yeild any chunks
-                # but, let the loop complete.
-                if node.state != Status.PAUSED:
-                    if isinstance(
-                        chunk.root, SendStreamingMessageSuccessResponse
-                    ) and (
-                        isinstance(chunk.root.result, TaskStatusUpdateEvent)
+                # but, let the node complete.
+                if node.state == Status.PAUSED:
+                    continue
+                if isinstance(
+                    chunk.root, SendStreamingMessageSuccessResponse
+                ) and (isinstance(chunk.root.result, TaskStatusUpdateEvent)):
+                    task_status_event = chunk.root.result
+                    if (
+                        task_status_event.status.state
+                        == TaskState.input_required
+                        and task_status_event.contextId
                     ):
-                        task_status_event = chunk.root.result
-                        context_id = task_status_event.contextId
-                        if (
-                            task_status_event.status.state
-                            == TaskState.input_required
-                            and context_id
-                        ):
-                            node.state = Status.PAUSED
-                            self.state = Status.PAUSED
-                            self.paused_node_id = node.id
-                    yield chunk
-            if self.state == Status.PAUSED:
-                break
-            if node.state == Status.RUNNING:
-                node.state = Status.COMPLETED
+                        node.state = Status.PAUSED
+                        node.pending_question = chunk
+                        self.state = Status.PAUSED
+                        if self.paused_node_id is not None:
+                            # A question is already with the user; hold this
+                            # one until that node has been answered.
+                            continue
+                        self.paused_node_id = node.id
+                yield node, chunk
+        finally:
+            for task in running.values():
+                task.cancel()
+            await asyncio.gather(*running.values(), return_exceptions=True)
+
         if self.state == Status.RUNNING:
-            self.state = Status.COMPLETED
+            # Nodes paused in an earlier run still block their successors.
+            paused = [
+                node_id
+                for node_id, node in self.nodes.items()
+                if node.state == Status.PAUSED
+            ]
+            if paused:
+                self.state = Status.PAUSED
+                node = self.nodes[paused[0]]
+                self.paused_node_id = node.id
+                if node.pending_question is not None:
+                    yield node, node.pending_question
+            else:
+                self.state = Status.COMPLETED
+
+    def setup_report(self) -> dict[str, any]:
+        """Per-node setup time and the connections opened for the workflow."""
+        per_node = {
+            node.node_label or node.id: round(node.setup_s * 1000, 1)
+            for node in self.nodes.values()
+            if node.setup_s is not None
+        }
+        return {
+            'node_setup_ms': per_node,
+            'total_setup_ms': round(sum(per_node.values()), 1),
+            'mcp_sessions_opened': self.resources.mcp_sessions_opened,
+            'http_clients_opened': self.resources.http_clients_opened,
+        }
+
+    async def aclose(self):
+        """Closes the connections shared by the workflow's nodes."""
+        logger.info(f'Workflow setup report {self.setup_report()}')
+        await self.resources.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
 
     def set_node_attribute(self, node_id, attribute, value):
         nx.set_node_attributes(self.graph, {node_id: value}, attribute)
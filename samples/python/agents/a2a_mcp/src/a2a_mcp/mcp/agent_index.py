@@ -0,0 +1,238 @@
+# type: ignore
+"""In-memory vector index over agent cards for the find_agent tool."""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+
+from collections import OrderedDict
+from pathlib import Path
+from typing import Protocol
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+MODEL = 'models/embedding-001'
+# 'genai' (Google Generative AI) or 'local' (offline hashing embedder).
+EMBEDDER = os.getenv('A2A_MCP_EMBEDDER', 'genai')
+EMBEDDING_CACHE_PATH = os.getenv(
+    'A2A_MCP_EMBEDDING_CACHE', '.cache/agent_card_embeddings.json'
+)
+QUERY_CACHE_SIZE = int(os.getenv('A2A_MCP_QUERY_CACHE_SIZE', '1024'))
+EMBED_BATCH_SIZE = 100
+
+
+class Embedder(Protocol):
+    """Turns text into embedding vectors."""
+
+    name: str
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]: ...
+
+    def embed_query(self, text: str) -> list[float]: ...
+
+
+class GenAIEmbedder:
+    """Google Generative AI embeddings; documents are embedded in batches."""
+
+    def __init__(self, model: str = MODEL):
+        self.model = model
+        self.name = f'genai:{model}'
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        import google.generativeai as genai
+
+        embeddings = []
+        for start in range(0, len(texts), EMBED_BATCH_SIZE):
+            embeddings.extend(
+                genai.embed_content(
+                    model=self.model,
+                    content=texts[start : start + EMBED_BATCH_SIZE],
+                    task_type='retrieval_document',
+                )['embedding']
+            )
+        return embeddings
+
+    def embed_query(self, text: str) -> list[float]:
+        import google.generativeai as genai
+
+        return genai.embed_content(
+            model=self.model, content=text, task_type='retrieval_query'
+        )['embedding']
+
+
+class HashingEmbedder:
+    """Deterministic bag-of-words hashing embedder that needs no network.
+
+    Good enough to route between a handful of agent cards offline and in
+    tests; use GenAIEmbedder for real semantic matching.
+    """
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+        self.name = f'local-hashing:{dim}'
+
+    def _embed(self, text: str) -> list[float]:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for token in re.findall(r'[a-z0-9]+', text.lower()):
+            digest = hashlib.blake2b(token.encode(), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], 'little') % self.dim
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        return vector.tolist()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._embed(text)
+
+
+def default_embedder() -> Embedder:
+    if EMBEDDER == 'local':
+        return HashingEmbedder()
+    return GenAIEmbedder()
+
+
+class EmbeddingCache:
+    """On-disk card embeddings keyed by embedder name and card content hash."""
+
+    def __init__(self, path: str | None = EMBEDDING_CACHE_PATH):
+        self.path = Path(path) if path else None
+        self._entries: dict[str, list[float]] = {}
+        if self.path and self.path.is_file():
+            try:
+                self._entries = json.loads(self.path.read_text('utf-8'))
+            except (OSError, ValueError) as e:
+                logger.warning(f'Ignoring unreadable embedding cache: {e}')
+
+    @staticmethod
+    def key(embedder_name: str, text: str) -> str:
+        return hashlib.sha256(f'{embedder_name}\0{text}'.encode()).hexdigest()
+
+    def get(self, key: str) -> list[float] | None:
+        return self._entries.get(key)
+
+    def put_many(self, items: dict[str, list[float]]) -> None:
+        self._entries.update(items)
+
+    def save(self, keep: set[str] | None = None) -> None:
+        """Writes the cache atomically, optionally pruning keys not in keep."""
+        if not self.path:
+            return
+        if keep is not None:
+            self._entries = {
+                k: v for k, v in self._entries.items() if k in keep
+            }
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(self.path.suffix + '.tmp')
+            tmp.write_text(json.dumps(self._entries), 'utf-8')
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logger.warning(f'Could not write embedding cache {self.path}: {e}')
+
+
+class AgentCardIndex:
+    """Normalized embedding matrix of agent cards with cached query lookup.
+
+    The matrix is built once; a query costs one embedding (skipped on an LRU
+    hit) and one matrix-vector product.
+    """
+
+    def __init__(
+        self,
+        card_uris: list[str],
+        agent_cards: list[dict],
+        embedder: Embedder | None = None,
+        cache: EmbeddingCache | None = None,
+        query_cache_size: int = QUERY_CACHE_SIZE,
+    ):
+        self.card_uris = list(card_uris)
+        self.agent_cards = list(agent_cards)
+        self.cards_by_uri = dict(zip(self.card_uris, self.agent_cards))
+        self.embedder = embedder or default_embedder()
+        self.query_cache_size = query_cache_size
+        self._query_cache: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+        self.query_hits = 0
+        self.query_misses = 0
+        self.matrix = self._build_matrix(
+            cache if cache is not None else EmbeddingCache()
+        )
+
+    def __len__(self) -> int:
+        return len(self.agent_cards)
+
+    def _build_matrix(self, cache: EmbeddingCache) -> np.ndarray:
+        texts = [json.dumps(card) for card in self.agent_cards]
+        keys = [EmbeddingCache.key(self.embedder.name, t) for t in texts]
+        vectors = [cache.get(k) for k in keys]
+        missing = [i for i, v in enumerate(vectors) if v is None]
+        if missing:
+            logger.info(
+                f'Embedding {len(missing)} of {len(texts)} agent cards '
+                f'({len(texts) - len(missing)} cached)'
+            )
+            fresh = self.embedder.embed_documents([texts[i] for i in missing])
+            for i, vector in zip(missing, fresh):
+                vectors[i] = vector
+            cache.put_many({keys[i]: vectors[i] for i in missing})
+            cache.save(keep=set(keys))
+
+        if not vectors:
+            return np.zeros((0, 0), dtype=np.float32)
+        matrix = np.empty((len(vectors), len(vectors[0])), dtype=np.float32)
+        for i, vector in enumerate(vectors):
+            matrix[i] = vector
+        return _normalize_rows(matrix)
+
+    def _query_vector(self, query: str) -> np.ndarray:
+        key = query.strip()
+        with self._lock:
+            vector = self._query_cache.get(key)
+            if vector is not None:
+                self._query_cache.move_to_end(key)
+                self.query_hits += 1
+                return vector
+        vector = _normalize_rows(
+            np.asarray([self.embedder.embed_query(key)], dtype=np.float32)
+        )[0]
+        with self._lock:
+            self.query_misses += 1
+            self._query_cache[key] = vector
+            while len(self._query_cache) > self.query_cache_size:
+                self._query_cache.popitem(last=False)
+        return vector
+
+    def search(self, query: str, top_k: int = 1) -> list[tuple[int, float]]:
+        """Returns up to top_k (card index, cosine score), best first."""
+        if not len(self):
+            return []
+        scores = self.matrix @ self._query_vector(query)
+        k = max(1, min(top_k, len(scores)))
+        if k < len(scores):
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top])]
+        return [(int(i), float(scores[i])) for i in top]
+
+    def find(self, query: str) -> dict | None:
+        """Returns the agent card most similar to query."""
+        matches = self.search(query, 1)
+        if not matches:
+            return None
+        index, score = matches[0]
+        logger.debug(f'Found best match at index {index} with score {score}')
+        return self.agent_cards[index]
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
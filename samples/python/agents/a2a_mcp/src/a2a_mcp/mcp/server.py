@@ -6,39 +6,20 @@ import traceback
 
 from pathlib import Path
 
-import google.generativeai as genai
-import numpy as np
-import pandas as pd
 import requests
 
 from a2a_mcp.common.utils import init_api_key
+from a2a_mcp.mcp.agent_index import EMBEDDER, AgentCardIndex
 from mcp.server.fastmcp import FastMCP
 from mcp.server.fastmcp.utilities.logging import get_logger
 
 
 logger = get_logger(__name__)
 AGENT_CARDS_DIR = 'agent_cards'
-MODEL = 'models/embedding-001'
 SQLLITE_DB = 'travel_agency.db'
 PLACES_API_URL = 'https://places.googleapis.com/v1/places:searchText'
 
 
-def generate_embeddings(text):
-    """Generates embeddings for the given text using Google Generative AI.
-
-    Args:
-        text: The input string for which to generate embeddings.
-
-    Returns:
-        A list of embeddings representing the input text.
-    """
-    return genai.embed_content(
-        model=MODEL,
-        content=text,
-        task_type='retrieval_document',
-    )['embedding']
-
-
 def load_agent_cards():
     """Loads agent card data from JSON files within a specified directory.
 
@@ -86,31 +67,27 @@ def load_agent_cards():
     return card_uris, agent_cards
 
 
-def build_agent_card_embeddings() -> pd.DataFrame:
-    """Loads agent cards, generates embeddings for them, and returns a DataFrame.
+def build_agent_card_embeddings() -> AgentCardIndex | None:
+    """Loads agent cards and builds their embedding index.
+
+    Cards are embedded in one batch; embeddings of unchanged cards are read
+    from the on-disk cache instead.
 
     Returns:
-        Optional[pd.DataFrame]: A Pandas DataFrame containing the original
-        'agent_card' data and their corresponding 'Embeddings'. Returns None
-        if no agent cards were loaded initially or if an exception occurred
-        during the embedding generation process.
+        Optional[AgentCardIndex]: The index over the loaded agent cards.
+        Returns None if no agent cards were loaded or if an exception
+        occurred during the embedding generation process.
     """
     card_uris, agent_cards = load_agent_cards()
     logger.info('Generating Embeddings for agent cards')
     try:
         if agent_cards:
-            df = pd.DataFrame(
-                {'card_uri': card_uris, 'agent_card': agent_cards}
-            )
-            df['card_embeddings'] = df.apply(
-                lambda row: generate_embeddings(json.dumps(row['agent_card'])),
-                axis=1,
-            )
-            return df
-        logger.info('Done generating embeddings for agent cards')
+            index = AgentCardIndex(card_uris, agent_cards)
+            logger.info('Done generating embeddings for agent cards')
+            return index
     except Exception as e:
         logger.error(f'An unexpected error occurred : {e}.', exc_info=True)
-        return None
+    return None
 
 
 def serve(host, port, transport):  # noqa: PLR0915
@@ -124,11 +101,12 @@ def serve(host, port, transport):  # noqa: PLR0915
     Raises:
         ValueError: If the 'GOOGLE_API_KEY' environment variable is not set.
     """
-    init_api_key()
+    if EMBEDDER != 'local':
+        init_api_key()
     logger.info('Starting Agent Cards MCP Server')
     mcp = FastMCP('agent-cards', host=host, port=port)
 
-    df = build_agent_card_embeddings()
+    index = build_agent_card_embeddings()
 
     @mcp.tool(
         name='find_agent',
@@ -138,10 +116,10 @@ def serve(host, port, transport):  # noqa: PLR0915
         """Finds the most relevant agent card based on a query string.
 
         This function takes a user query, typically a natural language question or a task generated by an agent,
-        generates its embedding, and compares it against the
-        pre-computed embeddings of the loaded agent cards. It uses the dot
-        product to measure similarity and identifies the agent card with the
-        highest similarity score.
+        generates its embedding (cached for repeated queries), and compares it
+        against the pre-computed, normalized embeddings of the loaded agent
+        cards. It uses cosine similarity and identifies the agent card with
+        the highest similarity score.
 
         Args:
             query: The natural language query string used to search for a
@@ -151,17 +129,27 @@ def serve(host, port, transport):  # noqa: PLR0915
             The json representing the agent card deemed most relevant
             to the input query based on embedding similarity.
         """
-        query_embedding = genai.embed_content(
-            model=MODEL, content=query, task_type='retrieval_query'
-        )
-        dot_products = np.dot(
-            np.stack(df['card_embeddings']), query_embedding['embedding']
-        )
-        best_match_index = np.argmax(dot_products)
-        logger.debug(
-            f'Found best match at index {best_match_index} with score {dot_products[best_match_index]}'
-        )
-        return df.iloc[best_match_index]['agent_card']
+        return index.find(query)
+
+    @mcp.tool(
+        name='find_agents',
+        description='Finds the top_k most relevant agent cards, with similarity scores, for a natural language query string.',
+    )
+    def find_agents(query: str, top_k: int = 3) -> list[dict]:
+        """Finds the agent cards most relevant to a query string.
+
+        Args:
+            query: The natural language query string used to search for
+                   relevant agents.
+            top_k: The maximum number of agent cards to return.
+
+        Returns:
+            A list of {'agent_card': ..., 'score': ...} entries, best first.
+        """
+        return [
+            {'agent_card': index.agent_cards[i], 'score': score}
+            for i, score in index.search(query, top_k)
+        ]
 
     @mcp.tool()
     def query_places_data(query: str):
@@ -260,7 +248,7 @@ def serve(host, port, transport):  # noqa: PLR0915
         """
         resources = {}
         logger.info('Starting read resources')
-        resources['agent_cards'] = df['card_uri'].to_list()
+        resources['agent_cards'] = list(index.card_uris)
         return resources
 
     @mcp.resource(
@@ -279,12 +267,8 @@ def serve(host, port, transport):  # noqa: PLR0915
         logger.info(
             f'Starting read resource resource://agent_cards/{card_name}'
         )
-        resources['agent_card'] = (
-            df.loc[
-                df['card_uri'] == f'resource://agent_cards/{card_name}',
-                'agent_card',
-            ]
-        ).to_list()
+        card = index.cards_by_uri.get(f'resource://agent_cards/{card_name}')
+        resources['agent_card'] = [card] if card is not None else []
 
         return resources
 
@@ -1,4 +1,7 @@
+import asyncio
 import json
+import os
+import weakref
 
 from collections.abc import AsyncIterable
 from typing import Any
@@ -6,7 +9,7 @@ from typing import Any
 import httpx
 
 from httpx._types import TimeoutTypes
-from httpx_sse import connect_sse
+from httpx_sse import aconnect_sse
 
 from common.types import (
     A2AClientHTTPError,
@@ -25,15 +28,72 @@ from common.types import (
     SendTaskStreamingResponse,
     SetTaskPushNotificationRequest,
     SetTaskPushNotificationResponse,
+    TaskIdParams,
+    TaskResubscriptionRequest,
+    TaskStatusUpdateEvent,
 )
 
 
+MAX_CONNECTIONS = int(os.getenv('A2A_CLIENT_MAX_CONNECTIONS', '100'))
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv('A2A_CLIENT_MAX_KEEPALIVE', '20'))
+KEEPALIVE_EXPIRY_S = float(os.getenv('A2A_CLIENT_KEEPALIVE_EXPIRY_S', '30'))
+# Longest silence tolerated on a task stream; unset means no read timeout,
+# since agents may legitimately go quiet for long stretches. Opt in (A2AServer
+# pings every 15s) to detect dead connections and reconnect the stream.
+_stream_read_timeout_env = os.getenv('A2A_CLIENT_STREAM_READ_TIMEOUT_S')
+STREAM_READ_TIMEOUT_S = (
+    float(_stream_read_timeout_env) if _stream_read_timeout_env else None
+)
+STREAM_RECONNECTS = int(os.getenv('A2A_CLIENT_STREAM_RECONNECTS', '3'))
+STREAM_RECONNECT_DELAY_S = float(
+    os.getenv('A2A_CLIENT_STREAM_RECONNECT_DELAY_S', '1')
+)
+
+_shared_clients: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, httpx.AsyncClient
+] = weakref.WeakKeyDictionary()
+
+
+def shared_async_client() -> httpx.AsyncClient:
+    """Returns the pooled keep-alive AsyncClient of the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _shared_clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=KEEPALIVE_EXPIRY_S,
+            ),
+        )
+        _shared_clients[loop] = client
+    return client
+
+
+async def aclose_shared_client() -> None:
+    """Closes the running event loop's shared client, if any."""
+    client = _shared_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+def _is_last_response(response: SendTaskStreamingResponse) -> bool:
+    return response.error is not None or (
+        isinstance(response.result, TaskStatusUpdateEvent)
+        and response.result.final
+    )
+
+
 class A2AClient:
     def __init__(
         self,
         agent_card: AgentCard = None,
         url: str = None,
         timeout: TimeoutTypes = 60.0,
+        httpx_client: httpx.AsyncClient | None = None,
+        stream_read_timeout: float | None = STREAM_READ_TIMEOUT_S,
+        max_reconnects: int = STREAM_RECONNECTS,
+        reconnect_delay: float = STREAM_RECONNECT_DELAY_S,
     ):
         if agent_card:
             self.url = agent_card.url
@@ -42,6 +102,24 @@ class A2AClient:
         else:
             raise ValueError('Must provide either agent_card or url')
         self.timeout = timeout
+        # None uses the per-event-loop shared client.
+        self.httpx_client = httpx_client
+        self.stream_read_timeout = stream_read_timeout
+        self.max_reconnects = max_reconnects
+        self.reconnect_delay = reconnect_delay
+
+    def _client(self) -> httpx.AsyncClient:
+        return self.httpx_client or shared_async_client()
+
+    def _stream_timeout(self) -> httpx.Timeout:
+        if isinstance(self.timeout, httpx.Timeout):
+            return httpx.Timeout(
+                connect=self.timeout.connect,
+                read=self.stream_read_timeout,
+                write=self.timeout.write,
+                pool=self.timeout.pool,
+            )
+        return httpx.Timeout(self.timeout, read=self.stream_read_timeout)
 
     async def send_task(self, payload: dict[str, Any]) -> SendTaskResponse:
         request = SendTaskRequest(params=payload)
@@ -51,32 +129,101 @@ class A2AClient:
         self, payload: dict[str, Any]
     ) -> AsyncIterable[SendTaskStreamingResponse]:
         request = SendTaskStreamingRequest(params=payload)
-        with httpx.Client(timeout=None) as client:
-            with connect_sse(
-                client, 'POST', self.url, json=request.model_dump()
-            ) as event_source:
-                try:
-                    for sse in event_source.iter_sse():
-                        yield SendTaskStreamingResponse(**json.loads(sse.data))
-                except json.JSONDecodeError as e:
-                    raise A2AClientJSONError(str(e)) from e
-                except httpx.RequestError as e:
-                    raise A2AClientHTTPError(400, str(e)) from e
+        async for response in self._stream_with_resume(
+            request.params.id, request.model_dump()
+        ):
+            yield response
 
-    async def _send_request(self, request: JSONRPCRequest) -> dict[str, Any]:
-        async with httpx.AsyncClient() as client:
+    async def resubscribe_task(
+        self, payload: dict[str, Any], last_event_id: str | None = None
+    ) -> AsyncIterable[SendTaskStreamingResponse]:
+        """Reattaches to a task stream, replaying events after last_event_id."""
+        request = TaskResubscriptionRequest(params=payload)
+        headers = {'Last-Event-ID': last_event_id} if last_event_id else None
+        async for response in self._stream_with_resume(
+            request.params.id, request.model_dump(), headers, last_event_id
+        ):
+            yield response
+
+    async def _stream_with_resume(
+        self,
+        task_id: str,
+        body: dict[str, Any],
+        headers: dict[str, str] | None = None,
+        last_event_id: str | None = None,
+    ) -> AsyncIterable[SendTaskStreamingResponse]:
+        # A dropped or stalled stream is resumed with tasks/resubscribe from
+        # the last SSE event id the server sent, if it sends them.
+        reconnects = 0
+        while True:
+            failure = None
             try:
-                # Image generation could take time, adding timeout
-                response = await client.post(
-                    self.url, json=request.model_dump(), timeout=self.timeout
+                async for response, event_id in self._stream(body, headers):
+                    if event_id:
+                        last_event_id = event_id
+                        reconnects = 0
+                    yield response
+                    if _is_last_response(response):
+                        return
+            except httpx.RequestError as e:
+                failure = e
+
+            if last_event_id is None or reconnects >= self.max_reconnects:
+                if failure is not None:
+                    raise A2AClientHTTPError(400, str(failure)) from failure
+                return
+            reconnects += 1
+            await asyncio.sleep(self.reconnect_delay * reconnects)
+            body = TaskResubscriptionRequest(
+                params=TaskIdParams(id=task_id)
+            ).model_dump()
+            headers = {'Last-Event-ID': last_event_id}
+
+    async def _stream(
+        self, body: dict[str, Any], headers: dict[str, str] | None
+    ) -> AsyncIterable[tuple[SendTaskStreamingResponse, str]]:
+        async with aconnect_sse(
+            self._client(),
+            'POST',
+            self.url,
+            json=body,
+            headers=dict(headers or {}),
+            timeout=self._stream_timeout(),
+        ) as event_source:
+            response = event_source.response
+            if response.status_code >= 400:
+                raise A2AClientHTTPError(
+                    response.status_code, response.reason_phrase
                 )
-                response.raise_for_status()
-                return response.json()
-            except httpx.HTTPStatusError as e:
-                raise A2AClientHTTPError(e.response.status_code, str(e)) from e
+            try:
+                if 'text/event-stream' not in response.headers.get(
+                    'content-type', ''
+                ):
+                    # A JSON-RPC error instead of a stream.
+                    await response.aread()
+                    yield SendTaskStreamingResponse(**response.json()), ''
+                    return
+                async for sse in event_source.aiter_sse():
+                    yield (
+                        SendTaskStreamingResponse(**json.loads(sse.data)),
+                        sse.id,
+                    )
             except json.JSONDecodeError as e:
                 raise A2AClientJSONError(str(e)) from e
 
+    async def _send_request(self, request: JSONRPCRequest) -> dict[str, Any]:
+        try:
+            # Image generation could take time, adding timeout
+            response = await self._client().post(
+                self.url, json=request.model_dump(), timeout=self.timeout
+            )
+            response.raise_for_status()
+            return response.json()
+        except httpx.HTTPStatusError as e:
+            raise A2AClientHTTPError(e.response.status_code, str(e)) from e
+        except json.JSONDecodeError as e:
+            raise A2AClientJSONError(str(e)) from e
+
     async def get_task(self, payload: dict[str, Any]) -> GetTaskResponse:
         request = GetTaskRequest(params=payload)
         return GetTaskResponse(**await self._send_request(request))
@@ -10,7 +10,7 @@ from starlette.applications import Starlette
 from starlette.requests import Request
 from starlette.responses import JSONResponse
 
-from common.server.task_manager import TaskManager
+from common.server.task_manager import RESUME_FROM_KEY, TaskManager
 from common.types import (
     A2ARequest,
     AgentCard,
@@ -93,6 +93,7 @@ class A2AServer:
                     json_rpc_request
                 )
             elif isinstance(json_rpc_request, TaskResubscriptionRequest):
+                self._apply_last_event_id(request, json_rpc_request)
                 result = await self.task_manager.on_resubscribe_to_task(
                     json_rpc_request
                 )
@@ -107,6 +108,18 @@ class A2AServer:
         except Exception as e:
             return self._handle_exception(e)
 
+    @staticmethod
+    def _apply_last_event_id(
+        request: Request, json_rpc_request: TaskResubscriptionRequest
+    ):
+        # An SSE client reconnecting with Last-Event-ID resumes after it,
+        # unless the request already names a sequence number.
+        last_event_id = request.headers.get('last-event-id')
+        params = json_rpc_request.params
+        metadata = params.metadata or {}
+        if last_event_id and RESUME_FROM_KEY not in metadata:
+            params.metadata = {**metadata, RESUME_FROM_KEY: last_event_id}
+
     def _handle_exception(self, e: Exception) -> JSONResponse:
         if isinstance(e, json.decoder.JSONDecodeError):
             json_rpc_error = JSONParseError()
@@ -128,7 +141,11 @@ class A2AServer:
 
             async def event_generator(result) -> AsyncIterable[dict[str, str]]:
                 async for item in result:
-                    yield {'data': item.model_dump_json(exclude_none=True)}
+                    event = {'data': item.model_dump_json(exclude_none=True)}
+                    event_id = getattr(item, '_event_id', None)
+                    if event_id is not None:
+                        event['id'] = str(event_id)
+                    yield event
 
             return EventSourceResponse(event_generator(result))
         if isinstance(result, JSONRPCResponse):
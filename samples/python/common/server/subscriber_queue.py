@@ -0,0 +1,154 @@
+"""Bounded per-subscriber event queue for SSE task streams."""
+
+import asyncio
+import os
+import time
+
+from collections import deque
+from typing import Any
+
+from common.types import InternalError, TaskStatusUpdateEvent
+
+
+DROP_OLDEST = 'drop_oldest'
+COALESCE = 'coalesce'
+DISCONNECT = 'disconnect'
+OVERFLOW_POLICIES = (DROP_OLDEST, COALESCE, DISCONNECT)
+
+SSE_QUEUE_SIZE = int(os.getenv('A2A_SSE_QUEUE_SIZE', '256'))
+SSE_OVERFLOW_POLICY = os.getenv('A2A_SSE_OVERFLOW_POLICY', COALESCE)
+
+
+def _event_of(item: Any) -> Any:
+    return item[1] if isinstance(item, tuple) else item
+
+
+def _seq_of(item: Any) -> int:
+    return item[0] if isinstance(item, tuple) else 0
+
+
+def _is_status(event: Any) -> bool:
+    return isinstance(event, TaskStatusUpdateEvent)
+
+
+class SubscriberQueue:
+    """Queue of (seq, event) items feeding one SSE response.
+
+    put_nowait never blocks the publisher. When the subscriber is maxsize
+    items behind, the overflow policy decides what gives:
+
+    - drop_oldest: the oldest queued event is discarded.
+    - coalesce: a queued non-final status update superseded by a later one
+      is discarded; falls back to drop_oldest when there is none.
+    - disconnect: the queue is cleared and closed with an error so the
+      client can resubscribe from its last event id.
+    """
+
+    def __init__(self, maxsize: int | None = None, policy: str | None = None):
+        self.maxsize = max(1, maxsize if maxsize is not None else SSE_QUEUE_SIZE)
+        self.policy = policy or SSE_OVERFLOW_POLICY
+        if self.policy not in OVERFLOW_POLICIES:
+            raise ValueError(
+                f'Unknown SSE overflow policy {self.policy!r}, '
+                f'expected one of {OVERFLOW_POLICIES}'
+            )
+        self._items: deque[tuple[Any, float]] = deque()
+        self._waiter: asyncio.Future | None = None
+        self.closed = False
+        self.enqueued = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.max_depth = 0
+        self.last_enqueued_seq = 0
+        self.last_delivered_seq = 0
+
+    def qsize(self) -> int:
+        return len(self._items)
+
+    def empty(self) -> bool:
+        return not self._items
+
+    def put_nowait(self, item: Any) -> bool:
+        """Queues item; returns False if the subscriber is (now) closed."""
+        if self.closed:
+            return False
+        if len(self._items) >= self.maxsize and not self._make_room(item):
+            return False
+        self._items.append((item, time.monotonic()))
+        self.enqueued += 1
+        self.last_enqueued_seq = _seq_of(item) or self.last_enqueued_seq
+        self.max_depth = max(self.max_depth, len(self._items))
+        self._wake()
+        return True
+
+    async def get(self) -> Any:
+        while not self._items:
+            self._waiter = asyncio.get_running_loop().create_future()
+            try:
+                await self._waiter
+            finally:
+                self._waiter = None
+        item, _ = self._items.popleft()
+        self.delivered += 1
+        self.last_delivered_seq = _seq_of(item) or self.last_delivered_seq
+        return item
+
+    def close(self, error: Any = None) -> None:
+        """Closes the queue; a pending error is delivered as the last item."""
+        self.closed = True
+        if error is not None:
+            self.dropped += len(self._items)
+            self._items.clear()
+            self._items.append(((0, error), time.monotonic()))
+        self._wake()
+
+    def _wake(self) -> None:
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+    def _make_room(self, item: Any) -> bool:
+        if self.policy == DISCONNECT:
+            self.close(
+                InternalError(
+                    message='SSE subscriber fell too far behind; '
+                    'resubscribe to resume from the last event id'
+                )
+            )
+            return False
+        if self.policy == COALESCE and self._coalesce(item):
+            return True
+        self._items.popleft()
+        self.dropped += 1
+        return True
+
+    def _coalesce(self, item: Any) -> bool:
+        # Walk newest to oldest: a non-final status update is redundant once
+        # a later status update (queued or incoming) carries the task state.
+        later_status = _is_status(_event_of(item))
+        for i in range(len(self._items) - 1, -1, -1):
+            event = _event_of(self._items[i][0])
+            if not _is_status(event):
+                continue
+            if later_status and not event.final:
+                del self._items[i]
+                self.coalesced += 1
+                return True
+            later_status = True
+        return False
+
+    def stats(self) -> dict[str, Any]:
+        oldest = self._items[0][1] if self._items else None
+        return {
+            'policy': self.policy,
+            'maxsize': self.maxsize,
+            'depth': len(self._items),
+            'max_depth': self.max_depth,
+            'enqueued': self.enqueued,
+            'delivered': self.delivered,
+            'dropped': self.dropped,
+            'coalesced': self.coalesced,
+            'seq_lag': self.last_enqueued_seq - self.last_delivered_seq,
+            'lag_s': round(time.monotonic() - oldest, 3) if oldest else 0.0,
+            'closed': self.closed,
+        }
@@ -1,10 +1,14 @@
 import asyncio
 import logging
+import os
+import time
 
 from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
 from collections.abc import AsyncIterable
+from typing import Any
 
-from common.server.utils import new_not_implemented_error
+from common.server.subscriber_queue import SubscriberQueue
 from common.types import (
     Artifact,
     CancelTaskRequest,
@@ -39,6 +43,55 @@ from common.types import (
 
 logger = logging.getLogger(__name__)
 
+TASK_LOCK_STRIPES = int(os.getenv('A2A_TASK_LOCK_STRIPES', '64'))
+# Finished tasks are dropped after this many idle seconds (0 keeps them).
+FINISHED_TASK_TTL_S = float(os.getenv('A2A_FINISHED_TASK_TTL_S', '3600'))
+# At most this many finished tasks are retained, least recently used
+# first out (0 means no limit).
+MAX_FINISHED_TASKS = int(os.getenv('A2A_MAX_FINISHED_TASKS', '1000'))
+# Messages kept in Task.history (0 means no limit).
+TASK_HISTORY_LIMIT = int(os.getenv('A2A_TASK_HISTORY_LIMIT', '100'))
+# Streaming events buffered per task for tasks/resubscribe replay.
+TASK_REPLAY_EVENTS = int(os.getenv('A2A_TASK_REPLAY_EVENTS', '256'))
+
+TERMINAL_STATES = frozenset(
+    {TaskState.COMPLETED, TaskState.CANCELED, TaskState.FAILED}
+)
+# TaskIdParams.metadata key carrying the last event sequence number a
+# resubscribing client has seen. A2AServer fills it from Last-Event-ID.
+RESUME_FROM_KEY = 'fromSeq'
+
+
+def resume_seq(metadata: dict[str, Any] | None) -> int:
+    """Returns the sequence number a resubscription should resume after."""
+    if not metadata:
+        return 0
+    try:
+        return max(0, int(metadata.get(RESUME_FROM_KEY) or 0))
+    except (TypeError, ValueError):
+        return 0
+
+
+class _ReplayBuffer:
+    """Bounded, sequence-numbered log of the streaming events of one task."""
+
+    __slots__ = ('events', 'last_seq')
+
+    def __init__(self, maxlen: int):
+        self.events: deque[tuple[int, Any]] = deque(maxlen=maxlen)
+        self.last_seq = 0
+
+    def append(self, event: Any) -> int:
+        self.last_seq += 1
+        self.events.append((self.last_seq, event))
+        return self.last_seq
+
+    def since(self, seq: int) -> tuple[list[tuple[int, Any]], bool]:
+        """Returns (events after seq, whether older events were dropped)."""
+        first = self.events[0][0] if self.events else self.last_seq + 1
+        backlog = [item for item in self.events if item[0] > seq]
+        return backlog, seq + 1 < first and seq < self.last_seq
+
 
 class TaskManager(ABC):
     @abstractmethod
@@ -81,22 +134,63 @@ class TaskManager(ABC):
 
 
 class InMemoryTaskManager(TaskManager):
-    def __init__(self):
+    def __init__(
+        self,
+        *,
+        lock_stripes: int | None = None,
+        finished_task_ttl_s: float | None = None,
+        max_finished_tasks: int | None = None,
+        history_limit: int | None = None,
+        replay_events: int | None = None,
+        sse_queue_size: int | None = None,
+        sse_overflow_policy: str | None = None,
+    ):
         self.tasks: dict[str, Task] = {}
         self.push_notification_infos: dict[str, PushNotificationConfig] = {}
+        # Store-wide lock kept for subclasses that coordinate across tasks.
+        # The built-in handlers only take the task's stripe from task_lock().
         self.lock = asyncio.Lock()
-        self.task_sse_subscribers: dict[str, list[asyncio.Queue]] = {}
+        stripes = lock_stripes if lock_stripes is not None else TASK_LOCK_STRIPES
+        self._task_locks = [asyncio.Lock() for _ in range(max(1, stripes))]
+        self.finished_task_ttl_s = (
+            finished_task_ttl_s
+            if finished_task_ttl_s is not None
+            else FINISHED_TASK_TTL_S
+        )
+        self.max_finished_tasks = (
+            max_finished_tasks
+            if max_finished_tasks is not None
+            else MAX_FINISHED_TASKS
+        )
+        self.history_limit = (
+            history_limit if history_limit is not None else TASK_HISTORY_LIMIT
+        )
+        self.replay_events = (
+            replay_events if replay_events is not None else TASK_REPLAY_EVENTS
+        )
+        # Finished task ids -> last access (monotonic), least recent first.
+        self._finished: OrderedDict[str, float] = OrderedDict()
+        self._replay: dict[str, _ReplayBuffer] = {}
+        self.evicted_tasks = 0
+        self.sse_queue_size = sse_queue_size
+        self.sse_overflow_policy = sse_overflow_policy
+        self.task_sse_subscribers: dict[str, list[SubscriberQueue]] = {}
         self.subscriber_lock = asyncio.Lock()
 
+    def task_lock(self, task_id: str) -> asyncio.Lock:
+        """Returns the lock stripe guarding task_id."""
+        return self._task_locks[hash(task_id) % len(self._task_locks)]
+
     async def on_get_task(self, request: GetTaskRequest) -> GetTaskResponse:
         logger.info(f'Getting task {request.params.id}')
         task_query_params: TaskQueryParams = request.params
 
-        async with self.lock:
+        async with self.task_lock(task_query_params.id):
             task = self.tasks.get(task_query_params.id)
             if task is None:
                 return GetTaskResponse(id=request.id, error=TaskNotFoundError())
 
+            self._touch_finished(task.id)
             task_result = self.append_task_history(
                 task, task_query_params.historyLength
             )
@@ -109,7 +203,7 @@ class InMemoryTaskManager(TaskManager):
         logger.info(f'Cancelling task {request.params.id}')
         task_id_params: TaskIdParams = request.params
 
-        async with self.lock:
+        async with self.task_lock(task_id_params.id):
             task = self.tasks.get(task_id_params.id)
             if task is None:
                 return CancelTaskResponse(
@@ -131,7 +225,7 @@ class InMemoryTaskManager(TaskManager):
     async def set_push_notification_info(
         self, task_id: str, notification_config: PushNotificationConfig
     ):
-        async with self.lock:
+        async with self.task_lock(task_id):
             task = self.tasks.get(task_id)
             if task is None:
                 raise ValueError(f'Task not found for {task_id}')
@@ -141,7 +235,7 @@ class InMemoryTaskManager(TaskManager):
     async def get_push_notification_info(
         self, task_id: str
     ) -> PushNotificationConfig:
-        async with self.lock:
+        async with self.task_lock(task_id):
             task = self.tasks.get(task_id)
             if task is None:
                 raise ValueError(f'Task not found for {task_id}')
@@ -149,7 +243,7 @@ class InMemoryTaskManager(TaskManager):
             return self.push_notification_infos[task_id]
 
     async def has_push_notification_info(self, task_id: str) -> bool:
-        async with self.lock:
+        async with self.task_lock(task_id):
             return task_id in self.push_notification_infos
 
     async def on_set_task_push_notification(
@@ -204,7 +298,7 @@ class InMemoryTaskManager(TaskManager):
 
     async def upsert_task(self, task_send_params: TaskSendParams) -> Task:
         logger.info(f'Upserting task {task_send_params.id}')
-        async with self.lock:
+        async with self.task_lock(task_send_params.id):
             task = self.tasks.get(task_send_params.id)
             if task is None:
                 task = Task(
@@ -215,20 +309,74 @@ class InMemoryTaskManager(TaskManager):
                     history=[task_send_params.message],
                 )
                 self.tasks[task_send_params.id] = task
+                self.evict_finished_tasks()
             else:
-                task.history.append(task_send_params.message)
+                # A follow-up message reopens a finished task.
+                self._finished.pop(task.id, None)
+                self._append_history(task, task_send_params.message)
 
             return task
 
     async def on_resubscribe_to_task(
         self, request: TaskResubscriptionRequest
     ) -> AsyncIterable[SendTaskStreamingResponse] | JSONRPCResponse:
-        return new_not_implemented_error(request.id)
+        """Replays buffered events after metadata[RESUME_FROM_KEY], then
+        follows live events until the task's final update.
+        """
+        task_id_params: TaskIdParams = request.params
+        task_id = task_id_params.id
+        after_seq = resume_seq(task_id_params.metadata)
+
+        task = self.tasks.get(task_id)
+        if task is None:
+            return JSONRPCResponse(id=request.id, error=TaskNotFoundError())
+        self._touch_finished(task_id)
+
+        async with self.subscriber_lock:
+            buffer = self._replay.get(task_id)
+            backlog, gap = buffer.since(after_seq) if buffer else ([], False)
+            done = any(_is_last_event(event) for _, event in backlog)
+            tail = None
+            queue = None
+            if not done and task.status.state in TERMINAL_STATES:
+                tail = TaskStatusUpdateEvent(
+                    id=task_id, status=task.status, final=True
+                )
+            elif not done:
+                queue = self._new_subscriber()
+                self.task_sse_subscribers.setdefault(task_id, []).append(queue)
+
+        if gap:
+            logger.warning(
+                f'Resubscription to task {task_id} from {after_seq} missed '
+                f'events older than the replay buffer'
+            )
+        last_seq = backlog[-1][0] if backlog else after_seq
+        return self._replay_and_follow(
+            request.id, task_id, backlog, tail, queue, last_seq
+        )
+
+    async def _replay_and_follow(
+        self, request_id, task_id, backlog, tail, queue, last_seq
+    ) -> AsyncIterable[SendTaskStreamingResponse]:
+        try:
+            for seq, event in backlog:
+                yield self._stream_response(request_id, seq, event)
+            if tail is not None:
+                yield SendTaskStreamingResponse(id=request_id, result=tail)
+            if queue is not None:
+                async for response in self.dequeue_events_for_sse(
+                    request_id, task_id, queue, after_seq=last_seq
+                ):
+                    yield response
+        finally:
+            if queue is not None:
+                await self._remove_sse_consumer(task_id, queue)
 
     async def update_store(
         self, task_id: str, status: TaskStatus, artifacts: list[Artifact]
     ) -> Task:
-        async with self.lock:
+        async with self.task_lock(task_id):
             try:
                 task = self.tasks[task_id]
             except KeyError:
@@ -238,23 +386,86 @@ class InMemoryTaskManager(TaskManager):
             task.status = status
 
             if status.message is not None:
-                task.history.append(status.message)
+                self._append_history(task, status.message)
 
             if artifacts is not None:
                 if task.artifacts is None:
                     task.artifacts = []
                 task.artifacts.extend(artifacts)
 
+            if status.state in TERMINAL_STATES:
+                self._touch_finished(task_id, finished=True)
+                self.evict_finished_tasks()
+            else:
+                self._finished.pop(task_id, None)
+
             return task
 
+    def _append_history(self, task: Task, message) -> None:
+        if task.history is None:
+            task.history = []
+        task.history.append(message)
+        overflow = len(task.history) - self.history_limit
+        if self.history_limit > 0 and overflow > 0:
+            del task.history[:overflow]
+
     def append_task_history(self, task: Task, historyLength: int | None):
-        new_task = task.model_copy()
-        if historyLength is not None and historyLength > 0:
-            new_task.history = new_task.history[-historyLength:]
+        # Shallow copy that shares everything but the trimmed history list.
+        if historyLength is not None and historyLength > 0 and task.history:
+            history = task.history[-historyLength:]
         else:
-            new_task.history = []
+            history = []
+        return task.model_copy(update={'history': history})
+
+    def _touch_finished(self, task_id: str, finished: bool = False) -> None:
+        if finished or task_id in self._finished:
+            self._finished[task_id] = time.monotonic()
+            self._finished.move_to_end(task_id)
+
+    def evict_finished_tasks(self) -> int:
+        """Drops finished tasks past their TTL or beyond the LRU bound."""
+        now = time.monotonic()
+        evicted = 0
+        while self._finished:
+            task_id, last_access = next(iter(self._finished.items()))
+            over_limit = 0 < self.max_finished_tasks < len(self._finished)
+            expired = (
+                self.finished_task_ttl_s > 0
+                and now - last_access > self.finished_task_ttl_s
+            )
+            if not (over_limit or expired):
+                break
+            del self._finished[task_id]
+            self.tasks.pop(task_id, None)
+            self.push_notification_infos.pop(task_id, None)
+            self._replay.pop(task_id, None)
+            if not self.task_sse_subscribers.get(task_id):
+                self.task_sse_subscribers.pop(task_id, None)
+            evicted += 1
+        self.evicted_tasks += evicted
+        return evicted
+
+    def store_stats(self) -> dict[str, int]:
+        return {
+            'tasks': len(self.tasks),
+            'finished_tasks': len(self._finished),
+            'evicted_tasks': self.evicted_tasks,
+            'replay_buffers': len(self._replay),
+            'sse_subscribers': sum(
+                len(q) for q in self.task_sse_subscribers.values()
+            ),
+        }
 
-        return new_task
+    def subscriber_stats(self) -> dict[str, list[dict[str, Any]]]:
+        """Per-subscriber queue depth, drops and lag, keyed by task id."""
+        return {
+            task_id: [q.stats() for q in subscribers]
+            for task_id, subscribers in self.task_sse_subscribers.items()
+            if subscribers
+        }
+
+    def _new_subscriber(self) -> SubscriberQueue:
+        return SubscriberQueue(self.sse_queue_size, self.sse_overflow_policy)
 
     async def setup_sse_consumer(
         self, task_id: str, is_resubscribe: bool = False
@@ -265,33 +476,77 @@ class InMemoryTaskManager(TaskManager):
                     raise ValueError('Task not found for resubscription')
                 self.task_sse_subscribers[task_id] = []
 
-            sse_event_queue = asyncio.Queue(maxsize=0)  # <=0 is unlimited
+            sse_event_queue = self._new_subscriber()
             self.task_sse_subscribers[task_id].append(sse_event_queue)
             return sse_event_queue
 
     async def enqueue_events_for_sse(self, task_id, task_update_event):
         async with self.subscriber_lock:
-            if task_id not in self.task_sse_subscribers:
-                return
+            seq = 0
+            if self.replay_events > 0 and task_id in self.tasks:
+                buffer = self._replay.get(task_id)
+                if buffer is None:
+                    buffer = self._replay[task_id] = _ReplayBuffer(
+                        self.replay_events
+                    )
+                seq = buffer.append(task_update_event)
+
+            current_subscribers = list(
+                self.task_sse_subscribers.get(task_id, ())
+            )
 
-            current_subscribers = self.task_sse_subscribers[task_id]
-            for subscriber in current_subscribers:
-                await subscriber.put(task_update_event)
+        # Fan out without the lock: put_nowait never waits on a slow
+        # consumer, its overflow policy applies instead.
+        lagging = [
+            subscriber
+            for subscriber in current_subscribers
+            if not subscriber.put_nowait((seq, task_update_event))
+        ]
+        for subscriber in lagging:
+            logger.warning(
+                f'Disconnecting slow SSE subscriber of task {task_id}: '
+                f'{subscriber.stats()}'
+            )
+            await self._remove_sse_consumer(task_id, subscriber)
 
     async def dequeue_events_for_sse(
-        self, request_id, task_id, sse_event_queue: asyncio.Queue
+        self,
+        request_id,
+        task_id,
+        sse_event_queue: SubscriberQueue,
+        after_seq: int = 0,
     ) -> AsyncIterable[SendTaskStreamingResponse] | JSONRPCResponse:
         try:
             while True:
-                event = await sse_event_queue.get()
-                if isinstance(event, JSONRPCError):
-                    yield SendTaskStreamingResponse(id=request_id, error=event)
-                    break
+                item = await sse_event_queue.get()
+                seq, event = item if isinstance(item, tuple) else (0, item)
+                if seq and seq <= after_seq:
+                    continue
 
-                yield SendTaskStreamingResponse(id=request_id, result=event)
-                if isinstance(event, TaskStatusUpdateEvent) and event.final:
+                yield self._stream_response(request_id, seq, event)
+                if _is_last_event(event):
                     break
         finally:
-            async with self.subscriber_lock:
-                if task_id in self.task_sse_subscribers:
-                    self.task_sse_subscribers[task_id].remove(sse_event_queue)
+            await self._remove_sse_consumer(task_id, sse_event_queue)
+
+    async def _remove_sse_consumer(self, task_id, sse_event_queue):
+        async with self.subscriber_lock:
+            subscribers = self.task_sse_subscribers.get(task_id)
+            if subscribers and sse_event_queue in subscribers:
+                subscribers.remove(sse_event_queue)
+
+    @staticmethod
+    def _stream_response(request_id, seq, event) -> SendTaskStreamingResponse:
+        if isinstance(event, JSONRPCError):
+            response = SendTaskStreamingResponse(id=request_id, error=event)
+        else:
+            response = SendTaskStreamingResponse(id=request_id, result=event)
+        if seq:
+            response._event_id = seq
+        return response
+
+
+def _is_last_event(event) -> bool:
+    return isinstance(event, JSONRPCError) or (
+        isinstance(event, TaskStatusUpdateEvent) and event.final
+    )
@@ -7,6 +7,7 @@ from pydantic import (
     BaseModel,
     ConfigDict,
     Field,
+    PrivateAttr,
     TypeAdapter,
     field_serializer,
     model_validator,
@@ -188,6 +189,8 @@ class SendTaskStreamingRequest(JSONRPCRequest):
 
 class SendTaskStreamingResponse(JSONRPCResponse):
     result: TaskStatusUpdateEvent | TaskArtifactUpdateEvent | None = None
+    # Per-task event sequence number; sent as the SSE event id, not serialized.
+    _event_id: int | None = PrivateAttr(default=None)
 
 
 class GetTaskRequest(JSONRPCRequest):
@@ -1,16 +1,20 @@
+import asyncio
 import hashlib
 import json
 import logging
+import os
+import random
 import time
 import uuid
 
+from collections import OrderedDict
 from typing import Any
 
 import httpx
 import jwt
 
 from jwcrypto import jwk
-from jwt import PyJWK, PyJWKClient
+from jwt import PyJWK, PyJWKSet
 from starlette.requests import Request
 from starlette.responses import JSONResponse
 
@@ -18,47 +22,123 @@ from starlette.responses import JSONResponse
 logger = logging.getLogger(__name__)
 AUTH_HEADER_PREFIX = 'Bearer '
 
+# A signed token is reused for an identical body for this long. It must stay
+# well inside the receiver's 5 minute iat window.
+PUSH_TOKEN_TTL_S = float(os.getenv('A2A_PUSH_TOKEN_TTL_S', '60'))
+PUSH_TOKEN_CACHE_SIZE = int(os.getenv('A2A_PUSH_TOKEN_CACHE_SIZE', '256'))
+PUSH_QUEUE_SIZE = int(os.getenv('A2A_PUSH_QUEUE_SIZE', '1000'))
+PUSH_WORKERS = int(os.getenv('A2A_PUSH_WORKERS', '4'))
+PUSH_MAX_ATTEMPTS = int(os.getenv('A2A_PUSH_MAX_ATTEMPTS', '3'))
+PUSH_BACKOFF_S = float(os.getenv('A2A_PUSH_BACKOFF_S', '0.5'))
+PUSH_TIMEOUT_S = float(os.getenv('A2A_PUSH_TIMEOUT_S', '10'))
+PUSH_MAX_CONNECTIONS = int(os.getenv('A2A_PUSH_MAX_CONNECTIONS', '50'))
+# Receiver side: JWKS refresh interval, and the minimum spacing between
+# refreshes triggered by an unknown kid.
+JWKS_TTL_S = float(os.getenv('A2A_JWKS_TTL_S', '300'))
+JWKS_MIN_REFRESH_S = float(os.getenv('A2A_JWKS_MIN_REFRESH_S', '10'))
 
-class PushNotificationAuth:
-    def _calculate_request_body_sha256(self, data: dict[str, Any]):
-        """Calculates the SHA256 hash of a request body.
 
-        This logic needs to be same for both the agent who signs the payload and the client verifier.
-        """
-        body_str = json.dumps(
+class PushNotificationAuth:
+    @staticmethod
+    def _serialize_request_body(data: dict[str, Any]) -> bytes:
+        return json.dumps(
             data,
             ensure_ascii=False,
             allow_nan=False,
             indent=None,
             separators=(',', ':'),
-        )
-        return hashlib.sha256(body_str.encode()).hexdigest()
+        ).encode()
+
+    def _calculate_request_body_sha256(self, data: dict[str, Any]):
+        """Calculates the SHA256 hash of a request body.
+
+        This logic needs to be same for both the agent who signs the payload and the client verifier.
+        """
+        return hashlib.sha256(self._serialize_request_body(data)).hexdigest()
 
 
 class PushNotificationSenderAuth(PushNotificationAuth):
-    def __init__(self):
+    """Signs push notifications and delivers them from a bounded queue.
+
+    Pending notifications are keyed by (url, task id): a newer update for a
+    task replaces the one still waiting, so a slow receiver gets the latest
+    state instead of a backlog. Each key is delivered by one worker at a
+    time, retrying network errors, 429 and 5xx with exponential backoff.
+    """
+
+    def __init__(
+        self,
+        queue_size: int = PUSH_QUEUE_SIZE,
+        workers: int = PUSH_WORKERS,
+        max_attempts: int = PUSH_MAX_ATTEMPTS,
+        backoff_s: float = PUSH_BACKOFF_S,
+        token_ttl_s: float = PUSH_TOKEN_TTL_S,
+    ):
         self.public_keys = []
         self.private_key_jwk: PyJWK = None
+        self.queue_size = max(1, queue_size)
+        self.workers = max(1, workers)
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_s = backoff_s
+        self.token_ttl_s = token_ttl_s
+        # body sha256 -> (token, issued at)
+        self._tokens: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        # (url, task id) -> (body bytes, body sha256), oldest first
+        self._pending: OrderedDict[tuple[str, str], tuple[bytes, str]] = (
+            OrderedDict()
+        )
+        self._in_flight: set[tuple[str, str]] = set()
+        self._wakeup: asyncio.Event | None = None
+        self._worker_tasks: list[asyncio.Task] = []
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._client: httpx.AsyncClient | None = None
+        self.stats = {
+            'queued': 0,
+            'coalesced': 0,
+            'dropped': 0,
+            'delivered': 0,
+            'failed': 0,
+            'retries': 0,
+            'tokens_signed': 0,
+            'tokens_reused': 0,
+        }
 
-    @staticmethod
-    async def verify_push_notification_url(url: str) -> bool:
-        async with httpx.AsyncClient(timeout=10) as client:
-            try:
-                validation_token = str(uuid.uuid4())
-                response = await client.get(
-                    url, params={'validationToken': validation_token}
-                )
-                response.raise_for_status()
-                is_verified = response.text == validation_token
+    def _http(self) -> httpx.AsyncClient:
+        self._ensure_loop()
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=PUSH_TIMEOUT_S,
+                limits=httpx.Limits(max_connections=PUSH_MAX_CONNECTIONS),
+            )
+        return self._client
 
-                logger.info(
-                    f'Verified push-notification URL: {url} => {is_verified}'
-                )
-                return is_verified
-            except Exception as e:
-                logger.warning(
-                    f'Error during sending push-notification for URL {url}: {e}'
-                )
+    def _ensure_loop(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Clients, events and workers are bound to the loop they run on.
+            self._loop = loop
+            self._client = None
+            self._wakeup = asyncio.Event()
+            self._worker_tasks = []
+            self._in_flight.clear()
+
+    async def verify_push_notification_url(self, url: str) -> bool:
+        try:
+            validation_token = str(uuid.uuid4())
+            response = await self._http().get(
+                url, params={'validationToken': validation_token}
+            )
+            response.raise_for_status()
+            is_verified = response.text == validation_token
+
+            logger.info(
+                f'Verified push-notification URL: {url} => {is_verified}'
+            )
+            return is_verified
+        except Exception as e:
+            logger.warning(
+                f'Error during sending push-notification for URL {url}: {e}'
+            )
 
         return False
 
@@ -68,6 +148,7 @@ class PushNotificationSenderAuth(PushNotificationAuth):
         )
         self.public_keys.append(key.export_public(as_dict=True))
         self.private_key_jwk = PyJWK.from_json(key.export_private())
+        self._tokens.clear()
 
     def handle_jwks_endpoint(self, _request: Request):
         """Allow clients to fetch public keys."""
@@ -79,41 +160,192 @@ class PushNotificationSenderAuth(PushNotificationAuth):
         Payload is signed with private key and it ensures the integrity of payload for client.
         Including iat prevents from replay attack.
         """
-        iat = int(time.time())
+        return self._token_for_digest(self._calculate_request_body_sha256(data))
 
-        return jwt.encode(
+    def _token_for_digest(self, body_sha256: str) -> str:
+        # The token binds the body digest, so it can only be reused for an
+        # identical body (retries, repeated states) while its iat is fresh.
+        now = time.time()
+        cached = self._tokens.get(body_sha256)
+        if cached is not None and now - cached[1] < self.token_ttl_s:
+            self._tokens.move_to_end(body_sha256)
+            self.stats['tokens_reused'] += 1
+            return cached[0]
+
+        iat = int(now)
+        token = jwt.encode(
             {
                 'iat': iat,
-                'request_body_sha256': self._calculate_request_body_sha256(
-                    data
-                ),
+                'request_body_sha256': body_sha256,
             },
             key=self.private_key_jwk,
             headers={'kid': self.private_key_jwk.key_id},
             algorithm='RS256',
         )
+        self.stats['tokens_signed'] += 1
+        self._tokens[body_sha256] = (token, iat)
+        self._tokens.move_to_end(body_sha256)
+        while len(self._tokens) > PUSH_TOKEN_CACHE_SIZE:
+            self._tokens.popitem(last=False)
+        return token
 
     async def send_push_notification(self, url: str, data: dict[str, Any]):
-        jwt_token = self._generate_jwt(data)
-        headers = {'Authorization': f'Bearer {jwt_token}'}
-        async with httpx.AsyncClient(timeout=10) as client:
+        """Queues a notification for delivery and returns immediately."""
+        self._ensure_loop()
+        # Serialized once: the bytes hashed into the token are the bytes sent.
+        body = self._serialize_request_body(data)
+        key = (url, str(data.get('id', '')))
+        if key in self._pending:
+            self.stats['coalesced'] += 1
+        elif len(self._pending) >= self.queue_size:
+            dropped, _ = self._pending.popitem(last=False)
+            self.stats['dropped'] += 1
+            logger.warning(
+                f'Push-notification queue full, dropping update for {dropped}'
+            )
+        self._pending[key] = (body, hashlib.sha256(body).hexdigest())
+        self.stats['queued'] += 1
+        self._start_workers()
+        self._wakeup.set()
+
+    def _start_workers(self):
+        self._worker_tasks = [t for t in self._worker_tasks if not t.done()]
+        for _ in range(self.workers - len(self._worker_tasks)):
+            self._worker_tasks.append(
+                asyncio.create_task(self._delivery_worker())
+            )
+
+    def _next_pending(self) -> tuple[tuple[str, str], bytes, str] | None:
+        for key in self._pending:
+            if key not in self._in_flight:
+                body, digest = self._pending.pop(key)
+                return key, body, digest
+        return None
+
+    async def _delivery_worker(self):
+        while True:
+            item = self._next_pending()
+            if item is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            key, body, digest = item
+            self._in_flight.add(key)
+            try:
+                await self._deliver(key[0], body, digest)
+            finally:
+                self._in_flight.discard(key)
+                if self._pending:
+                    self._wakeup.set()
+
+    async def _deliver(self, url: str, body: bytes, body_sha256: str) -> bool:
+        for attempt in range(1, self.max_attempts + 1):
             try:
-                response = await client.post(url, json=data, headers=headers)
+                token = self._token_for_digest(body_sha256)
+                headers = {
+                    'Authorization': f'Bearer {token}',
+                    'Content-Type': 'application/json',
+                }
+                response = await self._http().post(
+                    url, content=body, headers=headers
+                )
                 response.raise_for_status()
+                self.stats['delivered'] += 1
                 logger.info(f'Push-notification sent for URL: {url}')
+                return True
             except Exception as e:
-                logger.warning(
-                    f'Error during sending push-notification for URL {url}: {e}'
+                retryable = isinstance(e, httpx.TransportError) or (
+                    isinstance(e, httpx.HTTPStatusError)
+                    and (
+                        e.response.status_code == 429
+                        or e.response.status_code >= 500
+                    )
                 )
+                if not retryable or attempt == self.max_attempts:
+                    self.stats['failed'] += 1
+                    logger.warning(
+                        f'Error during sending push-notification for URL {url}: {e}'
+                    )
+                    return False
+                self.stats['retries'] += 1
+                delay = self.backoff_s * 2 ** (attempt - 1)
+                await asyncio.sleep(delay * (0.5 + random.random()))
+        return False
+
+    async def flush(self, timeout: float | None = None) -> bool:
+        """Waits until queued notifications are delivered or given up."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._pending or self._in_flight:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(0.05)
+        return True
+
+    async def aclose(self):
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
 
 class PushNotificationReceiverAuth(PushNotificationAuth):
-    def __init__(self):
+    def __init__(
+        self,
+        jwks_ttl_s: float = JWKS_TTL_S,
+        jwks_min_refresh_s: float = JWKS_MIN_REFRESH_S,
+    ):
         self.public_keys_jwks = []
-        self.jwks_client = None
+        self.jwks_url: str | None = None
+        self.jwks_ttl_s = jwks_ttl_s
+        self.jwks_min_refresh_s = jwks_min_refresh_s
+        self._signing_keys: dict[str, PyJWK] = {}
+        self._jwks_fetched_at = 0.0
+        self._jwks_attempted_at = 0.0
 
     async def load_jwks(self, jwks_url: str):
-        self.jwks_client = PyJWKClient(jwks_url)
+        self.jwks_url = jwks_url
+        await self._refresh_jwks(force=True)
+
+    async def _refresh_jwks(self, force: bool = False):
+        now = time.monotonic()
+        if not force and now - self._jwks_attempted_at < self.jwks_min_refresh_s:
+            return
+        self._jwks_attempted_at = now
+        try:
+            # A short-lived client: verification may run on a different
+            # event loop than load_jwks.
+            async with httpx.AsyncClient(timeout=PUSH_TIMEOUT_S) as client:
+                response = await client.get(self.jwks_url)
+                response.raise_for_status()
+                jwks = response.json()
+            signing_keys = {
+                key.key_id: key
+                for key in PyJWKSet.from_dict(jwks).keys
+                if key.key_id and key.public_key_use in (None, 'sig')
+            }
+        except Exception as e:
+            # Keep serving the previous keys if the JWKS endpoint is down.
+            logger.warning(f'Error fetching JWKS from {self.jwks_url}: {e}')
+            return
+        self.public_keys_jwks = jwks.get('keys', [])
+        self._signing_keys = signing_keys
+        self._jwks_fetched_at = time.monotonic()
+
+    async def _get_signing_key(self, token: str) -> PyJWK:
+        kid = jwt.get_unverified_header(token).get('kid')
+        if time.monotonic() - self._jwks_fetched_at > self.jwks_ttl_s:
+            await self._refresh_jwks()
+        key = self._signing_keys.get(kid)
+        if key is None:
+            # Possibly a rotated key: refetch, rate limited.
+            await self._refresh_jwks()
+            key = self._signing_keys.get(kid)
+        if key is None:
+            raise ValueError(f'Unable to find a signing key for kid {kid}')
+        return key
 
     async def verify_push_notification(self, request: Request) -> bool:
         auth_header = request.headers.get('Authorization')
@@ -122,7 +354,7 @@ class PushNotificationReceiverAuth(PushNotificationAuth):
             return False
 
         token = auth_header[len(AUTH_HEADER_PREFIX) :]
-        signing_key = self.jwks_client.get_signing_key_from_jwt(token)
+        signing_key = await self._get_signing_key(token)
 
         decode_token = jwt.decode(
             token,
@@ -131,10 +363,15 @@ class PushNotificationReceiverAuth(PushNotificationAuth):
             algorithms=['RS256'],
         )
 
-        actual_body_sha256 = self._calculate_request_body_sha256(
-            await request.json()
-        )
-        if actual_body_sha256 != decode_token['request_body_sha256']:
+        # Senders using this module sign the exact bytes they send; fall
+        # back to the canonical re-serialization for other senders.
+        expected_sha256 = decode_token['request_body_sha256']
+        actual_body_sha256 = hashlib.sha256(await request.body()).hexdigest()
+        if actual_body_sha256 != expected_sha256:
+            actual_body_sha256 = self._calculate_request_body_sha256(
+                await request.json()
+            )
+        if actual_body_sha256 != expected_sha256:
             # Payload signature does not match the digest in signed token.
             raise ValueError('Invalid request body')
 